@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
-import requests
 import argparse
 import json
 import time
 import sys
 from config import get_config
+from src.klaviyo_http import get_session
 
 # Load configuration
 config = get_config()
@@ -55,7 +55,7 @@ def create_campaign(campaign_name, audience_id, dry_run=False):
         log(f"Would create campaign '{campaign_name}' with payload: {json.dumps(payload)}", dry_run)
         return "dry-run-campaign-id"
     
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = get_session().post(url, headers=HEADERS, json=payload)
     if response.status_code not in (200, 201):
         log(f"Error creating campaign: {response.status_code} {response.text}")
         return None
@@ -74,7 +74,7 @@ def get_campaign_messages(campaign_id, dry_run=False):
         log(f"Would fetch messages for campaign ID: {campaign_id}", dry_run)
         return ["dry-run-message-id"]
     
-    response = requests.get(url, headers=headers)
+    response = get_session().get(url, headers=headers)
     if response.status_code >= 400:
         log(f"Error fetching campaign messages: {response.status_code} {response.text}")
         return []
@@ -106,7 +106,7 @@ def assign_template(message_id, template_id, dry_run=False):
         log(f"Would assign template {template_id} to message {message_id} with payload: {json.dumps(payload)}", dry_run)
         return True
     
-    response = requests.patch(url, headers=HEADERS, json=payload)
+    response = get_session().patch(url, headers=HEADERS, json=payload)
     if response.status_code < 400:
         log(f"Assigned template {template_id} to message {message_id}")
         return True
@@ -124,7 +124,7 @@ def check_message_status(message_id, dry_run=False):
         log(f"Would check status of message {message_id}", dry_run)
         return "ready"
     
-    response = requests.get(url, headers=headers)
+    response = get_session().get(url, headers=headers)
     if response.status_code >= 400:
         log(f"Error checking message status: {response.status_code} {response.text}")
         return None
@@ -167,7 +167,7 @@ def send_campaign(campaign_id, dry_run=False):
         log(f"Would send campaign {campaign_id} with payload: {json.dumps(payload)}", dry_run)
         return True
     
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = get_session().post(url, headers=HEADERS, json=payload)
     if response.status_code < 400:
         log(f"Campaign {campaign_id} sent successfully")
         return True
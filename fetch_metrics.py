@@ -1,59 +1,153 @@
 #!/usr/bin/env python3
 
 import os
-import json
 import csv
-import requests
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
 from config import get_config
+from src.klaviyo_http import get_session
+from src.http_cache import cached_get, configure_cache, get_cache, window_ttl
+from src.metric_catalog import MetricCatalog, DEFAULT_CATALOG_FILE
+from src.rate_limiter import klaviyo_rate_limiter
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+METRIC_AGGREGATES_URL = "https://a.klaviyo.com/api/metric-aggregates/"
+MULTI_CAMPAIGN_OUTPUT = "metrics_by_campaign.csv"
+# Persisted metric catalog (env: KLAVIYO_METRIC_CATALOG_FILE)
+METRIC_CATALOG_FILE = os.getenv("KLAVIYO_METRIC_CATALOG_FILE", DEFAULT_CATALOG_FILE)
+
+_metric_catalog = None
+
+# Metric aggregates are in Klaviyo's S rate limit tier; shared by every aggregate call
+AGGREGATE_RATE_LIMIT_TIER = "S"
+AGGREGATE_LIMITER = klaviyo_rate_limiter(AGGREGATE_RATE_LIMIT_TIER)
+
+# Output metric name -> (Klaviyo metric name, aggregate measure)
+CAMPAIGN_METRICS = {
+    "opened": ("Opened Email", "unique"),
+    "clicked": ("Clicked Email", "unique"),
+    "revenue": ("Placed Order", "sum"),
+}
+
+
+def get_metric_catalog():
+    """Return the process-wide metric catalog, loading it on first use"""
+    global _metric_catalog
+    if _metric_catalog is None:
+        config = get_config()
+        _metric_catalog = MetricCatalog(METRIC_CATALOG_FILE, headers={
+            "Authorization": f"Klaviyo-API-Key {config.get('KLAVIYO_API_KEY')}",
+            "Klaviyo-Api-Version": "2025-04-15"
+        })
+    return _metric_catalog
+
+
+def reset_metric_catalog():
+    """Drop the in-process catalog so the next lookup reloads it from disk"""
+    global _metric_catalog
+    _metric_catalog = None
+
+
+def get_metric_ids(names, force_refresh=False):
+    """Get metric IDs for many names with at most one catalog fetch"""
+    return get_metric_catalog().lookup(names, force_refresh=force_refresh)
 
 
 def get_metric_id(name, force_refresh=False):
     """Get metric ID by name, with caching"""
-    cache_file = ".metric_ids.json"
-    
-    # Try to load from cache first
-    if not force_refresh and os.path.exists(cache_file):
-        with open(cache_file, 'r') as f:
-            try:
-                metric_ids = json.load(f)
-                if name in metric_ids and metric_ids[name]:
-                    return metric_ids[name]
-            except json.JSONDecodeError:
-                pass  # Cache file is invalid, continue to API lookup
-    
-    # Lookup via API
-    config = get_config()
-    headers = {
-        "Authorization": f"Klaviyo-API-Key {config['KLAVIYO_API_KEY']}",
-        "Klaviyo-Api-Version": "2025-04-15"
-    }
-    
-    response = requests.get(
-        "https://a.klaviyo.com/api/metrics/", 
-        headers=headers,
-        params={"filter": f"equals(name,'{name}')"}
-    )
+    return get_metric_catalog().get(name, force_refresh=force_refresh)
+
+
+def _estimate_delivered(opened):
+    # Estimate delivered count (could be fetched from a different endpoint in a real implementation)
+    return int(opened * 2.5)  # Simple estimation for demo purposes
+
+
+def _merge_indexed(series, campaign_id):
+    merged = {}
+    for field, rows in series.items():
+        for row in rows:
+            key = (row.get("campaign_id", campaign_id), row.get("date"))
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {"campaign_id": key[0], "date": key[1],
+                                       "opened": 0, "clicked": 0, "revenue": 0}
+            entry[field] = row.get("value", 0)
     
-    data = response.json().get("data", [])
-    metric_id = data[0]["id"] if data else None
+    combined = []
+    for key in sorted(merged, key=lambda k: (k[0] or "", k[1] or "")):
+        entry = merged[key]
+        entry["delivered"] = _estimate_delivered(entry["opened"])
+        combined.append(entry)
+    return combined
+
+
+def _merge_vectorized(series, campaign_id):
+    frames = []
+    for field, rows in series.items():
+        frame = pd.DataFrame.from_records(rows, columns=["campaign_id", "date", "value"])
+        if campaign_id is not None:
+            frame["campaign_id"] = frame["campaign_id"].fillna(campaign_id)
+        frames.append(frame.set_index(["campaign_id", "date"])["value"].rename(field))
     
-    # Update cache
-    metric_ids = {}
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'r') as f:
-                metric_ids = json.load(f)
-        except json.JSONDecodeError:
-            pass  # Start with empty dict if cache is corrupted
+    merged = pd.concat(frames, axis=1, join="outer").fillna(0).sort_index().reset_index()
+    merged["delivered"] = (merged["opened"] * 2.5).astype(int)
+    # Build the dicts from whole columns: DataFrame.to_dict("records") boxes
+    # every cell one at a time and costs more than the merge itself
+    keys = merged[["campaign_id", "date"]].astype(object)
+    keys = keys.where(keys.notna(), None)
+    return [
+        {"campaign_id": cid, "date": day, "delivered": delivered,
+         "opened": opened, "clicked": clicked, "revenue": revenue}
+        for cid, day, delivered, opened, clicked, revenue in zip(
+            keys["campaign_id"].tolist(), keys["date"].tolist(), merged["delivered"].tolist(),
+            merged["opened"].tolist(), merged["clicked"].tolist(), merged["revenue"].tolist())
+    ]
+
+
+def merge_metric_series(opens, clicks, revenue, campaign_id=None, vectorized=False):
+    """Outer-join open, click and revenue series on (campaign, date)
     
-    metric_ids[name] = metric_id
+    Every (campaign, date) present in any series gets a row; missing values
+    are 0. Rows are ordered by campaign and date.
     
-    with open(cache_file, 'w') as f:
-        json.dump(metric_ids, f)
+    Args:
+        opens, clicks, revenue: Aggregate rows with "date", "value" and optionally "campaign_id"
+        campaign_id: Campaign for rows that don't carry a campaign_id
+        vectorized: Merge with pandas instead of a dict index. Same output; for
+            large inputs it takes about as long as the dict index, and longer
+            for small ones, since building the output dicts dominates.
     
-    return metric_id
+    Returns:
+        List of dicts with campaign_id, date, delivered, opened, clicked and revenue
+    """
+    series = {"opened": opens, "clicked": clicks, "revenue": revenue}
+    if vectorized:
+        if not PANDAS_AVAILABLE:
+            raise ImportError("pandas is required for the vectorized merge")
+        return _merge_vectorized(series, campaign_id)
+    return _merge_indexed(series, campaign_id)
+
+
+def _timed_aggregate(label, headers, params, end_date):
+    """Run one metric-aggregates request within the rate limit and time it"""
+    AGGREGATE_LIMITER.acquire()
+    started = time.perf_counter()
+    response = cached_get(
+        get_session(),
+        METRIC_AGGREGATES_URL,
+        headers=headers,
+        params=params,
+        ttl=window_ttl(end_date)
+    )
+    return label, response, time.perf_counter() - started
 
 
 def fetch_metrics(start_date=None, end_date=None, dry_run=False):
@@ -86,12 +180,11 @@ def fetch_metrics(start_date=None, end_date=None, dry_run=False):
                 writer.writerow(row)
         
         # Also save mock metric IDs for reference
-        with open('.metric_ids.json', 'w') as f:
-            json.dump({
-                "Opened Email": "mock-open-id-123",
-                "Clicked Email": "mock-click-id-456",
-                "Placed Order": "mock-revenue-id-789"
-            }, f)
+        get_metric_catalog().update({
+            "Opened Email": "mock-open-id-123",
+            "Clicked Email": "mock-click-id-456",
+            "Placed Order": "mock-revenue-id-789"
+        })
         
         print(f"Generated mock metrics data in metrics.csv")
         return True
@@ -103,113 +196,205 @@ def fetch_metrics(start_date=None, end_date=None, dry_run=False):
     }
     
     # Get metric IDs
-    opened_id = get_metric_id("Opened Email")
-    clicked_id = get_metric_id("Clicked Email")
-    revenue_id = get_metric_id("Placed Order")
+    metric_ids = get_metric_ids(["Opened Email", "Clicked Email", "Placed Order"])
+    opened_id = metric_ids["Opened Email"]
+    clicked_id = metric_ids["Clicked Email"]
+    revenue_id = metric_ids["Placed Order"]
     
     if not all([opened_id, clicked_id, revenue_id]):
         print("Error: Could not find all required metric IDs")
         return False
     
-    # Fetch open/click metrics
-    metrics_data = []
-    for metric_id in [opened_id, clicked_id]:
-        response = requests.get(
-            "https://a.klaviyo.com/api/metric-aggregates/",
-            headers=headers,
-            params={
-                "measure": "unique",
-                "metric_id": metric_id,
-                "start_date": start_date,
-                "end_date": end_date,
-                "filters": f"[['equals','campaign_id','{campaign_id}']]"
-            }
-        )
-        
+    # Fetch open/click/revenue aggregates concurrently
+    base_params = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "filters": f"[['equals','campaign_id','{campaign_id}']]"
+    }
+    calls = [
+        ("opened", {"measure": "unique", "metric_id": opened_id, **base_params}),
+        ("clicked", {"measure": "unique", "metric_id": clicked_id, **base_params}),
+        ("revenue", {"measure": "sum", "metric_id": revenue_id, **base_params}),  # Use sum for revenue
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        results = list(executor.map(lambda call: _timed_aggregate(call[0], headers, call[1], end_date), calls))
+    wall_time = time.perf_counter() - started
+    
+    series = {}
+    for label, response, elapsed in results:
+        print(f"  {label} aggregate: {elapsed:.2f}s")
         if response.status_code != 200:
-            print(f"Error fetching metrics: {response.status_code} {response.text}")
+            print(f"Error fetching {label} metrics: {response.status_code} {response.text}")
             return False
-        
-        data = response.json()
-        metrics_data.append(data)
-    
-    # Fetch revenue metrics separately
-    revenue_response = requests.get(
-        "https://a.klaviyo.com/api/metric-aggregates/",
-        headers=headers,
-        params={
-            "measure": "sum",  # Use sum for revenue
-            "metric_id": revenue_id,
-            "start_date": start_date,
-            "end_date": end_date,
-            "filters": f"[['equals','campaign_id','{campaign_id}']]"
-        }
-    )
-    
-    if revenue_response.status_code != 200:
-        print(f"Error fetching revenue: {revenue_response.status_code} {revenue_response.text}")
-        return False
-    
-    revenue_data = revenue_response.json()
+        series[label] = response.json().get("data", [])
+    print(f"  aggregates wall time: {wall_time:.2f}s (sequential would be ~{sum(r[2] for r in results):.2f}s)")
     
     # Process and combine the data
-    combined_data = []
-    for date_entry in metrics_data[0].get("data", []):
-        date = date_entry.get("date")
-        opened = date_entry.get("value", 0)
-        
-        # Find matching click data for this date
-        clicked = 0
-        for click_entry in metrics_data[1].get("data", []):
-            if click_entry.get("date") == date:
-                clicked = click_entry.get("value", 0)
-                break
-        
-        # Find matching revenue data for this date
-        revenue = 0
-        for rev_entry in revenue_data.get("data", []):
-            if rev_entry.get("date") == date:
-                revenue = rev_entry.get("value", 0)
-                break
-        
-        # Estimate delivered count (could be fetched from a different endpoint in a real implementation)
-        delivered = int(opened * 2.5)  # Simple estimation for demo purposes
-        
-        combined_data.append({
-            "date": date,
-            "delivered": delivered,
-            "opened": opened,
-            "clicked": clicked,
-            "revenue": revenue
-        })
+    combined_data = merge_metric_series(series["opened"], series["clicked"], series["revenue"],
+                                        campaign_id=campaign_id)
     
     # Write to CSV
     with open('metrics.csv', 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=["date", "delivered", "opened", "clicked", "revenue"])
+        writer = csv.DictWriter(f, fieldnames=["date", "delivered", "opened", "clicked", "revenue"],
+                                extrasaction="ignore")
         writer.writeheader()
         for row in combined_data:
             writer.writerow(row)
     
-    # Also save metric IDs for reference
-    with open('.metric_ids.json', 'w') as f:
-        json.dump({
-            "Opened Email": opened_id,
-            "Clicked Email": clicked_id,
-            "Placed Order": revenue_id
-        }, f)
-    
     print(f"Fetched metrics data for campaign {campaign_id} and saved to metrics.csv")
     return True
 
 
+def fetch_aggregate_rows(headers, params, end_date=None):
+    """Fetch every row of a metric aggregate, following JSON:API `links.next` cursors
+    
+    Returns:
+        List of aggregate rows, or None if a request failed
+    """
+    rows = []
+    url = METRIC_AGGREGATES_URL
+    while url:
+        AGGREGATE_LIMITER.acquire()
+        response = cached_get(get_session(), url, headers=headers, params=params, ttl=window_ttl(end_date))
+        if response.status_code != 200:
+            print(f"Error fetching metrics: {response.status_code} {response.text}")
+            return None
+        
+        body = response.json()
+        rows.extend(body.get("data", []))
+        # The next link already carries the cursor and the original query
+        url = (body.get("links") or {}).get("next")
+        params = None
+    return rows
+
+
+def write_long_metrics(rows, output_file=MULTI_CAMPAIGN_OUTPUT):
+    """Write (campaign_id, date, metric, value) rows in a stable order"""
+    rows = sorted(rows, key=lambda row: (row["campaign_id"], row["date"], row["metric"]))
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["campaign_id", "date", "metric", "value"])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def fetch_metrics_by_campaign(start_date=None, end_date=None, campaign_ids=None, dry_run=False,
+                              output_file=MULTI_CAMPAIGN_OUTPUT):
+    """Fetch metrics for many campaigns with one grouped aggregate query per metric
+    
+    Each metric is requested once, grouped by campaign_id (and filtered to
+    `campaign_ids` when given), so the number of API calls depends only on the
+    number of metrics and result pages, not on the number of campaigns.
+    
+    Args:
+        start_date: Start date in ISO format (default: 7 days ago, UTC)
+        end_date: End date in ISO format (default: today, UTC)
+        campaign_ids: Campaign IDs to include (default: every campaign)
+        dry_run: If True, print what would be done without making API calls
+        output_file: Long-format CSV with campaign_id, date, metric, value columns
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    config = get_config()
+    mode = config.get('MODE', 'mock')
+    scope = f"{len(campaign_ids)} campaigns" if campaign_ids else "all campaigns"
+    
+    if not start_date:
+        start_date = (datetime.now(UTC).date() - timedelta(days=7)).isoformat()
+    if not end_date:
+        end_date = datetime.now(UTC).date().isoformat()
+    
+    if dry_run:
+        print(f"Would fetch metrics for {scope} from {start_date} to {end_date} (UTC) "
+              f"with {len(CAMPAIGN_METRICS)} grouped aggregate queries")
+        return True
+    
+    if mode == 'mock':
+        mock_values = {"opened": 45, "clicked": 20, "revenue": 250.00}
+        rows = [
+            {"campaign_id": campaign_id, "date": day, "metric": metric, "value": value}
+            for campaign_id in (campaign_ids or [config['CAMPAIGN_ID']])
+            for day in (start_date, end_date)
+            for metric, value in mock_values.items()
+        ]
+        write_long_metrics(rows, output_file)
+        print(f"Generated mock metrics data for {scope} in {output_file}")
+        return True
+    
+    headers = {
+        "Authorization": f"Klaviyo-API-Key {config['KLAVIYO_API_KEY']}",
+        "Klaviyo-Api-Version": "2025-04-15"
+    }
+    
+    filters = None
+    if campaign_ids:
+        quoted = ",".join(f"'{campaign_id}'" for campaign_id in campaign_ids)
+        filters = f"[['any','campaign_id',[{quoted}]]]"
+    
+    metric_ids = get_metric_ids(metric_name for metric_name, _ in CAMPAIGN_METRICS.values())
+    
+    rows = []
+    for metric, (metric_name, measure) in CAMPAIGN_METRICS.items():
+        metric_id = metric_ids[metric_name]
+        if not metric_id:
+            print(f"Error: Could not find metric ID for {metric_name}")
+            return False
+        
+        params = {
+            "measure": measure,
+            "metric_id": metric_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "by": "campaign_id"
+        }
+        if filters:
+            params["filters"] = filters
+        
+        aggregate_rows = fetch_aggregate_rows(headers, params, end_date)
+        if aggregate_rows is None:
+            return False
+        
+        for row in aggregate_rows:
+            rows.append({
+                "campaign_id": row.get("campaign_id"),
+                "date": row.get("date"),
+                "metric": metric,
+                "value": row.get("value", 0)
+            })
+    
+    write_long_metrics(rows, output_file)
+    campaign_count = len({row["campaign_id"] for row in rows})
+    print(f"Fetched metrics for {campaign_count} campaigns and saved to {output_file}")
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch metrics for a Klaviyo campaign")
     parser.add_argument("--start-date", help="Start date in ISO format (YYYY-MM-DD)")
     parser.add_argument("--end-date", help="End date in ISO format (YYYY-MM-DD)")
     parser.add_argument("--dry-run", action="store_true", help="Print what would be done without making API calls")
+    parser.add_argument("--http-cache", metavar="DIR", help="Cache GET responses in DIR (or set KLAVIYO_HTTP_CACHE_DIR)")
+    parser.add_argument("--all-campaigns", action="store_true",
+                        help=f"Fetch metrics for every campaign into a long-format file ({MULTI_CAMPAIGN_OUTPUT})")
+    parser.add_argument("--campaign-ids", help="Comma-separated campaign IDs to fetch into the long-format file")
+    parser.add_argument("--output", help=f"Output file for multi-campaign mode (default: {MULTI_CAMPAIGN_OUTPUT})")
     args = parser.parse_args()
     
-    success = fetch_metrics(args.start_date, args.end_date, args.dry_run)
+    if args.http_cache:
+        configure_cache(args.http_cache)
+    
+    if args.all_campaigns or args.campaign_ids:
+        campaign_ids = [c.strip() for c in args.campaign_ids.split(",") if c.strip()] if args.campaign_ids else None
+        success = fetch_metrics_by_campaign(args.start_date, args.end_date, campaign_ids, args.dry_run,
+                                            args.output or MULTI_CAMPAIGN_OUTPUT)
+    else:
+        success = fetch_metrics(args.start_date, args.end_date, args.dry_run)
+    
+    cache = get_cache()
+    if cache:
+        print(f"HTTP cache: {cache.stats()}")
     return 0 if success else 1
 
 
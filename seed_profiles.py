@@ -2,15 +2,12 @@
 import os
 import sys
 import random
-import time
 import uuid
 import argparse
-import requests
 from datetime import datetime, timedelta, UTC
-from functools import wraps
-from requests.exceptions import RequestException, HTTPError
 
 from config import get_config
+from src.klaviyo_http import get_session
 
 # Load configuration
 config = get_config()
@@ -20,8 +17,6 @@ KLAVIYO_API_VERSION = config['KLAVIYO_API_VERSION']
 
 # API constants
 BASE_URL = "https://a.klaviyo.com/api"
-MAX_RETRIES = 5
-BASE_DELAY = 1.0  # seconds
 BATCH_SIZE = 100  # profiles per request (max 1000)
 
 # Sample data
@@ -36,62 +31,13 @@ LAST_NAMES = [
 CATEGORIES = ["Apparel", "Electronics", "Beauty", "Home", "Toys", "Sports", "Books"]
 
 
-def klaviyo_retry(func):
-    """Decorator to handle Klaviyo API rate limits and transient errors with exponential backoff
+def post_json_api(url, payload, dry_run=False):
+    """Make a POST request to the Klaviyo JSON API with proper headers
     
-    Treats HTTP 200, 201, and 202 as success codes for idempotent operations:
-    - 200: Resource already existed/updated
-    - 201: Resource created (first-time profile)
-    - 202: Request accepted for async processing
+    The request carries an Idempotency-Key, so the shared Klaviyo session (see
+    src/klaviyo_http.py) retries it on 429, 5xx and read errors like a GET;
+    errors left after the retries are raised.
     """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        retries = 0
-        delay = BASE_DELAY
-        while True:
-            try:
-                resp = func(*args, **kwargs)
-                # 200, 201, 202 are all considered success for upserts/list-subscribe
-                # 200 = already existed/updated
-                # 201 = resource created (first-time profile)
-                # 202 = accepted for async list-subscribe batch
-                if resp.status_code in (200, 201, 202):
-                    return resp  # Success
-                # For other status codes, raise_for_status converts 4xx / 5xx to HTTPError
-                resp.raise_for_status()
-                return resp  # Success for any other 2xx
-            except HTTPError as e:
-                status = e.response.status_code
-                if status == 429:  # Rate limited
-                    # Honor Retry-After if available
-                    retry_after = e.response.headers.get("Retry-After")
-                    wait = float(retry_after) if retry_after else delay
-                    print(f"Rate limited. Waiting {wait} seconds before retry...")
-                elif 500 <= status < 600:  # Transient server error
-                    wait = delay
-                    print(f"Server error {status}. Waiting {wait} seconds before retry...")
-                else:
-                    print(f"Error {status}: {e.response.text}")
-                    raise  # Permanent failure
-            except RequestException as e:
-                # Connection reset, DNS, timeout, etc.
-                wait = delay
-                print(f"Request exception: {str(e)}. Waiting {wait} seconds before retry...")
-
-            retries += 1
-            if retries > MAX_RETRIES:
-                raise RuntimeError(f"Max retries exceeded for {func.__name__}")
-
-            jitter = random.uniform(0, 0.3 * wait)  # Add 0-30% jitter
-            time.sleep(wait + jitter)
-            delay *= 2  # Exponential backoff
-
-    return wrapper
-
-
-@klaviyo_retry
-def post_json_api(url, payload, dry_run=False):
-    """Make a POST request to the Klaviyo JSON API with proper headers"""
     if dry_run:
         print(f"[DRY-RUN] Would POST to {url} with payload: {payload}")
         return type('obj', (object,), {'status_code': 200, 'json': lambda: {}, 'raise_for_status': lambda: None})
@@ -104,7 +50,10 @@ def post_json_api(url, payload, dry_run=False):
         "Accept": "application/json",
         "Idempotency-Key": str(uuid.uuid4())  # Prevent duplicates on retry
     }
-    return requests.post(url, headers=headers, json=payload, timeout=15)
+    response = get_session().post(url, headers=headers, json=payload, timeout=15)
+    # Retries are exhausted at this point, so surface any remaining error
+    response.raise_for_status()
+    return response
 
 
 def random_email(first, last, index, prefix=None):
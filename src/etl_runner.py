@@ -3,9 +3,12 @@ import os
 import argparse
 import json
 import csv
-import time
 import sys
-from datetime import datetime
+import asyncio
+import tempfile
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date, UTC
 from typing import Optional, List, Dict, Any, Union
 from pathlib import Path
 
@@ -14,46 +17,200 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import from other modules using relative imports to avoid circular dependencies
 try:
-    from .klaviyo_api_ingest import fetch_all_campaigns, fetch_campaign_metrics
-    from .lookml_field_mapper import normalize_records
+    from .klaviyo_api_ingest import fetch_all_campaigns, iter_campaign_pages, fetch_campaign_metrics, async_fetch_all_campaigns, MAX_CONCURRENCY, METRICS_WINDOW_DAYS
+    from .klaviyo_http import get_session
+    from .etl_state import ETLStateStore, DEFAULT_STATE_FILE
+    from .rate_limiter import klaviyo_rate_limiter
+    from .lookml_field_mapper import normalize_records, normalize_record
     from .s3_uploader import upload_file
     from .utils.s3_uploader import upload_csv_to_s3
-    from .fivetran_connector_runner import run_connector
+    from .fivetran_connector_runner import run_connector, run_connectors, parse_duration
     from .postgres_extract_export import fetch_to_dataframe, fetch_and_export_to_csv
 except ImportError:
     # Fallback for direct script execution
-    from klaviyo_api_ingest import fetch_all_campaigns, fetch_campaign_metrics
-    from lookml_field_mapper import normalize_records
+    from klaviyo_api_ingest import fetch_all_campaigns, iter_campaign_pages, fetch_campaign_metrics, async_fetch_all_campaigns, MAX_CONCURRENCY, METRICS_WINDOW_DAYS
+    from klaviyo_http import get_session
+    from etl_state import ETLStateStore, DEFAULT_STATE_FILE
+    from rate_limiter import klaviyo_rate_limiter
+    from lookml_field_mapper import normalize_records, normalize_record
     from s3_uploader import upload_file
     from utils.s3_uploader import upload_csv_to_s3
-    from fivetran_connector_runner import run_connector
+    from fivetran_connector_runner import run_connector, run_connectors, parse_duration
     from postgres_extract_export import fetch_to_dataframe, fetch_and_export_to_csv
 
 # Constants
 DEFAULT_OUTPUT_DIR = "data"
 DEFAULT_OUTPUT_FILE = "klaviyo_campaign_metrics.csv"
+# Campaign metric fields that are summed when merging incremental windows
+METRIC_COUNTERS = ("delivered", "opened", "clicked", "revenue")
+# Rate fields recomputed from the merged counters (rate -> numerator; denominator is delivered)
+METRIC_RATES = {"open_rate": "opened", "click_rate": "clicked"}
 
 # ETL Functions
-def extract_klaviyo(dry_run=False):
-    """Extract data from Klaviyo API"""
+def extract_klaviyo(dry_run=False, max_workers=None, limiter=None, use_async=False):
+    """Extract data from Klaviyo API
+    
+    Per-campaign metrics are fetched on a bounded worker pool. Every request takes
+    a slot from a sliding-window limiter set to Klaviyo's burst/steady rate limits,
+    and campaigns are returned in the same order as the sequential fetch.
+    
+    Args:
+        dry_run: If True, don't make actual API calls
+        max_workers: Size of the worker pool (default: KLAVIYO_MAX_CONCURRENCY)
+        limiter: Rate limiter shared by all workers (default: Klaviyo M tier)
+        use_async: If True, drive pagination and metrics from one asyncio event loop
+    """
     print("Extracting data from Klaviyo API...")
     
+    if use_async:
+        campaigns = asyncio.run(async_fetch_all_campaigns(
+            dry_run, concurrency=max_workers, limiter=limiter or klaviyo_rate_limiter()
+        ))
+        print(f"Found {len(campaigns)} campaigns")
+        return campaigns
+    
     # Fetch all campaigns
     campaigns = fetch_all_campaigns(dry_run)
     print(f"Found {len(campaigns)} campaigns")
     
-    # Fetch metrics for each campaign
-    for campaign in campaigns:
+    _fetch_metrics_concurrently(campaigns, dry_run, max_workers, limiter)
+    return campaigns
+
+def _fetch_metrics_concurrently(campaigns, dry_run=False, max_workers=None, limiter=None, windows=None):
+    """Merge per-campaign metrics into `campaigns` using a rate-limited worker pool
+    
+    Args:
+        campaigns: Campaign dicts to update in place
+        dry_run: If True, don't make actual API calls
+        max_workers: Size of the worker pool (default: KLAVIYO_MAX_CONCURRENCY)
+        limiter: Rate limiter shared by all workers (default: Klaviyo M tier)
+        windows: Optional {campaign_id: (start_date, end_date)} metric windows
+    
+    Returns:
+        Set of IDs of campaigns whose metrics could not be fetched
+    """
+    max_workers = max_workers or MAX_CONCURRENCY
+    limiter = limiter or klaviyo_rate_limiter()
+    if not dry_run:
+        # Give every worker its own keep-alive connection instead of blocking on the pool
+        get_session(pool_size=max_workers)
+    
+    def fetch_metrics_for(campaign):
         campaign_id = campaign["id"]
+        limiter.acquire()
         print(f"Fetching metrics for campaign {campaign_id}...")
-        metrics = fetch_campaign_metrics(campaign_id, dry_run)
-        # Add metrics to campaign data
-        campaign.update(metrics)
-        
-        # Add a small delay to avoid rate limiting
-        time.sleep(0.2)
+        if windows is not None:
+            start_date, end_date = windows[campaign_id]
+            try:
+                return fetch_campaign_metrics(campaign_id, dry_run, start_date=start_date, end_date=end_date,
+                                              raise_on_error=True)
+            except requests.exceptions.RequestException:
+                # None marks a failed fetch, as opposed to a window with no data
+                return None
+        return fetch_campaign_metrics(campaign_id, dry_run)
     
-    return campaigns
+    failed = set()
+    # Fetch metrics for each campaign; map() yields results in input order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for campaign, metrics in zip(campaigns, executor.map(fetch_metrics_for, campaigns)):
+            if metrics is None:
+                failed.add(campaign["id"])
+                continue
+            # Add metrics to campaign data
+            campaign.update(metrics)
+    return failed
+
+def _recompute_rates(record):
+    """Derive rate fields from a record's summed counters so they cover the same period"""
+    delivered = record.get("delivered")
+    if not isinstance(delivered, (int, float)) or delivered <= 0:
+        return
+    for rate_field, counter in METRIC_RATES.items():
+        if isinstance(record.get(counter), (int, float)):
+            record[rate_field] = record[counter] / delivered
+
+def extract_klaviyo_incremental(state, dry_run=False, max_workers=None, limiter=None, today=None):
+    """Extract Klaviyo campaigns, fetching only metric days newer than the watermarks
+    
+    Each campaign has a watermark holding the last complete day whose metrics
+    were fetched. Only days after it (up to yesterday) are requested, and the
+    counters are added to the previous run's snapshot; open and click rates
+    are then recomputed from the summed counters. Campaigns from earlier
+    runs that no longer appear in the listing are kept.
+    
+    Watermarks and the snapshot are updated on `state` in memory; the caller
+    saves them once the run has succeeded. A campaign whose metric fetch
+    failed keeps its old watermark, so its missing days are retried next run.
+    
+    Args:
+        state: ETLStateStore holding watermarks and the previous snapshot
+        dry_run: If True, don't make actual API calls
+        max_workers: Size of the worker pool (default: KLAVIYO_MAX_CONCURRENCY)
+        limiter: Rate limiter shared by all workers (default: Klaviyo M tier)
+        today: Override for the current date (for testing)
+    
+    Returns:
+        List of campaign dictionaries with merged metrics
+    """
+    print("Extracting data from Klaviyo API (incremental)...")
+    today = today or datetime.now(UTC).date()
+    last_complete_day = today - timedelta(days=1)
+    
+    previous = {record["id"]: record for record in state.get_records("klaviyo", "campaigns")}
+    campaigns = fetch_all_campaigns(dry_run)
+    print(f"Found {len(campaigns)} campaigns")
+    
+    windows = {}
+    for campaign in campaigns:
+        watermark = state.get_watermark("klaviyo", "campaign_metrics", campaign["id"])
+        if watermark:
+            start = date.fromisoformat(watermark) + timedelta(days=1)
+        else:
+            start = today - timedelta(days=METRICS_WINDOW_DAYS)
+        if start <= last_complete_day:
+            windows[campaign["id"]] = (start.isoformat(), last_complete_day.isoformat())
+    
+    to_fetch = [{"id": campaign["id"]} for campaign in campaigns if campaign["id"] in windows]
+    print(f"Fetching new metric days for {len(to_fetch)} of {len(campaigns)} campaigns")
+    failed = _fetch_metrics_concurrently(to_fetch, dry_run, max_workers, limiter, windows)
+    if failed:
+        print(f"Metrics could not be fetched for {len(failed)} campaigns; their watermarks are not advanced")
+    fetched = {record.pop("id"): record for record in to_fetch}
+    
+    merged = []
+    for campaign in campaigns:
+        campaign_id = campaign["id"]
+        record = dict(previous.pop(campaign_id, {}))
+        record.update(campaign)
+        for field, value in fetched.get(campaign_id, {}).items():
+            if field in METRIC_COUNTERS and isinstance(record.get(field), (int, float)):
+                record[field] = record[field] + value
+            else:
+                record[field] = value
+        _recompute_rates(record)
+        if campaign_id in windows and campaign_id not in failed:
+            state.set_watermark("klaviyo", "campaign_metrics", windows[campaign_id][1], key=campaign_id)
+        merged.append(record)
+    
+    # Keep campaigns from earlier runs that are no longer listed
+    merged.extend(previous.values())
+    
+    state.set_records("klaviyo", "campaigns", merged)
+    state.set_watermark("klaviyo", "campaigns", datetime.now(UTC).isoformat())
+    return merged
+
+def extract_klaviyo_stream(dry_run=False, max_workers=None, limiter=None):
+    """Yield Klaviyo campaigns with metrics merged in, one page at a time
+    
+    Only the current page is held in memory, so memory use stays flat no
+    matter how many campaigns the account has.
+    """
+    print("Streaming data from Klaviyo API...")
+    limiter = limiter or klaviyo_rate_limiter()
+    for page_number, page in enumerate(iter_campaign_pages(dry_run), start=1):
+        print(f"Processing page {page_number} with {len(page)} campaigns")
+        _fetch_metrics_concurrently(page, dry_run, max_workers, limiter)
+        yield from page
 
 def extract_supermetrics(start_date: str, end_date: str, dry_run=False):
     """Extract data from Supermetrics API"""
@@ -70,7 +227,8 @@ def extract_supermetrics(start_date: str, end_date: str, dry_run=False):
 
 def extract_fivetran(start_date: str, end_date: str, group_id: Optional[str] = None, 
                    connector_id: Optional[str] = None, table: Optional[str] = None, 
-                   date_column: Optional[str] = None, dry_run=False) -> List[Dict[str, Any]]:
+                   date_column: Optional[str] = None, dry_run=False,
+                   max_staleness: Optional[int] = None, parallelism: int = 1) -> List[Dict[str, Any]]:
     """Extract data using Fivetran
     
     Args:
@@ -81,6 +239,9 @@ def extract_fivetran(start_date: str, end_date: str, group_id: Optional[str] = N
         table: Postgres table name (overrides env var FIVETRAN_TABLE)
         date_column: Date column for filtering (default from postgres_extract_export)
         dry_run: If True, don't make actual API calls
+        max_staleness: Skip the sync if the connector last succeeded within
+            this many seconds (default: always sync)
+        parallelism: Number of date partitions extracted from Postgres concurrently
         
     Returns:
         List of dictionaries containing the extracted data
@@ -99,7 +260,7 @@ def extract_fivetran(start_date: str, end_date: str, group_id: Optional[str] = N
     
     # Step 1: Trigger Fivetran sync
     print(f"Triggering Fivetran sync for connector {connector_id} in group {group_id}...")
-    sync_success = run_connector(group_id, connector_id, dry_run=dry_run)
+    sync_success = run_connector(group_id, connector_id, dry_run=dry_run, max_staleness=max_staleness)
     if not sync_success and not dry_run:
         raise RuntimeError("Fivetran sync failed")
     if not dry_run:
@@ -114,17 +275,91 @@ def extract_fivetran(start_date: str, end_date: str, group_id: Optional[str] = N
         start_date=start_date,
         end_date=end_date,
         date_column=date_column,
-        dry_run=dry_run
+        dry_run=dry_run,
+        parallelism=parallelism
     )
     
     print(f"Fetched {len(data)} records from Postgres")
     return data
 
+def extract_fivetran_tables(start_date: str, end_date: str, connector_tables: Dict[str, str],
+                            group_id: Optional[str] = None, date_column: Optional[str] = None,
+                            dry_run=False, max_staleness: Optional[int] = None,
+                            parallelism: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """Sync several Fivetran connectors concurrently and extract each one's table
+    
+    All connectors are triggered at once. Each table's Postgres extraction
+    starts as soon as its own connector finishes, while slower connectors are
+    still syncing.
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        connector_tables: Mapping of connector ID to the Postgres table it feeds
+        group_id: Fivetran group ID (overrides env var FIVETRAN_GROUP_ID)
+        date_column: Date column for filtering (default from postgres_extract_export)
+        dry_run: If True, don't make actual API calls
+        max_staleness: Skip syncing connectors that last succeeded within this
+            many seconds; their tables are extracted straight away
+        parallelism: Number of date partitions extracted concurrently per table
+        
+    Returns:
+        Dict mapping table name to its extracted records
+    
+    Raises:
+        RuntimeError: If any connector's sync failed
+    """
+    group_id = group_id or os.environ.get("FIVETRAN_GROUP_ID")
+    if not group_id or not connector_tables:
+        raise ValueError("Fivetran group ID and at least one connector must be provided")
+    
+    print(f"Syncing {len(connector_tables)} Fivetran connectors in group {group_id} concurrently...")
+    extractions = {}
+    
+    with ThreadPoolExecutor(max_workers=len(connector_tables)) as extract_pool:
+        def on_complete(connector_id, result):
+            if not result["success"] and not dry_run:
+                return
+            table = connector_tables[connector_id]
+            print(f"Connector {connector_id} finished in {result['duration']:.1f}s; extracting table {table}...")
+            extractions[table] = extract_pool.submit(
+                fetch_to_dataframe, table=table, start_date=start_date, end_date=end_date,
+                date_column=date_column, dry_run=dry_run, parallelism=parallelism
+            )
+        
+        results = run_connectors(group_id, list(connector_tables), dry_run=dry_run,
+                                 max_staleness=max_staleness, on_complete=on_complete)
+        data = {table: future.result() for table, future in extractions.items()}
+    
+    for table, records in data.items():
+        print(f"Fetched {len(records)} records from Postgres table {table}")
+    
+    failed = [connector_id for connector_id, result in results.items() if not result["success"]]
+    if failed and not dry_run:
+        raise RuntimeError(f"Fivetran sync failed for connectors: {', '.join(failed)}")
+    return data
+
+def parse_connector_tables(value: str) -> Dict[str, str]:
+    """Parse "connector=table,connector=table" into a connector ID -> table mapping"""
+    mapping = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        connector_id, sep, table = item.partition("=")
+        if not sep or not connector_id.strip() or not table.strip():
+            raise ValueError(f"Invalid connector mapping {item!r} (expected connector=table)")
+        mapping[connector_id.strip()] = table.strip()
+    return mapping
+
 def extract(source="klaviyo", start_date=None, end_date=None, group_id=None, 
-           connector_id=None, table=None, date_column=None, dry_run=False):
-    """Extract data from the specified source"""
+           connector_id=None, table=None, date_column=None, dry_run=False, use_async=False,
+           max_staleness=None, parallelism=1, connector_tables=None):
+    """Extract data from the specified source
+    
+    For the fivetran source, `connector_tables` (connector ID -> table) syncs
+    several connectors at once and extracts each table as soon as its own
+    connector finishes; the tables' records are returned in mapping order.
+    """
     if source == "klaviyo":
-        return extract_klaviyo(dry_run)
+        return extract_klaviyo(dry_run, use_async=use_async)
     elif source == "supermetrics":
         if not start_date or not end_date:
             raise ValueError("Supermetrics source requires start_date and end_date parameters")
@@ -132,7 +367,13 @@ def extract(source="klaviyo", start_date=None, end_date=None, group_id=None,
     elif source == "fivetran":
         if not start_date or not end_date:
             raise ValueError("Fivetran source requires start_date and end_date parameters")
-        return extract_fivetran(start_date, end_date, group_id, connector_id, table, date_column, dry_run)
+        if connector_tables:
+            data = extract_fivetran_tables(start_date, end_date, connector_tables, group_id, date_column, dry_run,
+                                           max_staleness=max_staleness, parallelism=parallelism)
+            return [record for table_name in dict.fromkeys(connector_tables.values())
+                    for record in data.get(table_name, [])]
+        return extract_fivetran(start_date, end_date, group_id, connector_id, table, date_column, dry_run,
+                                max_staleness=max_staleness, parallelism=parallelism)
     else:
         raise ValueError(f"Unsupported source: {source}")
 
@@ -146,6 +387,11 @@ def transform(raw_data):
     
     return normalized_data
 
+def transform_stream(raw_records):
+    """Normalize records lazily, one at a time"""
+    for record in raw_records:
+        yield normalize_record(record)
+
 def load(data, output_file, format="csv"):
     """Load data to the specified output file"""
     print(f"Loading data to {output_file}...")
@@ -165,6 +411,71 @@ def load(data, output_file, format="csv"):
         print(f"Unsupported format: {format}")
         return False
 
+def load_stream(records, output_file, format="csv"):
+    """Write records to the output file as they arrive
+    
+    JSON output is written incrementally. For CSV the header is the sorted union
+    of all keys (same as write_to_csv), so rows are first spooled to a temporary
+    NDJSON file and then converted in a single pass.
+    
+    Output goes to a temporary file next to `output_file` that replaces it only
+    once every record is written, so a failure mid-stream leaves any previous
+    output in place instead of a truncated file.
+    
+    Returns:
+        Number of records written (0 if there was nothing to write or on error)
+    """
+    print(f"Streaming data to {output_file}...")
+    format = format.lower()
+    if format not in ("csv", "json"):
+        print(f"Unsupported format: {format}")
+        return 0
+    
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=".stream_", suffix=f".{format}")
+    
+    try:
+        with os.fdopen(fd, "w", newline="" if format == "csv" else None) as f:
+            if format == "json":
+                f.write("[")
+                for record in records:
+                    f.write(",\n" if count else "\n")
+                    f.write(json.dumps(record, indent=2))
+                    count += 1
+                f.write("\n]\n")
+            else:
+                fieldnames = set()
+                with tempfile.TemporaryFile("w+", dir=output_dir) as spool:
+                    for record in records:
+                        fieldnames.update(record.keys())
+                        spool.write(json.dumps(record) + "\n")
+                        count += 1
+                    spool.seek(0)
+                    writer = csv.DictWriter(f, fieldnames=sorted(fieldnames))
+                    writer.writeheader()
+                    for line in spool:
+                        writer.writerow(json.loads(line))
+        if count:
+            os.replace(tmp_path, output_file)
+    except Exception as e:
+        print(f"Error streaming to {format.upper()}: {e}")
+        return 0
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    if not count:
+        # An empty run leaves no output file, as write_to_csv/write_to_json do
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        print("No data to write")
+        return 0
+    
+    print(f"Data written to {output_file} ({count} records)")
+    return count
+
 def write_to_csv(data, output_file):
     """Write data to CSV file"""
     try:
@@ -198,7 +509,9 @@ def write_to_json(data, output_file):
 
 def run_etl(dry_run=False, output_file=None, format="csv", source="klaviyo", 
           start_date=None, end_date=None, upload_to_s3=False, keep_local=True,
-          group_id=None, connector_id=None, table=None, date_column=None):
+          group_id=None, connector_id=None, table=None, date_column=None, use_async=False,
+          incremental=False, state_file=None, stream=False, max_staleness=None,
+          parallelism=1, connector_tables=None):
     """Run the full ETL process
     
     Args:
@@ -215,6 +528,18 @@ def run_etl(dry_run=False, output_file=None, format="csv", source="klaviyo",
         connector_id: Fivetran connector ID (overrides env var FIVETRAN_CONNECTOR_ID)
         table: Postgres table name (overrides env var FIVETRAN_TABLE)
         date_column: Date column for filtering (default from postgres_extract_export)
+        use_async: If True, use the asyncio Klaviyo client for extraction
+        incremental: If True, only fetch Klaviyo metric days newer than the stored
+                     watermarks and merge them into the previous snapshot
+        state_file: Path to the watermark state file (default: data/etl_state.json)
+        stream: If True, stream Klaviyo campaigns page by page through transform
+                and load instead of holding them all in memory
+        max_staleness: Skip the Fivetran sync if the connector last succeeded
+                       within this many seconds
+        parallelism: Number of date partitions extracted from Postgres concurrently
+        connector_tables: Fivetran connector ID -> Postgres table; syncs them
+                          concurrently and extracts each table as its connector
+                          finishes (instead of connector_id/table)
         
     Returns:
         True if successful, False otherwise
@@ -226,26 +551,49 @@ def run_etl(dry_run=False, output_file=None, format="csv", source="klaviyo",
         output_file = os.path.join(DEFAULT_OUTPUT_DIR, filename)
     
     try:
-        # Extract
-        raw_data = extract(source, start_date, end_date, group_id, connector_id, table, date_column, dry_run)
-        if not raw_data:
-            print("No data extracted. ETL process failed.")
-            return False
-        
-        # Transform
-        transformed_data = transform(raw_data)
-        if not transformed_data:
-            print("Data transformation failed. ETL process failed.")
-            return False
-        
-        # Load
-        success = load(transformed_data, output_file, format)
-        if not success:
-            print("Data loading failed. ETL process failed.")
-            return False
-        
+        state = None
+        if stream:
+            # Extract, transform and load one page of campaigns at a time
+            if source != "klaviyo":
+                raise ValueError(f"Streaming mode is not supported for source: {source}")
+            written = load_stream(transform_stream(extract_klaviyo_stream(dry_run)), output_file, format)
+            if not written:
+                print("No data extracted. ETL process failed.")
+                return False
+        else:
+            # Extract
+            if incremental:
+                if source != "klaviyo":
+                    raise ValueError(f"Incremental mode is not supported for source: {source}")
+                state = ETLStateStore(state_file or DEFAULT_STATE_FILE)
+                raw_data = extract_klaviyo_incremental(state, dry_run)
+            else:
+                raw_data = extract(source, start_date, end_date, group_id, connector_id, table, date_column, dry_run,
+                                   use_async=use_async, max_staleness=max_staleness,
+                                   parallelism=parallelism, connector_tables=connector_tables)
+            if not raw_data:
+                print("No data extracted. ETL process failed.")
+                return False
+
+            # Transform
+            transformed_data = transform(raw_data)
+            if not transformed_data:
+                print("Data transformation failed. ETL process failed.")
+                return False
+
+            # Load
+            success = load(transformed_data, output_file, format)
+            if not success:
+                print("Data loading failed. ETL process failed.")
+                return False
+
         print(f"ETL process completed successfully. Output: {output_file}")
         
+        # Advance watermarks only after a successful load
+        if state is not None and not dry_run:
+            state.save()
+            print(f"Watermarks saved to {state.path}")
+        
         # Upload to S3 if requested
         if upload_to_s3 and not dry_run:
             try:
@@ -322,6 +670,13 @@ def main(argv=None):
     parser.add_argument("--end", help="End date in YYYY-MM-DD format (required for supermetrics and fivetran)")
     parser.add_argument("--upload-to-s3", nargs="?", const=True, help="Upload the output file to S3. Can be used as a flag or with an S3 URI (e.g., s3://bucket/prefix/{start}_{end}.csv)")
     parser.add_argument("--keep-local", action="store_true", default=True, help="Keep the local output file after S3 upload")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio Klaviyo client (pipelines pagination with metrics requests)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch data newer than the stored watermarks and merge it into the previous output (klaviyo source)")
+    parser.add_argument("--state-file", help=f"Watermark state file for --incremental (default: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream campaigns page by page through extract, transform and load (klaviyo source)")
     parser.add_argument("--supermetrics-legacy", action="store_true", help="Prepare data for Supermetrics integration (legacy)")
     
     # Fivetran-specific arguments
@@ -329,7 +684,15 @@ def main(argv=None):
     fivetran_group.add_argument("--group-id", help="Fivetran group ID (overrides FIVETRAN_GROUP_ID env var)")
     fivetran_group.add_argument("--connector-id", help="Fivetran connector ID (overrides FIVETRAN_CONNECTOR_ID env var)")
     fivetran_group.add_argument("--table", help="Postgres table name (overrides FIVETRAN_TABLE env var)")
+    fivetran_group.add_argument("--connector-tables", default=os.environ.get("FIVETRAN_CONNECTOR_TABLES"),
+                                help="Sync several connectors concurrently and extract each table as soon as its "
+                                     "connector finishes, e.g. conn_a=campaign,conn_b=event "
+                                     "(env: FIVETRAN_CONNECTOR_TABLES; replaces --connector-id/--table)")
     fivetran_group.add_argument("--date-column", help="Date column for filtering")
+    fivetran_group.add_argument("--max-staleness", type=parse_duration,
+                                help="Skip the Fivetran sync if the connector succeeded within this long, e.g. 15m")
+    fivetran_group.add_argument("--parallelism", type=int, default=1,
+                                help="Extract the Postgres table as this many concurrent date partitions (default: 1)")
     
     args = parser.parse_args(argv)
     
@@ -340,6 +703,21 @@ def main(argv=None):
     if args.source == "fivetran" and (not args.start or not args.end):
         parser.error("--start and --end are required when using --source fivetran")
     
+    connector_tables = None
+    if args.connector_tables:
+        if args.source != "fivetran":
+            parser.error("--connector-tables is only supported with --source fivetran")
+        try:
+            connector_tables = parse_connector_tables(args.connector_tables)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if args.incremental and args.source != "klaviyo":
+        parser.error("--incremental is only supported with --source klaviyo")
+    
+    if args.stream and (args.source != "klaviyo" or args.incremental):
+        parser.error("--stream is only supported with --source klaviyo and without --incremental")
+    
     # Handle the upload_to_s3 argument
     upload_to_s3 = args.upload_to_s3
     if upload_to_s3 is True:
@@ -363,7 +741,14 @@ def main(argv=None):
         group_id=args.group_id,
         connector_id=args.connector_id,
         table=args.table,
-        date_column=args.date_column
+        date_column=args.date_column,
+        use_async=args.use_async,
+        incremental=args.incremental,
+        state_file=args.state_file,
+        stream=args.stream,
+        max_staleness=args.max_staleness,
+        parallelism=args.parallelism,
+        connector_tables=connector_tables
     )
     
     # Prepare for Supermetrics if requested (legacy support)
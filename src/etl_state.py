@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+# Default location of the persisted ETL state
+DEFAULT_STATE_FILE = os.path.join("data", "etl_state.json")
+STATE_VERSION = 1
+
+
+class ETLStateStore:
+    """Persistent store of last-successful watermarks and record snapshots.
+
+    State is a single JSON file shaped as::
+
+        {"version": 1,
+         "watermarks": {"<source>": {"<table>": {"__table__": "...", "<key>": "..."}}},
+         "records": {"<source>": {"<table>": [...]}}}
+
+    Changes are kept in memory until `save()`, which writes atomically, so a
+    failed run never advances the watermarks.
+    """
+
+    TABLE_KEY = "__table__"
+
+    def __init__(self, path: str = DEFAULT_STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        empty = {"version": STATE_VERSION, "watermarks": {}, "records": {}}
+        if not os.path.exists(self.path):
+            return empty
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: ignoring unreadable ETL state file {self.path}: {e}")
+            return empty
+        if state.get("version") != STATE_VERSION:
+            print(f"Warning: ignoring ETL state file {self.path} with unsupported version {state.get('version')}")
+            return empty
+        state.setdefault("watermarks", {})
+        state.setdefault("records", {})
+        return state
+
+    def get_watermark(self, source: str, table: str, key: Optional[str] = None) -> Optional[str]:
+        """Return the watermark for a source/table (and optional key such as a campaign ID)."""
+        with self._lock:
+            table_marks = self._state["watermarks"].get(source, {}).get(table, {})
+            return table_marks.get(key or self.TABLE_KEY)
+
+    def set_watermark(self, source: str, table: str, value: str, key: Optional[str] = None) -> None:
+        """Set the watermark for a source/table (and optional key)."""
+        with self._lock:
+            table_marks = self._state["watermarks"].setdefault(source, {}).setdefault(table, {})
+            table_marks[key or self.TABLE_KEY] = value
+
+    def get_records(self, source: str, table: str) -> List[Dict[str, Any]]:
+        """Return the record snapshot saved by the previous successful run."""
+        with self._lock:
+            return list(self._state["records"].get(source, {}).get(table, []))
+
+    def set_records(self, source: str, table: str, records: List[Dict[str, Any]]) -> None:
+        """Replace the record snapshot for a source/table."""
+        with self._lock:
+            self._state["records"].setdefault(source, {})[table] = list(records)
+
+    def save(self) -> None:
+        """Atomically write the state file."""
+        with self._lock:
+            self._state["updated_at"] = datetime.now(UTC).isoformat()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".etl_state_", suffix=".json")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self._state, f, default=str)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
@@ -1,18 +1,91 @@
 import os
 import time
+import random
 import logging
+import threading
 import requests
 import base64
-from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, UTC
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+
+try:
+    from src.fivetran_webhook import sync_succeeded
+except ImportError:
+    from fivetran_webhook import sync_succeeded
 
 logger = logging.getLogger(__name__)
 
+# Adaptive polling: start fast, back off geometrically with jitter, and cap the
+# interval at a fraction of the connector's typical sync duration
+MIN_POLL_INTERVAL = 2.0
+MAX_POLL_INTERVAL = 60.0
+POLL_BACKOFF_FACTOR = 1.5
+POLL_JITTER = 0.2
+POLL_DURATION_FRACTION = 0.2
+# Weight of the latest sync in the running average of sync durations
+DURATION_SMOOTHING = 0.3
+# Where sync durations are kept in an ETLStateStore
+DURATION_STATE_SOURCE = "fivetran"
+DURATION_STATE_TABLE = "sync_durations"
+
+# Group and connector listings are cached this long (seconds)
+METADATA_CACHE_TTL = 300
+# Largest page size the list endpoints accept
+PAGE_LIMIT = 1000
+
+
+def adaptive_poll_intervals(expected_duration: Optional[float] = None,
+                            min_interval: float = MIN_POLL_INTERVAL,
+                            max_interval: float = MAX_POLL_INTERVAL,
+                            factor: float = POLL_BACKOFF_FACTOR,
+                            jitter: float = POLL_JITTER) -> Iterator[float]:
+    """Yield poll delays that grow from `min_interval` up to a cap.
+
+    The cap is `max_interval`, lowered to a fifth of `expected_duration` when
+    the typical sync duration is known, so short syncs are noticed quickly and
+    long syncs aren't polled pointlessly often.
+    """
+    cap = max_interval
+    if expected_duration:
+        cap = max(min_interval, min(max_interval, expected_duration * POLL_DURATION_FRACTION))
+    interval = min_interval
+    while True:
+        yield interval * random.uniform(1 - jitter, 1 + jitter)
+        interval = min(cap, interval * factor)
+
+
+def data_age(connector: Dict[str, Any]) -> Optional[float]:
+    """Return seconds since a connector's last successful sync, from its API payload.
+
+    Returns None if the connector has never succeeded or a sync is in progress
+    (its data may be partially written).
+    """
+    sync_state = str(connector.get("status", {}).get("sync_state", "")).upper()
+    succeeded_at = connector.get("succeeded_at")
+    if sync_state == "SYNCING" or not succeeded_at:
+        return None
+    succeeded = datetime.fromisoformat(succeeded_at.replace("Z", "+00:00"))
+    if succeeded.tzinfo is None:
+        succeeded = succeeded.replace(tzinfo=UTC)
+    return max(0.0, (datetime.now(UTC) - succeeded).total_seconds())
+
+
 class FivetranAPIClient:
     BASE_URL = "https://api.fivetran.com/v1"
     
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(self, api_key: str, api_secret: str, base_url: Optional[str] = None,
+                 metadata_ttl: float = METADATA_CACHE_TTL, state=None):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        # Running average of observed sync durations per connector (seconds);
+        # kept across runs in `state` (an ETLStateStore) when one is given
+        self.sync_durations: Dict[str, float] = {}
+        self.state = state
+        # Listing path -> (fetched_at, items); 0 disables the cache
+        self.metadata_ttl = metadata_ttl
+        self._metadata_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._metadata_lock = threading.Lock()
         self.session = requests.Session()
         self.session.auth = (self.api_key, self.api_secret)
         self.session.headers.update({
@@ -21,16 +94,18 @@ class FivetranAPIClient:
         })
         
     @classmethod
-    def from_auth_header(cls, auth_header: Dict[str, str]):
+    def from_auth_header(cls, auth_header: Dict[str, str], base_url: Optional[str] = None, state=None):
         """Create a client instance using an authorization header.
         
         Args:
             auth_header: Dictionary containing the Authorization header
+            base_url: API base URL (default: the public Fivetran API)
+            state: Optional ETLStateStore that keeps sync durations across runs
             
         Returns:
             FivetranAPIClient instance configured with the provided auth header
         """
-        client = cls("dummy_key", "dummy_secret")  # Keys won't be used with custom auth
+        client = cls("dummy_key", "dummy_secret", base_url=base_url, state=state)  # Keys won't be used with custom auth
         client.session.auth = None  # Disable basic auth
         client.session.headers.update(auth_header)  # Use the provided auth header
         return client
@@ -69,27 +144,67 @@ class FivetranAPIClient:
             response = self.session.send(prepared_request)
         return self._handle_response(response)
     
-    def get_groups(self) -> List[Dict[str, Any]]:
+    def _list_all(self, path: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Fetch every item of a list endpoint, following `next_cursor`.
+        
+        Results are cached for `metadata_ttl` seconds unless `use_cache` is False.
+        """
+        if use_cache and self.metadata_ttl:
+            with self._metadata_lock:
+                cached = self._metadata_cache.get(path)
+            if cached and time.time() - cached[0] < self.metadata_ttl:
+                logger.debug(f"Using cached listing for {path}")
+                return list(cached[1])
+        
+        items = []
+        params = {"limit": PAGE_LIMIT}
+        while True:
+            response = self.session.get(f"{self.base_url}{path}", params=params)
+            data = self._handle_response(response).get("data", {})
+            items.extend(data.get("items", []))
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+            params = {"limit": PAGE_LIMIT, "cursor": cursor}
+        
+        with self._metadata_lock:
+            self._metadata_cache[path] = (time.time(), items)
+        return list(items)
+    
+    def clear_metadata_cache(self) -> None:
+        """Forget cached group and connector listings."""
+        with self._metadata_lock:
+            self._metadata_cache.clear()
+    
+    def get_groups(self, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Get all groups."""
-        response = self.session.get(f"{self.BASE_URL}/groups")
-        data = self._handle_response(response)
-        return data.get("data", {}).get("items", [])
+        return self._list_all("/groups", use_cache=use_cache)
     
-    def get_connectors(self, group_id: str) -> List[Dict[str, Any]]:
+    def get_connectors(self, group_id: str, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Get all connectors for a group."""
-        response = self.session.get(f"{self.BASE_URL}/groups/{group_id}/connectors")
-        data = self._handle_response(response)
-        return data.get("data", {}).get("items", [])
+        return self._list_all(f"/groups/{group_id}/connectors", use_cache=use_cache)
     
     def get_connector(self, connector_id: str) -> Dict[str, Any]:
         """Get details for a specific connector."""
-        response = self.session.get(f"{self.BASE_URL}/connectors/{connector_id}")
+        response = self.session.get(f"{self.base_url}/connectors/{connector_id}")
         data = self._handle_response(response)
         return data.get("data", {})
     
+    def get_data_age(self, connector_id: str) -> Optional[float]:
+        """Return seconds since the connector's last successful sync.
+        
+        Fetches the connector; use `data_age` on a connector payload already
+        at hand to avoid a second request.
+        
+        Returns:
+            Age in seconds, or None if the connector has never succeeded or a
+            sync is in progress (its data may be partially written)
+        """
+        return data_age(self.get_connector(connector_id))
+    
     def trigger_sync(self, connector_id: str) -> Dict[str, Any]:
         """Trigger a sync for a connector."""
-        response = self.session.post(f"{self.BASE_URL}/connectors/{connector_id}/sync")
+        response = self.session.post(f"{self.base_url}/connectors/{connector_id}/sync")
         return self._handle_response(response)
     
     def get_sync_status(self, connector_id: str) -> Tuple[str, Optional[str]]:
@@ -108,45 +223,88 @@ class FivetranAPIClient:
         
         return status, error
     
-    def wait_for_sync_completion(self, connector_id: str, timeout: int = 3600, poll_interval: int = 30) -> bool:
+    def wait_for_sync_completion(self, connector_id: str, timeout: int = 3600, poll_interval: Optional[float] = None,
+                                 webhook=None, expected_duration: Optional[float] = None) -> bool:
         """Wait for a sync to complete.
         
         Args:
             connector_id: The connector ID
             timeout: Maximum time to wait in seconds (default: 1 hour)
-            poll_interval: Time between status checks in seconds (default: 30 seconds)
+            poll_interval: Fixed time between status checks in seconds; by default
+                polling is adaptive (see adaptive_poll_intervals)
+            webhook: Optional SyncWebhookListener; a sync_end event for the
+                connector ends the wait immediately, polling remains the fallback
+            expected_duration: Typical sync duration in seconds (default: the
+                running average observed by this client or saved in its state)
             
         Returns:
             True if sync completed successfully, False otherwise
         """
+        if poll_interval:
+            delays = iter(lambda: poll_interval, None)
+        else:
+            delays = adaptive_poll_intervals(expected_duration or self.get_sync_duration(connector_id))
+        
         start_time = time.time()
+        # Only a sync seen running gives a real duration; one that is already
+        # done on the first poll finished (or never started) before we looked
+        seen_running = False
         while time.time() - start_time < timeout:
             status, error = self.get_sync_status(connector_id)
             
-            # Map API states to our expected states
-            # The API returns lowercase states like 'syncing' and 'scheduled',
-            # but our code expects uppercase states like 'SYNCING' and 'SYNC_SUCCEEDED'
-            if status == "SYNCING":
-                logger.info(f"Connector {connector_id} is syncing. Waiting {poll_interval} seconds...")
-                time.sleep(poll_interval)
-                continue
-            
             # In Fivetran API, 'scheduled' state typically means the sync has completed successfully
             # and is now scheduled for the next run
             if status in ["SYNC_SUCCEEDED", "SCHEDULED"]:
                 logger.info(f"Connector {connector_id} sync completed successfully.")
+                if seen_running:
+                    self._record_sync_duration(connector_id, time.time() - start_time)
                 return True
                 
             if status in ["SYNC_FAILED", "ERROR"]:
                 logger.error(f"Connector {connector_id} sync failed: {error}")
                 return False
-                
-            logger.info(f"Connector {connector_id} status: {status}. Waiting {poll_interval} seconds...")
-            time.sleep(poll_interval)
+            
+            # The API returns lowercase states like 'syncing'; get_sync_status normalizes them
+            seen_running = seen_running or status == "SYNCING"
+            delay = min(next(delays), max(0.0, timeout - (time.time() - start_time)))
+            logger.info(f"Connector {connector_id} status: {status}. Waiting {delay:.1f} seconds...")
+            if webhook is None:
+                time.sleep(delay)
+                continue
+            
+            event = webhook.wait_for_sync_end(connector_id, timeout=delay)
+            if event is not None:
+                webhook.clear(connector_id)
+                if sync_succeeded(event):
+                    logger.info(f"Connector {connector_id} sync completed successfully (webhook).")
+                    if seen_running:
+                        self._record_sync_duration(connector_id, time.time() - start_time)
+                    return True
+                logger.error(f"Connector {connector_id} sync failed (webhook): {event.get('data')}")
+                return False
         
         logger.error(f"Timeout waiting for connector {connector_id} sync to complete.")
         return False
-
+    
+    def get_sync_duration(self, connector_id: str) -> Optional[float]:
+        """Return the typical sync duration of a connector, or None if it is unknown."""
+        duration = self.sync_durations.get(connector_id)
+        if duration is None and self.state is not None:
+            saved = self.state.get_watermark(DURATION_STATE_SOURCE, DURATION_STATE_TABLE, key=connector_id)
+            if saved is not None:
+                duration = self.sync_durations[connector_id] = float(saved)
+        return duration
+    
+    def _record_sync_duration(self, connector_id: str, duration: float) -> None:
+        previous = self.get_sync_duration(connector_id)
+        if previous is None:
+            self.sync_durations[connector_id] = duration
+        else:
+            self.sync_durations[connector_id] = (1 - DURATION_SMOOTHING) * previous + DURATION_SMOOTHING * duration
+        if self.state is not None:
+            self.state.set_watermark(DURATION_STATE_SOURCE, DURATION_STATE_TABLE,
+                                     str(self.sync_durations[connector_id]), key=connector_id)
+            self.state.save()
 
 def _get_auth_header() -> Dict[str, str]:
     """Get the authentication header based on available environment variables.
@@ -188,16 +346,19 @@ def _get_auth_header() -> Dict[str, str]:
         "FIVETRAN_API_SECRET environment variables."
     )
 
-def get_client_from_env() -> FivetranAPIClient:
+def get_client_from_env(state=None) -> FivetranAPIClient:
     """Create a Fivetran API client using environment variables.
     
     Supports both system key and classic API key authentication methods.
+    `state` is an optional ETLStateStore that keeps sync durations across runs.
     """
     try:
         # Get the appropriate auth header based on available credentials
         auth_header = _get_auth_header()
         logger.info(f"Using Fivetran authentication: {list(auth_header.values())[0].split(' ')[0]}")
-        return FivetranAPIClient.from_auth_header(auth_header)
+        # FIVETRAN_API_BASE_URL points the client at another endpoint (e.g. a local fake server)
+        return FivetranAPIClient.from_auth_header(auth_header, base_url=os.environ.get("FIVETRAN_API_BASE_URL"),
+                                                  state=state)
     except RuntimeError as e:
         # Re-raise with more specific error message
         raise ValueError(str(e))
@@ -215,7 +376,7 @@ if __name__ == "__main__":
     parser.add_argument("--trigger-sync", help="Trigger a sync for a connector")
     parser.add_argument("--wait", action="store_true", help="Wait for sync to complete")
     parser.add_argument("--timeout", type=int, default=3600, help="Timeout in seconds")
-    parser.add_argument("--poll-interval", type=int, default=30, help="Poll interval in seconds")
+    parser.add_argument("--poll-interval", type=int, help="Fixed poll interval in seconds (default: adaptive)")
     
     args = parser.parse_args()
     
@@ -241,7 +402,7 @@ if __name__ == "__main__":
             print("Sync triggered.")
             
             if args.wait:
-                print(f"Waiting for sync to complete (timeout: {args.timeout}s, poll: {args.poll_interval}s)...")
+                print(f"Waiting for sync to complete (timeout: {args.timeout}s, poll: {args.poll_interval or 'adaptive'})...")
                 success = client.wait_for_sync_completion(
                     args.trigger_sync, 
                     timeout=args.timeout, 
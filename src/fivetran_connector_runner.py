@@ -1,37 +1,76 @@
 import os
 import sys
+import re
 import time
 import logging
 import argparse
-from typing import Optional
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable
 from dotenv import load_dotenv
 
 try:
     # When imported as a module
-    from src.fivetran_api_client import get_client_from_env
+    from src.fivetran_api_client import FivetranAPIClient, get_client_from_env, data_age
+    from src.fivetran_webhook import SyncWebhookListener
+    from src.etl_state import ETLStateStore
 except ImportError:
     # When run directly
-    from fivetran_api_client import get_client_from_env
+    from fivetran_api_client import FivetranAPIClient, get_client_from_env, data_age
+    from fivetran_webhook import SyncWebhookListener
+    from etl_state import ETLStateStore
 
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Sync durations live in their own file: etl_runner rewrites data/etl_state.json
+# from its in-memory copy, which would drop durations saved by a concurrent run
+DEFAULT_STATE_FILE = os.path.join("data", "fivetran_sync_state.json")
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Unsigned webhooks are only accepted on loopback; binding elsewhere needs FIVETRAN_WEBHOOK_SECRET
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+
+def parse_duration(value: str) -> int:
+    """Parse a duration such as "90", "90s", "15m", "2h" or "1d" into seconds."""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhd]?)\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r} (expected e.g. 90s, 15m, 2h, 1d)")
+    number, unit = match.groups()
+    return int(number) * _DURATION_UNITS[unit or "s"]
+
 def run_connector(group_id: str, connector_id: str, timeout: int = 3600, 
-                 poll_interval: int = 30, dry_run: bool = False, mock: bool = False) -> bool:
+                 poll_interval: Optional[int] = None, dry_run: bool = False, mock: bool = False,
+                 webhook_port: Optional[int] = None, webhook_host: str = DEFAULT_WEBHOOK_HOST,
+                 webhook: Optional[SyncWebhookListener] = None,
+                 max_staleness: Optional[int] = None,
+                 client: Optional[FivetranAPIClient] = None,
+                 state: Optional[ETLStateStore] = None) -> bool:
     """Trigger a sync for a connector and wait for it to complete.
     
     Args:
         group_id: The Fivetran group ID
         connector_id: The Fivetran connector ID
         timeout: Maximum time to wait in seconds (default: 1 hour)
-        poll_interval: Time between status checks in seconds (default: 30 seconds)
+        poll_interval: Fixed time between status checks in seconds (default: adaptive)
         dry_run: If True, don't actually trigger the sync (for testing)
         mock: If True, simulate a successful sync (for testing)
+        webhook_port: If set, listen for Fivetran sync_end webhooks on this port
+            and finish as soon as one arrives (secret: FIVETRAN_WEBHOOK_SECRET)
+        webhook_host: Interface the webhook listener binds to (non-loopback
+            interfaces require FIVETRAN_WEBHOOK_SECRET)
+        webhook: Already running listener to use instead of starting one
+        max_staleness: If set, skip the sync when the connector last succeeded
+            less than this many seconds ago and isn't currently syncing
+        client: API client to use instead of creating one from the environment
+        state: ETLStateStore in which observed sync durations are kept across
+            runs (only used when creating the client)
         
     Returns:
-        True if sync completed successfully, False otherwise
+        True if sync completed successfully (or was skipped as fresh), False otherwise
     """
     if dry_run:
         message = f"DRY RUN: Would trigger sync for connector {connector_id} in group {group_id}"
@@ -50,46 +89,131 @@ def run_connector(group_id: str, connector_id: str, timeout: int = 3600,
         return True
     
     try:
-        client = get_client_from_env()
+        client = client or get_client_from_env(state=state)
         
         # Verify the connector exists in the specified group
-        connectors = client.get_connectors(group_id)
-        connector_found = False
-        
-        for connector in connectors:
-            if connector['id'] == connector_id:
-                connector_found = True
-                logger.info(f"Found connector {connector_id} in group {group_id}")
-                break
+        try:
+            connector = client.get_connector(connector_id)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                connector = {}
+            else:
+                raise
         
-        if not connector_found:
+        if connector.get("group_id") != group_id:
             logger.error(f"Connector {connector_id} not found in group {group_id}")
             return False
+        logger.info(f"Found connector {connector_id} in group {group_id}")
         
-        # Trigger the sync
-        logger.info(f"Triggering sync for connector {connector_id}")
-        client.trigger_sync(connector_id)
+        if max_staleness is not None:
+            # The connector was just fetched; its payload already carries the sync state
+            age = data_age(connector)
+            if age is not None and age <= max_staleness:
+                logger.info(f"Skipping sync for connector {connector_id}: last succeeded {age:.0f}s ago "
+                            f"(max staleness {max_staleness}s)")
+                return True
         
-        # Wait for completion
-        logger.info(f"Waiting for sync to complete (timeout: {timeout}s, poll: {poll_interval}s)")
-        return client.wait_for_sync_completion(
-            connector_id, 
-            timeout=timeout, 
-            poll_interval=poll_interval
-        )
+        # Start listening before the sync is triggered so a fast sync_end isn't missed
+        owned_webhook = None
+        if webhook is None and webhook_port is not None:
+            webhook = owned_webhook = SyncWebhookListener(webhook_host, webhook_port,
+                                                          secret=os.environ.get("FIVETRAN_WEBHOOK_SECRET")).start()
+        
+        try:
+            # Trigger the sync
+            logger.info(f"Triggering sync for connector {connector_id}")
+            client.trigger_sync(connector_id)
+            
+            # Wait for completion
+            logger.info(f"Waiting for sync to complete (timeout: {timeout}s, poll: {poll_interval or 'adaptive'})")
+            return client.wait_for_sync_completion(
+                connector_id, 
+                timeout=timeout, 
+                poll_interval=poll_interval,
+                webhook=webhook
+            )
+        finally:
+            if owned_webhook:
+                owned_webhook.stop()
     
     except Exception as e:
         logger.error(f"Error running connector: {e}")
         return False
 
+def run_connectors(group_id: str, connector_ids: List[str], timeout: int = 3600,
+                   poll_interval: Optional[int] = None, dry_run: bool = False, mock: bool = False,
+                   webhook_port: Optional[int] = None, webhook_host: str = DEFAULT_WEBHOOK_HOST,
+                   max_staleness: Optional[int] = None,
+                   state: Optional[ETLStateStore] = None,
+                   on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """Trigger syncs for several connectors and wait for all of them concurrently.
+    
+    Each connector runs `run_connector` in its own thread. They share one API
+    client and, with `webhook_port`, one webhook listener.
+    
+    Args:
+        group_id: The Fivetran group ID
+        connector_ids: Connector IDs to sync
+        on_complete: Called as `on_complete(connector_id, result)` from the
+            worker thread as soon as that connector finishes, so downstream
+            work for it can start while other connectors are still syncing
+        Other arguments are as for run_connector.
+        
+    Returns:
+        Dict mapping connector ID to {"connector_id", "success", "duration"}
+    """
+    connector_ids = list(dict.fromkeys(connector_ids))
+    client = None
+    if not (dry_run or mock):
+        try:
+            client = get_client_from_env(state=state)
+        except Exception as e:
+            # Each run_connector call reports the failure for its connector
+            logger.error(f"Error creating Fivetran client: {e}")
+    webhook = None
+    if webhook_port is not None and not (dry_run or mock):
+        webhook = SyncWebhookListener(webhook_host, webhook_port,
+                                      secret=os.environ.get("FIVETRAN_WEBHOOK_SECRET")).start()
+    
+    def sync(connector_id: str) -> Dict[str, Any]:
+        started = time.time()
+        success = run_connector(group_id, connector_id, timeout=timeout, poll_interval=poll_interval,
+                                dry_run=dry_run, mock=mock, webhook=webhook, max_staleness=max_staleness,
+                                client=client)
+        result = {"connector_id": connector_id, "success": success, "duration": time.time() - started}
+        outcome = "succeeded" if success else "failed"
+        logger.info(f"Connector {connector_id} {outcome} in {result['duration']:.1f}s")
+        if on_complete:
+            on_complete(connector_id, result)
+        return result
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(connector_ids))) as executor:
+            results = list(executor.map(sync, connector_ids))
+    finally:
+        if webhook:
+            webhook.stop()
+    
+    return {result["connector_id"]: result for result in results}
+
 def main():
     print("Starting Fivetran Connector Runner")
     parser = argparse.ArgumentParser(description="Fivetran Connector Runner")
     parser.add_argument("--group", help="Fivetran group ID")
-    parser.add_argument("--connector", help="Fivetran connector ID")
+    parser.add_argument("--connector", nargs="+",
+                        help="Fivetran connector ID(s); several are synced concurrently")
     parser.add_argument("--timeout", type=int, default=3600, help="Timeout in seconds (default: 3600)")
-    parser.add_argument("--poll-interval", type=int, default=30, 
-                        help="Poll interval in seconds (default: 30)")
+    parser.add_argument("--poll-interval", type=int, 
+                        help="Fixed poll interval in seconds (default: adaptive, starting at 2s)")
+    parser.add_argument("--webhook-port", type=int, default=os.environ.get("FIVETRAN_WEBHOOK_PORT"),
+                        help="Listen for Fivetran sync_end webhooks on this port (env: FIVETRAN_WEBHOOK_PORT)")
+    parser.add_argument("--webhook-host", default=os.environ.get("FIVETRAN_WEBHOOK_HOST", DEFAULT_WEBHOOK_HOST),
+                        help="Interface the webhook listener binds to; anything but loopback requires "
+                             f"FIVETRAN_WEBHOOK_SECRET (env: FIVETRAN_WEBHOOK_HOST, default: {DEFAULT_WEBHOOK_HOST})")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE,
+                        help=f"State file that keeps typical sync durations across runs (default: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--max-staleness", type=parse_duration,
+                        help="Skip connectors that last succeeded within this long, e.g. 15m (default: always sync)")
     parser.add_argument("--dry-run", action="store_true", help="Don't actually trigger the sync")
     parser.add_argument("--mock", action="store_true", help="Use mock mode to simulate successful sync")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
@@ -102,35 +226,44 @@ def main():
     
     # Get connector details from args or environment variables
     group_id = args.group or os.environ.get("FIVETRAN_GROUP_ID")
-    connector_id = args.connector or os.environ.get("FIVETRAN_CONNECTOR_ID")
+    connector_ids = args.connector or [c.strip() for c in os.environ.get("FIVETRAN_CONNECTOR_ID", "").split(",") if c.strip()]
     
     # Validate required parameters
-    if not group_id or not connector_id:
+    if not group_id or not connector_ids:
         if args.mock:
             # In mock mode, use placeholder values
             group_id = group_id or "mock_group_id"
-            connector_id = connector_id or "mock_connector_id"
+            connector_ids = connector_ids or ["mock_connector_id"]
         else:
             missing = []
             if not group_id:
                 missing.append("--group or FIVETRAN_GROUP_ID")
-            if not connector_id:
+            if not connector_ids:
                 missing.append("--connector or FIVETRAN_CONNECTOR_ID")
             
             logger.error(f"Missing required parameters: {', '.join(missing)}")
             print(f"Error: Missing required parameters: {', '.join(missing)}")
             sys.exit(1)
     
-    # Run the connector
-    success = run_connector(
+    # Run the connectors
+    results = run_connectors(
         group_id,
-        connector_id,
+        connector_ids,
         timeout=args.timeout,
         poll_interval=args.poll_interval,
         dry_run=args.dry_run,
-        mock=args.mock
+        mock=args.mock,
+        webhook_port=args.webhook_port,
+        webhook_host=args.webhook_host,
+        max_staleness=args.max_staleness,
+        state=None if args.dry_run or args.mock else ETLStateStore(args.state_file)
     )
     
+    for result in results.values():
+        outcome = "succeeded" if result["success"] else "failed"
+        print(f"  {result['connector_id']}: {outcome} in {result['duration']:.1f}s")
+    success = all(result["success"] for result in results.values())
+    
     # Exit with appropriate status code
     if success:
         message = "Connector sync completed successfully"
@@ -0,0 +1,138 @@
+import hmac
+import json
+import hashlib
+import logging
+import ipaddress
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Fivetran-Signature-256"
+SYNC_END_EVENT = "sync_end"
+
+
+class SyncWebhookListener:
+    """Local HTTP receiver for Fivetran `sync_end` webhooks.
+
+    Runs a small threaded HTTP server in the background. Each `sync_end`
+    event is recorded per connector so `wait_for_sync_end` can return as soon
+    as it arrives. When a secret is configured, requests must carry a valid
+    HMAC-SHA256 signature of the body in the X-Fivetran-Signature-256 header.
+    Unsigned webhooks are only accepted on a loopback interface: binding any
+    other host without a secret raises ValueError.
+
+    Fivetran must be able to reach the listener (e.g. through a tunnel or a
+    load balancer), and a webhook for the group must point at `url`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, secret: Optional[str] = None):
+        if not secret and not is_loopback(host):
+            raise ValueError(f"Refusing to accept unsigned webhooks on {host!r}; "
+                             f"set FIVETRAN_WEBHOOK_SECRET or bind to 127.0.0.1")
+        self.secret = secret
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "SyncWebhookListener":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for Fivetran webhooks on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "SyncWebhookListener":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def clear(self, connector_id: str) -> None:
+        """Forget any sync_end already received for a connector."""
+        with self._condition:
+            self._events.pop(connector_id, None)
+
+    def wait_for_sync_end(self, connector_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block until a sync_end event for the connector arrives or `timeout` passes.
+
+        Returns:
+            The event payload, or None on timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: connector_id in self._events, timeout=timeout)
+            return self._events.get(connector_id)
+
+    def _verify(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.secret:
+            return True
+        if not signature:
+            return False
+        expected = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected.lower(), signature.lower())
+
+    def _record(self, payload: Dict[str, Any]) -> None:
+        connector_id = payload.get("connector_id")
+        if payload.get("event") != SYNC_END_EVENT or not connector_id:
+            return
+        with self._condition:
+            self._events[connector_id] = payload
+            self._condition.notify_all()
+        logger.info(f"Received sync_end webhook for connector {connector_id}")
+
+    def _make_handler(self):
+        listener = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not listener._verify(body, self.headers.get(SIGNATURE_HEADER)):
+                    logger.warning("Rejected Fivetran webhook with an invalid signature")
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                listener._record(payload)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug("Webhook listener: " + format % args)
+
+        return Handler
+
+
+def is_loopback(host: str) -> bool:
+    """Return True if `host` only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def sync_succeeded(event: Dict[str, Any]) -> bool:
+    """Return True if a sync_end event reports a successful sync."""
+    status = str(event.get("data", {}).get("status", "")).upper()
+    return status in ("SUCCESSFUL", "SUCCESS", "SYNC_SUCCEEDED")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+# Environment variable that enables the cache for Klaviyo GETs
+CACHE_DIR_ENV = "KLAVIYO_HTTP_CACHE_DIR"
+
+# Per-endpoint freshness, matched by URL substring: seconds, or None for "never expires"
+DEFAULT_TTL_RULES: List[Tuple[str, Optional[int]]] = [
+    ("/campaign-metrics", 3600),
+    ("/metric-aggregates", 3600),
+    ("/metrics", 86400),
+    ("/campaigns", 3600),
+]
+DEFAULT_TTL = 0
+
+# Metric windows that ended this many days ago are treated as immutable
+IMMUTABLE_AFTER_DAYS = 7
+
+# Parameters that are never stored in the cache key verbatim; only a hash of
+# the credential is, so different accounts never share an entry
+_SECRET_PARAMS = {"api_key"}
+
+_cache: Optional["HTTPCache"] = None
+_cache_lock = threading.Lock()
+
+
+class HTTPCache:
+    """On-disk cache for GET responses with ETag/Last-Modified revalidation.
+
+    Entries are keyed by URL, sorted query parameters and a hash of the
+    credential (api_key parameter or Authorization header). Fresh entries are
+    served without a request; stale entries are revalidated with
+    If-None-Match / If-Modified-Since and a 304 refreshes them in place.
+    """
+
+    def __init__(self, cache_dir: str, ttl_rules: Optional[List[Tuple[str, Optional[int]]]] = None,
+                 default_ttl: Optional[int] = DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.ttl_rules = DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(url: str, params: Optional[Dict[str, Any]] = None,
+                  credential: Optional[str] = None) -> str:
+        """Return the cache key for a URL, its query parameters and credential.
+
+        The credential defaults to the api_key parameter; it is hashed so the
+        secret itself never appears in the key.
+        """
+        params = params or {}
+        if credential is None:
+            credential = next((str(params[k]) for k in sorted(_SECRET_PARAMS) if params.get(k)), None)
+        items = sorted((k, str(v)) for k, v in params.items() if k not in _SECRET_PARAMS)
+        credential_hash = hashlib.sha256(credential.encode()).hexdigest() if credential else None
+        return hashlib.sha256(json.dumps([url, items, credential_hash]).encode()).hexdigest()
+
+    @staticmethod
+    def _credential(session: requests.Session, params: Optional[Dict[str, Any]],
+                    headers: Optional[Dict[str, str]]) -> Optional[str]:
+        """Return the credential a request is made with, if any."""
+        for name in _SECRET_PARAMS:
+            if (params or {}).get(name):
+                return str(params[name])
+        for source in (headers or {}, getattr(session, "headers", None) or {}):
+            for name, value in source.items():
+                if name.lower() == "authorization" and value:
+                    return str(value)
+        return None
+
+    def ttl_for(self, url: str) -> Optional[int]:
+        """Return the configured TTL for a URL (None means never expires)."""
+        for fragment, ttl in self.ttl_rules:
+            if fragment in url:
+                return ttl
+        return self.default_ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+
+    @staticmethod
+    def _to_response(entry: Dict[str, Any], url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.headers.update(entry.get("headers", {}))
+        response.url = url
+        return response
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, session: requests.Session, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, ttl: Any = "default", **kwargs) -> requests.Response:
+        """Perform a cached GET.
+
+        Args:
+            session: Session used for network requests
+            url: Request URL
+            params: Query parameters (part of the cache key)
+            headers: Request headers (only Authorization is part of the cache key)
+            ttl: Freshness in seconds, None for immutable, or "default" for the endpoint rule
+            **kwargs: Passed through to session.get (e.g. timeout)
+
+        Returns:
+            requests.Response, served from cache or from the network
+        """
+        key = self.cache_key(url, params, self._credential(session, params, headers))
+        ttl = self.ttl_for(url) if ttl == "default" else ttl
+        entry = self._read(key)
+
+        if entry is not None and (ttl is None or time.time() - entry["fetched_at"] < ttl):
+            self._count("hits")
+            return self._to_response(entry, url)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["headers"].get("ETag"):
+                request_headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = session.get(url, params=params, headers=request_headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self._count("hits")
+            self._count("revalidated")
+            entry["fetched_at"] = time.time()
+            self._write(key, entry)
+            return self._to_response(entry, url)
+
+        self._count("misses")
+        if response.status_code == 200:
+            validators = {name: response.headers[name]
+                          for name in ("ETag", "Last-Modified", "Content-Type") if name in response.headers}
+            self._write(key, {"url": url, "fetched_at": time.time(), "headers": validators, "body": response.text})
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+
+def window_ttl(end_date: Optional[str], ttl: Any = "default",
+               immutable_after_days: int = IMMUTABLE_AFTER_DAYS, today: Optional[date] = None) -> Any:
+    """Return None (immutable) for date windows that ended long enough ago, else `ttl`."""
+    if not end_date:
+        return ttl
+    today = today or datetime.now(UTC).date()
+    if date.fromisoformat(end_date[:10]) <= today - timedelta(days=immutable_after_days):
+        return None
+    return ttl
+
+
+def configure_cache(cache_dir: Optional[str]) -> Optional[HTTPCache]:
+    """Enable the process-wide cache in `cache_dir`, or disable it when None."""
+    global _cache
+    with _cache_lock:
+        _cache = HTTPCache(cache_dir) if cache_dir else None
+    return _cache
+
+
+def get_cache() -> Optional[HTTPCache]:
+    """Return the process-wide cache, enabling it from KLAVIYO_HTTP_CACHE_DIR on first use."""
+    global _cache
+    if _cache is None and os.getenv(CACHE_DIR_ENV):
+        with _cache_lock:
+            if _cache is None:
+                _cache = HTTPCache(os.environ[CACHE_DIR_ENV])
+    return _cache
+
+
+def cached_get(session: requests.Session, url: str, params: Optional[Dict[str, Any]] = None,
+               ttl: Any = "default", **kwargs) -> requests.Response:
+    """GET through the process-wide cache when enabled, otherwise straight through the session."""
+    cache = get_cache()
+    if cache is None:
+        return session.get(url, params=params, **kwargs)
+    return cache.get(session, url, params=params, ttl=ttl, **kwargs)
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 import os
+import asyncio
+import functools
 import requests
 import time
 import json
 import csv
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
 
+try:
+    from .klaviyo_http import get_session
+    from .http_cache import cached_get, configure_cache, get_cache, window_ttl
+except ImportError:
+    # Fallback for direct script execution
+    from klaviyo_http import get_session
+    from http_cache import cached_get, configure_cache, get_cache, window_ttl
+
 # Constants
 BASE_URL = "https://a.klaviyo.com/api/v1"
+METRICS_WINDOW_DAYS = 30  # Default rolling window for campaign metrics
+MAX_CONCURRENCY = int(os.getenv("KLAVIYO_MAX_CONCURRENCY", "8"))  # Parallel per-campaign requests
+MAX_CAMPAIGN_PAGES = int(os.getenv("KLAVIYO_MAX_CAMPAIGN_PAGES", "1000"))  # Pagination safety cap
 
 # Configuration
 def get_api_key():
@@ -18,7 +32,12 @@ def get_api_key():
     return api_key
 
 # API Functions
-def fetch_campaigns(page_token=None, dry_run=False):
+def fetch_campaigns(page_token=None, dry_run=False, raise_on_error=False):
+    """Fetch one page of campaigns, returning (campaigns, next_page_token)
+    
+    Request errors are logged and an empty last page is returned, unless
+    `raise_on_error` is set, so pagination can fail instead of stopping early.
+    """
     api_key = get_api_key()
     params = {"api_key": api_key, "count": 100}
     if page_token:
@@ -59,41 +78,68 @@ def fetch_campaigns(page_token=None, dry_run=False):
             ], None
     
     try:
-        response = requests.get(f"{BASE_URL}/campaigns", params=params, timeout=10)
+        response = cached_get(get_session(), f"{BASE_URL}/campaigns", params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         return data["data"], data.get("next_page_token")
     except requests.exceptions.RequestException as e:
         print(f"Error fetching campaigns: {e}")
+        if raise_on_error:
+            raise
         return [], None
 
-def fetch_all_campaigns(dry_run=False):
-    all_campaigns = []
+def _check_next_page(page_token, seen_tokens, pages):
+    """Stop pagination that would loop: a repeated page token or too many pages"""
+    if page_token in seen_tokens:
+        raise RuntimeError(f"Klaviyo returned page token {page_token!r} twice; aborting pagination")
+    if pages >= MAX_CAMPAIGN_PAGES:
+        raise RuntimeError(f"Campaign pagination exceeded {MAX_CAMPAIGN_PAGES} pages; aborting")
+    seen_tokens.add(page_token)
+
+def iter_campaign_pages(dry_run=False):
+    """Yield campaigns one page at a time, following next_page_token until the last page
+    
+    Raises RuntimeError if the API repeats a page token or pagination runs
+    past MAX_CAMPAIGN_PAGES, and requests.RequestException if a page fails,
+    rather than returning a truncated listing.
+    """
     page_token = None
-    page_count = 0
-    max_pages = 10  # Limit for safety
+    seen_tokens = set()
+    pages = 0
     
-    while page_count < max_pages:
-        campaigns, next_page_token = fetch_campaigns(page_token, dry_run)
-        all_campaigns.extend(campaigns)
+    while True:
+        campaigns, next_page_token = fetch_campaigns(page_token, dry_run, raise_on_error=True)
+        pages += 1
+        yield campaigns
         page_token = next_page_token
-        page_count += 1
         
         if not page_token:
             break
+        _check_next_page(page_token, seen_tokens, pages)
         
         # Avoid rate limiting
         time.sleep(0.2)
-    
-    return all_campaigns
 
-def fetch_campaign_metrics(campaign_id, dry_run=False):
+def iter_campaigns(dry_run=False):
+    """Yield campaigns one by one across all pages, without holding them in memory"""
+    for page in iter_campaign_pages(dry_run):
+        yield from page
+
+def fetch_all_campaigns(dry_run=False):
+    return list(iter_campaigns(dry_run))
+
+def fetch_campaign_metrics(campaign_id, dry_run=False, start_date=None, end_date=None, raise_on_error=False):
+    """Fetch metrics for a campaign over [start_date, end_date] (default: last 30 days)
+    
+    Request errors are logged and an empty dict is returned, unless
+    `raise_on_error` is set, so callers can tell a failed fetch from no data.
+    """
     api_key = get_api_key()
     params = {
         "api_key": api_key,
         "campaign_id": campaign_id,
-        "start_date": (datetime.now(UTC) - timedelta(days=30)).strftime("%Y-%m-%d"),
-        "end_date": datetime.now(UTC).strftime("%Y-%m-%d")
+        "start_date": start_date or (datetime.now(UTC) - timedelta(days=METRICS_WINDOW_DAYS)).strftime("%Y-%m-%d"),
+        "end_date": end_date or datetime.now(UTC).strftime("%Y-%m-%d")
     }
     
     if dry_run:
@@ -107,13 +153,105 @@ def fetch_campaign_metrics(campaign_id, dry_run=False):
         }
     
     try:
-        response = requests.get(f"{BASE_URL}/campaign-metrics", params=params, timeout=10)
+        # Metrics for windows that ended long ago don't change, so cache them indefinitely
+        response = cached_get(get_session(), f"{BASE_URL}/campaign-metrics", params=params,
+                              ttl=window_ttl(end_date), timeout=10)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Error fetching metrics for campaign {campaign_id}: {e}")
+        if raise_on_error:
+            raise
         return {}
 
+# Async API Functions
+async def _wait_for_limiter(limiter):
+    """Take a slot from `limiter` (a rate_limiter.RateLimiter) without blocking the event loop"""
+    if limiter is None:
+        return
+    while True:
+        wait = limiter.try_acquire()
+        if wait <= 0:
+            return
+        await asyncio.sleep(wait)
+
+async def async_fetch_campaign_metrics(campaign_id, dry_run=False, semaphore=None, limiter=None, executor=None):
+    """Fetch metrics for one campaign without blocking the event loop.
+    
+    The request runs on `executor` (default: the loop's default executor)
+    through the same transport as fetch_campaign_metrics; `semaphore` caps
+    in-flight requests and `limiter` (a rate_limiter.RateLimiter) spaces them
+    to the Klaviyo rate limits.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with semaphore:
+        await _wait_for_limiter(limiter)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fetch_campaign_metrics, campaign_id, dry_run)
+
+async def async_fetch_all_campaigns(dry_run=False, with_metrics=True, concurrency=None, limiter=None):
+    """Fetch all campaigns, pipelining metrics requests with pagination.
+    
+    Metrics requests for page N's campaigns are started as soon as the page
+    arrives, while page N+1 is still loading. Campaigns are returned in page
+    order with their metrics merged in, matching the synchronous path.
+    
+    Requests run on a dedicated thread pool with one worker per in-flight
+    metrics request plus one for pagination, and the shared HTTP pool is
+    sized to match, so neither the default executor nor the connection pool
+    caps `concurrency`. Page requests take a limiter slot like metrics do.
+    
+    Args:
+        dry_run: If True, don't make actual API calls
+        with_metrics: If True, merge per-campaign metrics into each campaign
+        concurrency: Maximum in-flight metrics requests (default: KLAVIYO_MAX_CONCURRENCY)
+        limiter: Optional rate limiter shared by all requests
+    """
+    concurrency = concurrency or MAX_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    if not dry_run:
+        get_session(pool_size=concurrency + 1)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as executor:
+        return await _pipeline_campaign_pages(loop, executor, dry_run, with_metrics, semaphore, limiter)
+
+async def _pipeline_campaign_pages(loop, executor, dry_run, with_metrics, semaphore, limiter):
+    all_campaigns = []
+    metric_tasks = []
+    page_token = None
+    seen_tokens = set()
+    pages = 0
+    
+    try:
+        while True:
+            await _wait_for_limiter(limiter)
+            campaigns, next_page_token = await loop.run_in_executor(
+                executor, functools.partial(fetch_campaigns, page_token, dry_run, raise_on_error=True)
+            )
+            pages += 1
+            all_campaigns.extend(campaigns)
+            if with_metrics:
+                metric_tasks.extend(
+                    asyncio.create_task(async_fetch_campaign_metrics(c["id"], dry_run, semaphore, limiter, executor))
+                    for c in campaigns
+                )
+            page_token = next_page_token
+            
+            if not page_token:
+                break
+            _check_next_page(page_token, seen_tokens, pages)
+    except BaseException:
+        for task in metric_tasks:
+            task.cancel()
+        raise
+    
+    if metric_tasks:
+        for campaign, metrics in zip(all_campaigns, await asyncio.gather(*metric_tasks)):
+            campaign.update(metrics)
+    
+    return all_campaigns
+
 # Output Functions
 def write_to_csv(data, output_file="campaigns.csv"):
     if not data:
@@ -157,8 +295,12 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Perform a dry run without making actual API calls")
     parser.add_argument("--output", help="Output file path")
     parser.add_argument("--format", choices=["csv", "json"], default="csv", help="Output format")
+    parser.add_argument("--http-cache", metavar="DIR", help="Cache GET responses in DIR (or set KLAVIYO_HTTP_CACHE_DIR)")
     args = parser.parse_args()
     
+    if args.http_cache:
+        configure_cache(args.http_cache)
+    
     # Set default output file based on format
     output_file = args.output
     if not output_file:
@@ -181,6 +323,10 @@ def main():
         write_to_csv(campaigns, output_file)
     else:
         write_to_json(campaigns, output_file)
+    
+    cache = get_cache()
+    if cache:
+        print(f"HTTP cache: {cache.stats()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Up to 5 retries on 429 (honouring Retry-After) and 5xx, exponential backoff
+# from 1s with jitter
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 1.0
+BACKOFF_JITTER = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_POOL_SIZE = int(os.getenv("KLAVIYO_MAX_CONCURRENCY", "8"))
+
+_session: Optional[requests.Session] = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+class KlaviyoRetry(Retry):
+    """Retry policy that only repeats writes when Klaviyo rejected them.
+
+    GET/PUT/DELETE and the other idempotent methods are retried on 429, 5xx
+    and connection/read errors. POST and PATCH are retried only on 429: a 5xx
+    or a read timeout may arrive after Klaviyo already created or sent
+    something, so repeating it could duplicate a campaign or a send. Writes
+    that carry an Idempotency-Key header are safe to repeat and get the full
+    policy (see KlaviyoAdapter).
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_retry(idempotent_writes: bool = False) -> Retry:
+    """Build the urllib3 retry policy used for Klaviyo requests.
+
+    Args:
+        idempotent_writes: Also retry POST/PATCH on 5xx and read errors; only
+            for requests Klaviyo can deduplicate by their Idempotency-Key
+    """
+    allowed_methods = Retry.DEFAULT_ALLOWED_METHODS
+    if idempotent_writes:
+        allowed_methods = allowed_methods | {"POST", "PATCH"}
+    return KlaviyoRetry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=allowed_methods,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        respect_retry_after_header=True,
+        # Return the final response so callers keep their own status handling
+        raise_on_status=False,
+    )
+
+
+class KlaviyoAdapter(HTTPAdapter):
+    """HTTPAdapter that picks the retry policy per request.
+
+    requests reads ``max_retries`` once per send, so the idempotent-write
+    policy is swapped in thread-locally for requests carrying an
+    Idempotency-Key header without affecting concurrent requests.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        self._idempotent_retries = build_retry(idempotent_writes=True)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def max_retries(self):
+        local = getattr(self, "_local", None)
+        override = getattr(local, "retries", None) if local is not None else None
+        return override or self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value):
+        self._max_retries = value
+
+    def send(self, request, **kwargs):
+        if not request.headers.get(IDEMPOTENCY_HEADER):
+            return super().send(request, **kwargs)
+        self._local.retries = self._idempotent_retries
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self._local.retries = None
+
+
+def _mount_adapter(session: requests.Session, pool_size: int) -> None:
+    adapter = KlaviyoAdapter(pool_connections=1, pool_maxsize=pool_size,
+                             max_retries=build_retry(), pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, api_key: Optional[str] = None,
+                   api_version: Optional[str] = None) -> requests.Session:
+    """Create a keep-alive session for the Klaviyo API.
+
+    Args:
+        pool_size: Connections kept per host; should match the request concurrency
+        api_key: Private API key sent as the default Authorization header
+        api_version: Revision sent as the default revision header
+
+    Returns:
+        requests.Session with a pooled, retrying HTTPAdapter mounted for https
+    """
+    session = requests.Session()
+    _mount_adapter(session, pool_size)
+    session.headers.update({"Accept": "application/json"})
+    if api_key:
+        session.headers["Authorization"] = f"Klaviyo-API-Key {api_key}"
+    if api_version:
+        session.headers["revision"] = api_version
+    return session
+
+
+def get_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Return the process-wide Klaviyo session, creating it on first use.
+
+    Args:
+        pool_size: Concurrency the caller is about to use; the shared pool is
+            grown to hold at least this many connections (default: DEFAULT_POOL_SIZE)
+    """
+    global _session, _session_pool_size
+    pool_size = max(pool_size or 0, DEFAULT_POOL_SIZE)
+    if _session is None or _session_pool_size < pool_size:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(
+                    pool_size=pool_size,
+                    api_key=os.getenv("KLAVIYO_API_KEY"),
+                    api_version=os.getenv("KLAVIYO_API_VERSION"),
+                )
+                _session_pool_size = pool_size
+            elif _session_pool_size < pool_size:
+                # Requests already in flight finish on the old adapter's pool
+                _mount_adapter(_session, pool_size)
+                _session_pool_size = pool_size
+    return _session
+
+
+def reset_session() -> None:
+    """Close and drop the shared session (used by tests and after forking)."""
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pool_size = 0
@@ -68,6 +68,17 @@ def normalize_records(raw_records):
     
     return [normalize_record(record) for record in raw_records]
 
+def source_fields(looker_fields):
+    """Return the Klaviyo fields needed to produce the given Looker Studio fields
+    
+    Mapped fields are translated back through FIELD_MAP, derived fields are
+    skipped (their inputs are mapped fields), and any other field keeps its
+    name since normalize_record passes it through unchanged.
+    """
+    klaviyo_names = {looker_field: klaviyo_field for klaviyo_field, looker_field in FIELD_MAP.items()}
+    fields = [klaviyo_names.get(field, field) for field in looker_fields if field not in DERIVED_FIELDS]
+    return list(dict.fromkeys(fields))
+
 def get_field_mapping():
     """Return the field mapping dictionary"""
     return FIELD_MAP.copy()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import tempfile
+import threading
+from typing import Dict, Iterable, Optional
+
+import requests
+
+try:
+    from .klaviyo_http import get_session
+except ImportError:
+    from klaviyo_http import get_session
+
+METRICS_URL = "https://a.klaviyo.com/api/metrics/"
+
+# Default location of the persisted catalog (the file the old per-name cache used)
+DEFAULT_CATALOG_FILE = ".metric_ids.json"
+DEFAULT_CATALOG_TTL = 24 * 3600
+CATALOG_VERSION = 1
+
+
+class MetricCatalog:
+    """Name -> ID map of every Klaviyo metric in the account.
+
+    The whole catalog is fetched in one paginated pass and kept in memory, so
+    any number of lookups costs at most one catalog fetch. It is persisted as::
+
+        {"version": 1, "fetched_at": <epoch seconds>, "metrics": {"<name>": "<id>"}}
+
+    and refetched once it is older than `ttl` seconds. The flat
+    ``{"<name>": "<id>"}`` file written by older versions is still read, using
+    the file's modification time as its fetch time.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_FILE, ttl: Optional[int] = DEFAULT_CATALOG_TTL,
+                 session: Optional[requests.Session] = None, headers: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.ttl = ttl
+        self.session = session
+        self.headers = headers
+        self.requests_made = 0
+        self._refreshed = False
+        self._lock = threading.Lock()
+        self._metrics, self._fetched_at = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}, 0.0
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: ignoring unreadable metric catalog {self.path}: {e}")
+            return {}, 0.0
+        if not isinstance(data, dict):
+            return {}, 0.0
+        if "version" not in data:
+            # Legacy flat cache
+            return {name: metric_id for name, metric_id in data.items() if metric_id}, os.path.getmtime(self.path)
+        if data.get("version") != CATALOG_VERSION:
+            print(f"Warning: ignoring metric catalog {self.path} with unsupported version {data.get('version')}")
+            return {}, 0.0
+        return dict(data.get("metrics", {})), float(data.get("fetched_at", 0))
+
+    def is_fresh(self) -> bool:
+        """Return True if the catalog has been fetched and is within its TTL."""
+        if not self._fetched_at:
+            return False
+        return self.ttl is None or time.time() - self._fetched_at < self.ttl
+
+    def refresh(self) -> None:
+        """Fetch every metric, following pagination, and persist the catalog."""
+        session = self.session or get_session()
+        metrics = {}
+        url, params = METRICS_URL, {"fields[metric]": "name"}
+        while url:
+            response = session.get(url, headers=self.headers, params=params, timeout=10)
+            self.requests_made += 1
+            response.raise_for_status()
+            body = response.json()
+            for metric in body.get("data", []):
+                name = metric.get("attributes", {}).get("name")
+                # Keep the first metric when several integrations share a name
+                if name and name not in metrics:
+                    metrics[name] = metric["id"]
+            url = (body.get("links") or {}).get("next")
+            # The next link already carries the query
+            params = None
+
+        self._metrics = metrics
+        self._fetched_at = time.time()
+        self._refreshed = True
+        self.save()
+
+    def update(self, metrics: Dict[str, str]) -> None:
+        """Add known name -> ID pairs (e.g. mock IDs) and persist them."""
+        with self._lock:
+            self._metrics.update(metrics)
+            self._fetched_at = time.time()
+            self.save()
+
+    def lookup(self, names: Iterable[str], force_refresh: bool = False) -> Dict[str, Optional[str]]:
+        """Return IDs for many metric names, None for names that don't exist.
+
+        The catalog is refetched when forced, when it is stale, or when a name
+        is missing and it hasn't already been refetched in this process. If the
+        refetch fails, the catalog already in memory (possibly stale) is used.
+        """
+        names = list(names)
+        with self._lock:
+            missing = any(name not in self._metrics for name in names)
+            if force_refresh or not self.is_fresh() or (missing and not self._refreshed):
+                try:
+                    self.refresh()
+                except requests.RequestException as e:
+                    print(f"Warning: could not refresh metric catalog, using cached IDs: {e}")
+            return {name: self._metrics.get(name) for name in names}
+
+    def get(self, name: str, force_refresh: bool = False) -> Optional[str]:
+        """Return the ID for one metric name, or None."""
+        return self.lookup([name], force_refresh=force_refresh)[name]
+
+    def save(self) -> None:
+        """Atomically write the catalog file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metric_catalog_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": CATALOG_VERSION, "fetched_at": self._fetched_at,
+                           "metrics": self._metrics}, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -4,14 +4,27 @@ import sys
 import csv
 import argparse
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Union
+import math
+import shutil
+import threading
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator, Tuple
 import json
 import uuid
 
+try:
+    from .utils.date_ranges import split_date_range
+    from .etl_state import ETLStateStore, DEFAULT_STATE_FILE
+except ImportError:
+    from utils.date_ranges import split_date_range
+    from etl_state import ETLStateStore, DEFAULT_STATE_FILE
+
 try:
     import psycopg2
     from psycopg2.extras import RealDictCursor
+    from psycopg2.pool import ThreadedConnectionPool
     PSYCOPG2_AVAILABLE = True
 except ImportError:
     PSYCOPG2_AVAILABLE = False
@@ -24,6 +37,26 @@ DEFAULT_TABLE = "campaign"  # Changed from 'klaviyo_campaigns' to match actual F
 DEFAULT_DATE_COLUMN = "created_at"
 DEFAULT_LIMIT = 5
 DEFAULT_OUTPUT_DIR = "data"
+# Rows fetched per round trip by server-side cursors
+DEFAULT_BATCH_SIZE = 10000
+# CSV export engines: "cursor" streams rows through Python, "copy" uses COPY ... TO STDOUT
+EXPORT_ENGINES = ("cursor", "copy")
+DEFAULT_EXPORT_ENGINE = "cursor"
+# Connection pool bounds (overridable with PG_POOL_MIN_SIZE / PG_POOL_MAX_SIZE)
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 8
+# Date partitions extracted concurrently (1 = a single query)
+DEFAULT_PARALLELISM = 1
+# Incremental (keyset) extraction: tie-breaking key column and rows per page
+DEFAULT_KEY_COLUMN = "id"
+DEFAULT_PAGE_SIZE = 10000
+# Source name for Postgres cursors in the ETL state file
+STATE_SOURCE = "postgres"
+
+_pool: Optional["ThreadedConnectionPool"] = None
+# Bounds borrowers to the pool size so they wait instead of getting PoolError
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
 
 # Sample mock data for dry-run testing
 def generate_mock_data(start_date=None, end_date=None, num_records=10):
@@ -184,6 +217,21 @@ def generate_generic_mock_data(start, end, num_records=10):
     
     return records
 
+def _connection_params() -> Dict[str, Any]:
+    """Return psycopg2 connection arguments from the PG_* environment variables."""
+    try:
+        return {
+            "host": os.environ["PG_HOST"],
+            "port": os.environ.get("PG_PORT", 5432),
+            "dbname": os.environ["PG_DB"],
+            "user": os.environ["PG_USER"],
+            "password": os.environ["PG_PASSWORD"],
+        }
+    except KeyError as e:
+        logger.error(f"Missing required environment variable: {e}")
+        raise
+
+
 def get_connection():
     """Create a connection to the Postgres database using environment variables."""
     if not PSYCOPG2_AVAILABLE:
@@ -191,23 +239,93 @@ def get_connection():
         raise ImportError("psycopg2 module not available")
         
     try:
-        return psycopg2.connect(
-            host=os.environ["PG_HOST"],
-            port=os.environ.get("PG_PORT", 5432),
-            dbname=os.environ["PG_DB"],
-            user=os.environ["PG_USER"],
-            password=os.environ["PG_PASSWORD"]
-        )
-    except KeyError as e:
-        logger.error(f"Missing required environment variable: {e}")
-        raise
+        return psycopg2.connect(**_connection_params())
     except psycopg2.Error as e:
         logger.error(f"Failed to connect to Postgres: {e}")
         raise
 
 
+def get_pool() -> "ThreadedConnectionPool":
+    """Return the process-wide connection pool, creating it from the PG_* env vars on first use."""
+    return _get_pool_and_slots()[0]
+
+
+def _get_pool_and_slots() -> Tuple["ThreadedConnectionPool", threading.BoundedSemaphore]:
+    """Return the pool and the semaphore guarding its connections, read together under the lock."""
+    global _pool, _pool_slots
+    if not PSYCOPG2_AVAILABLE:
+        logger.error("psycopg2 module not available")
+        raise ImportError("psycopg2 module not available")
+    
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            min_size = int(os.environ.get("PG_POOL_MIN_SIZE", DEFAULT_POOL_MIN_SIZE))
+            max_size = int(os.environ.get("PG_POOL_MAX_SIZE", DEFAULT_POOL_MAX_SIZE))
+            try:
+                _pool = ThreadedConnectionPool(min_size, max_size, **_connection_params())
+            except psycopg2.Error as e:
+                logger.error(f"Failed to connect to Postgres: {e}")
+                raise
+            _pool_slots = threading.BoundedSemaphore(max_size)
+            logger.info(f"Created Postgres connection pool (min {min_size}, max {max_size})")
+        return _pool, _pool_slots
+
+
+def close_pool() -> None:
+    """Close every pooled connection; the next borrower creates a new pool."""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+
+
+def _is_healthy(conn) -> bool:
+    """Return True if a pooled connection is open and answers a trivial query."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a healthy connection from the pool and return it afterwards.
+    
+    Blocks while all PG_POOL_MAX_SIZE connections are in use. Broken
+    connections are replaced on checkout and discarded on return, and any
+    open transaction is rolled back before the connection goes back.
+    """
+    pool, slots = _get_pool_and_slots()
+    slots.acquire()
+    try:
+        conn = pool.getconn()
+        if not _is_healthy(conn):
+            logger.warning("Replacing broken pooled Postgres connection")
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+
 def build_query(table: str, start_date: Optional[str] = None, end_date: Optional[str] = None, 
-                date_column: str = DEFAULT_DATE_COLUMN, limit: Optional[int] = None) -> str:
+                date_column: str = DEFAULT_DATE_COLUMN, limit: Optional[int] = None,
+                end_exclusive: bool = False) -> str:
     """Build a SQL query with optional date filters."""
     where_clauses = []
     
@@ -215,7 +333,7 @@ def build_query(table: str, start_date: Optional[str] = None, end_date: Optional
         where_clauses.append(f"{date_column} >= '{start_date}'")
     
     if end_date:
-        where_clauses.append(f"{date_column} <= '{end_date}'")
+        where_clauses.append(f"{date_column} {'<' if end_exclusive else '<='} '{end_date}'")
     
     where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
     limit_clause = f"LIMIT {limit}" if limit else ""
@@ -224,6 +342,55 @@ def build_query(table: str, start_date: Optional[str] = None, end_date: Optional
     return f"SELECT * FROM {table} {where_clause} {order_clause} {limit_clause};"
 
 
+def build_partition_queries(table: str, start_date: str, end_date: str, partitions: int,
+                            date_column: str = DEFAULT_DATE_COLUMN) -> List[str]:
+    """Split a date-filtered query into up to `partitions` queries over consecutive date ranges.
+    
+    Each partition covers [its first day, the next partition's first day); the
+    last one keeps build_query's inclusive end, so together they return exactly
+    the rows of build_query(table, start_date, end_date, date_column), in order.
+    """
+    total_days = (date.fromisoformat(end_date[:10]) - date.fromisoformat(start_date[:10])).days + 1
+    shards = split_date_range(start_date[:10], end_date[:10], max(1, math.ceil(total_days / max(1, partitions))))
+    
+    queries = []
+    for i, (shard_start, _) in enumerate(shards):
+        lower = start_date if i == 0 else shard_start
+        if i == len(shards) - 1:
+            queries.append(build_query(table, lower, end_date, date_column))
+        else:
+            queries.append(build_query(table, lower, shards[i + 1][0], date_column, end_exclusive=True))
+    return queries
+
+
+def build_keyset_query(table: str, date_column: str = DEFAULT_DATE_COLUMN,
+                       key_column: str = DEFAULT_KEY_COLUMN,
+                       after: Optional[Tuple[Any, Any]] = None,
+                       start_date: Optional[str] = None,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[str, tuple]:
+    """Build one page of a keyset-paginated query.
+    
+    Rows are ordered by (date_column, key_column) and a page starts strictly
+    after the `after` key, so no row is read twice or skipped even when many
+    rows share a timestamp. Without `after`, the first page starts at
+    `start_date` (or the beginning of the table). An index on
+    (date_column, key_column) keeps every page an index range scan.
+    
+    Returns:
+        (query, params) for cursor.execute
+    """
+    if after is not None:
+        where_clause, params = f"WHERE ({date_column}, {key_column}) > (%s, %s)", tuple(after)
+    elif start_date:
+        where_clause, params = f"WHERE {date_column} >= %s", (start_date,)
+    else:
+        where_clause, params = "", ()
+    
+    query = (f"SELECT * FROM {table} {where_clause} "
+             f"ORDER BY {date_column} ASC, {key_column} ASC LIMIT {int(page_size)};")
+    return query, params
+
+
 def build_last_n_days_query(table: str, days: int = 30, date_column: str = DEFAULT_DATE_COLUMN, 
                           limit: Optional[int] = None) -> str:
     """Build a SQL query to fetch data from the last N days."""
@@ -236,23 +403,129 @@ def build_last_n_days_query(table: str, days: int = 30, date_column: str = DEFAU
 
 def fetch_last_n_days(conn, table: str, days: int = 30, date_column: str = DEFAULT_DATE_COLUMN, 
                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Fetch data from the last N days as a fallback when date filters return no results."""
+    """Fetch data from the last N days as a fallback when date filters return no results.
+    
+    Pass conn=None to borrow a connection from the pool.
+    """
     query = build_last_n_days_query(table, days, date_column, limit)
     logger.info(f"Fetching data from last {days} days with query: {query}")
+    if conn is None:
+        with pooled_connection() as conn:
+            return execute_query(conn, query)
     return execute_query(conn, query)
 
 
-def execute_query(conn, query: str) -> List[Dict[str, Any]]:
+def execute_query(conn, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
     """Execute a SQL query and return results as a list of dictionaries."""
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            # RealDictRow is already a dict; avoid copying every row
+            return cursor.fetchall()
+    except psycopg2.Error as e:
+        logger.error(f"Query execution failed: {e}")
+        raise
+
+
+def iter_query(conn, query: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Execute a SQL query on a named server-side cursor and yield rows in batches.
+    
+    Only one batch of `batch_size` rows is held in memory at a time; the rest
+    stays on the server until it is fetched.
+    """
+    try:
+        with conn.cursor(name=f"extract_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = batch_size
             cursor.execute(query)
-            return [dict(row) for row in cursor.fetchall()]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
     except psycopg2.Error as e:
         logger.error(f"Query execution failed: {e}")
         raise
 
 
+def iter_record_batches(table: str = DEFAULT_TABLE,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        date_column: str = DEFAULT_DATE_COLUMN,
+                        limit: Optional[int] = None,
+                        fallback_days: int = 30,
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Stream rows from Postgres in batches, with the same fallback as fetch_to_dataframe.
+    
+    If the date range yields no rows and `fallback_days` > 0, the last
+    `fallback_days` days are streamed instead. The pooled connection is
+    returned to the pool when the iterator is exhausted or closed.
+    """
+    with pooled_connection() as conn:
+        query = build_query(table, start_date, end_date, date_column, limit)
+        logger.info(f"Streaming query: {query}")
+        rows = 0
+        for batch in iter_query(conn, query, batch_size):
+            rows += len(batch)
+            yield batch
+        
+        if not rows and fallback_days > 0:
+            logger.warning(f"No results found for date range {start_date} to {end_date}. Falling back to last {fallback_days} days")
+            query = build_last_n_days_query(table, fallback_days, date_column, limit)
+            logger.info(f"Streaming data from last {fallback_days} days with query: {query}")
+            for batch in iter_query(conn, query, batch_size):
+                rows += len(batch)
+                yield batch
+        
+        logger.info(f"Streamed {rows} rows from {table}")
+
+
+def get_keyset_cursor(state: ETLStateStore, table: str) -> Optional[Tuple[Any, Any]]:
+    """Return the (date, key) of the last row extracted from a table, or None."""
+    value = state.get_watermark(STATE_SOURCE, table)
+    return tuple(json.loads(value)) if value else None
+
+
+def set_keyset_cursor(state: ETLStateStore, table: str, last_date: Any, last_key: Any) -> None:
+    """Record the (date, key) of the last row extracted from a table."""
+    if hasattr(last_date, "isoformat"):
+        last_date = last_date.isoformat()
+    state.set_watermark(STATE_SOURCE, table, json.dumps([last_date, last_key], default=str))
+
+
+def iter_incremental_pages(table: str, state: ETLStateStore,
+                           date_column: str = DEFAULT_DATE_COLUMN,
+                           key_column: str = DEFAULT_KEY_COLUMN,
+                           start_date: Optional[str] = None,
+                           page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield rows added since the last run, one keyset page at a time.
+    
+    The cursor (last date and key) is saved to `state` once the consumer asks
+    for the next page, i.e. after it has handled the previous one. A run that
+    fails part-way therefore resumes after the last handled page, and
+    repeated runs only read new rows.
+    """
+    after = get_keyset_cursor(state, table)
+    if after:
+        logger.info(f"Resuming {table} after ({after[0]}, {after[1]})")
+    
+    with pooled_connection() as conn:
+        while True:
+            query, params = build_keyset_query(table, date_column, key_column, after, start_date, page_size)
+            logger.debug(f"Executing keyset query: {query} {params}")
+            rows = execute_query(conn, query, params)
+            if not rows:
+                break
+            
+            yield rows
+            
+            last = rows[-1]
+            after = (last[date_column], last[key_column])
+            set_keyset_cursor(state, table, *after)
+            state.save()
+            if len(rows) < page_size:
+                break
+
+
 def write_to_csv(data: List[Dict[str, Any]], output_file: str) -> bool:
     """Write data to a CSV file."""
     if not data:
@@ -282,6 +555,95 @@ def write_to_csv(data: List[Dict[str, Any]], output_file: str) -> bool:
         raise
 
 
+def copy_query_to_csv(conn, query: str, output_file: str) -> int:
+    """Stream a query's result straight into a CSV file with COPY ... TO STDOUT.
+    
+    Rows never become Python objects, and the columns keep the order of the
+    query (the table's column order for SELECT *).
+    
+    Returns:
+        Number of rows copied
+    """
+    copy_sql = f"COPY ({query.strip().rstrip(';').strip()}) TO STDOUT WITH CSV HEADER"
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    try:
+        with conn.cursor() as cursor, open(output_file, "w", newline="", encoding="utf-8") as f:
+            cursor.copy_expert(copy_sql, f)
+            return cursor.rowcount
+    except psycopg2.Error as e:
+        logger.error(f"COPY failed: {e}")
+        raise
+
+
+def copy_export_to_csv(table: str, output_file: str,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None,
+                       date_column: str = DEFAULT_DATE_COLUMN,
+                       limit: Optional[int] = None,
+                       fallback_days: int = 30) -> int:
+    """Export a table to CSV with COPY, with the same filters and fallback as fetch_to_dataframe.
+    
+    Returns:
+        Number of rows written; when no rows match, the file is removed and 0 is returned
+    """
+    with pooled_connection() as conn:
+        query = build_query(table, start_date, end_date, date_column, limit)
+        logger.info(f"Copying query: {query}")
+        rows = copy_query_to_csv(conn, query, output_file)
+        
+        if not rows and fallback_days > 0:
+            logger.warning(f"No results found for date range {start_date} to {end_date}. Falling back to last {fallback_days} days")
+            query = build_last_n_days_query(table, fallback_days, date_column, limit)
+            logger.info(f"Copying data from last {fallback_days} days with query: {query}")
+            rows = copy_query_to_csv(conn, query, output_file)
+        
+        if not rows and os.path.exists(output_file):
+            # Only a header was written
+            os.remove(output_file)
+        logger.info(f"Copied {rows} rows from {table}")
+        return rows
+
+
+def write_batches_to_csv(batches: Iterable[List[Dict[str, Any]]], output_file: str,
+                         durable: bool = False, mode: str = "w") -> int:
+    """Write batches of rows to a CSV file as they arrive.
+    
+    The header comes from the first row; the file is only created once a
+    non-empty batch arrives. With `durable`, each batch is flushed and
+    fsynced before the next one is requested, so a producer that records
+    progress between batches (iter_incremental_pages) never gets ahead of
+    the file. Pass mode="x" to refuse to overwrite an existing file.
+    
+    Returns:
+        Number of rows written (0 if there were none and no file was written)
+    """
+    f = None
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            if writer is None:
+                os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+                f = open(output_file, mode, newline="", encoding="utf-8")
+                writer = csv.DictWriter(f, fieldnames=sorted(batch[0].keys()), quotechar='"',
+                                        quoting=csv.QUOTE_MINIMAL, extrasaction="ignore")
+                writer.writeheader()
+            writer.writerows(batch)
+            rows += len(batch)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+    finally:
+        if f:
+            f.close()
+    
+    if rows:
+        logger.info(f"Data written to {output_file}")
+    return rows
+
+
 def generate_output_filename(table: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Generate an output filename based on table name and date range."""
     today = datetime.now().strftime("%Y%m%d")
@@ -298,16 +660,111 @@ def generate_output_filename(table: str, start_date: Optional[str] = None, end_d
     return os.path.join(DEFAULT_OUTPUT_DIR, f"{table}_export_{date_part}.csv")
 
 
+def generate_incremental_filename(table: str) -> str:
+    """Generate a per-run output filename for an incremental export.
+    
+    Each run only holds the rows added since the previous one, so runs must
+    never share a file; the name carries the run's start time.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(DEFAULT_OUTPUT_DIR, f"{table}_incremental_{timestamp}.csv")
+
+
+def fetch_partitioned(table: str, start_date: str, end_date: str,
+                      date_column: str = DEFAULT_DATE_COLUMN,
+                      parallelism: int = DEFAULT_PARALLELISM) -> List[Dict[str, Any]]:
+    """Fetch a date range as `parallelism` partitions, each on its own pooled connection.
+    
+    Results are concatenated in partition order, so rows stay ordered by date.
+    """
+    queries = build_partition_queries(table, start_date, end_date, parallelism, date_column)
+    logger.info(f"Fetching {table} in {len(queries)} partitions with parallelism {parallelism}")
+    
+    def fetch_partition(query: str) -> List[Dict[str, Any]]:
+        with pooled_connection() as conn:
+            return execute_query(conn, query)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(queries)))) as executor:
+        partitions = list(executor.map(fetch_partition, queries))
+    return [row for rows in partitions for row in rows]
+
+
+def export_query_to_csv(query: str, output_file: str, engine: str = DEFAULT_EXPORT_ENGINE,
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Export one query to CSV with the given engine on a pooled connection.
+    
+    Returns:
+        Number of rows written (0 if none matched and no file was written)
+    """
+    with pooled_connection() as conn:
+        if engine == "copy":
+            rows = copy_query_to_csv(conn, query, output_file)
+            if not rows and os.path.exists(output_file):
+                os.remove(output_file)
+            return rows
+        return write_batches_to_csv(iter_query(conn, query, batch_size), output_file)
+
+
+def export_partitioned_to_csv(table: str, start_date: str, end_date: str, output_file: str,
+                              date_column: str = DEFAULT_DATE_COLUMN,
+                              parallelism: int = DEFAULT_PARALLELISM,
+                              engine: str = DEFAULT_EXPORT_ENGINE,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Export a date range to CSV as parallel partitions, then merge them in order.
+    
+    Each partition streams into its own `<output_file>.partNNN` file on its own
+    pooled connection; the parts are then appended to `output_file` (keeping
+    only the first header) and removed.
+    
+    Returns:
+        Number of rows written (0 if none matched and no file was written)
+    """
+    queries = build_partition_queries(table, start_date, end_date, parallelism, date_column)
+    part_files = [f"{output_file}.part{i:03d}" for i in range(len(queries))]
+    logger.info(f"Exporting {table} in {len(queries)} partitions with parallelism {parallelism} ({engine} engine)")
+    
+    def export_partition(args: Tuple[str, str]) -> int:
+        query, part_file = args
+        return export_query_to_csv(query, part_file, engine, batch_size)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(queries)))) as executor:
+            counts = list(executor.map(export_partition, zip(queries, part_files)))
+        
+        total = sum(counts)
+        if total:
+            with open(output_file, "w", newline="", encoding="utf-8") as out:
+                header_written = False
+                for part_file, rows in zip(part_files, counts):
+                    if not rows:
+                        continue
+                    with open(part_file, "r", newline="", encoding="utf-8") as part:
+                        header = part.readline()
+                        if not header_written:
+                            out.write(header)
+                            header_written = True
+                        shutil.copyfileobj(part, out)
+            logger.info(f"Merged {len(queries)} partitions into {output_file}")
+        return total
+    finally:
+        for part_file in part_files:
+            if os.path.exists(part_file):
+                os.remove(part_file)
+
+
 def fetch_to_dataframe(table: str = DEFAULT_TABLE, 
                      start_date: Optional[str] = None, 
                      end_date: Optional[str] = None,
                      date_column: str = DEFAULT_DATE_COLUMN,
                      limit: Optional[int] = None,
                      dry_run: bool = False,
-                     fallback_days: int = 30) -> List[Dict[str, Any]]:
+                     fallback_days: int = 30,
+                     parallelism: int = DEFAULT_PARALLELISM) -> List[Dict[str, Any]]:
     """Fetch data from Postgres and return as a list of dictionaries.
     
     This function can be imported and called directly from other modules.
+    With `parallelism` > 1 and both dates set (and no limit), the date range is
+    fetched as that many partitions concurrently (see fetch_partitioned).
     
     Args:
         table: Table name to query
@@ -317,6 +774,7 @@ def fetch_to_dataframe(table: str = DEFAULT_TABLE,
         limit: Maximum number of rows to return
         dry_run: If True, print query but don't execute it
         fallback_days: Number of days to use for fallback query if no results
+        parallelism: Number of date partitions fetched concurrently
         
     Returns:
         List of dictionaries representing the query results
@@ -328,38 +786,39 @@ def fetch_to_dataframe(table: str = DEFAULT_TABLE,
         return mock_data
     
     try:
-        # Create connection
-        conn = get_connection()
-        
         # Build query with date filters
         query = build_query(table, start_date, end_date, date_column, limit)
         logger.info(f"Executing query: {query}")
         
-        try:
-            # Execute query
-            results = execute_query(conn, query)
-            
-            # If no results and fallback is enabled, try getting recent data
-            if not results and fallback_days > 0:
-                logger.warning(f"No results found for date range {start_date} to {end_date}. Falling back to last {fallback_days} days")
-                results = fetch_last_n_days(conn, table, fallback_days, date_column, limit)
-                if results:
-                    logger.info(f"Fallback query returned {len(results)} rows")
+        # Partitions borrow their own connections
+        partitioned = parallelism > 1 and start_date and end_date and not limit
+        
+        # Borrow a pooled connection; it goes back to the pool afterwards
+        with (nullcontext() if partitioned else pooled_connection()) as conn:
+            try:
+                # Execute query
+                if partitioned:
+                    results = fetch_partitioned(table, start_date, end_date, date_column, parallelism)
                 else:
-                    logger.warning(f"Fallback query also returned 0 rows")
+                    results = execute_query(conn, query)
+            
+                # If no results and fallback is enabled, try getting recent data
+                if not results and fallback_days > 0:
+                    logger.warning(f"No results found for date range {start_date} to {end_date}. Falling back to last {fallback_days} days")
+                    results = fetch_last_n_days(conn, table, fallback_days, date_column, limit)
+                    if results:
+                        logger.info(f"Fallback query returned {len(results)} rows")
+                    else:
+                        logger.warning(f"Fallback query also returned 0 rows")
                     
-            logger.info(f"Fetched {len(results)} rows from {table}")
-            return results
-        except psycopg2.Error as db_error:
-            logger.error(f"Database query error: {db_error}")
-            logger.warning(f"Falling back to mock data for table '{table}'")
-            mock_data = generate_mock_data(start_date, end_date)
-            logger.info(f"Generated {len(mock_data)} mock records due to database error")
-            return mock_data
-        finally:
-            # Always close the connection
-            if conn:
-                conn.close()
+                logger.info(f"Fetched {len(results)} rows from {table}")
+                return results
+            except psycopg2.Error as db_error:
+                logger.error(f"Database query error: {db_error}")
+                logger.warning(f"Falling back to mock data for table '{table}'")
+                mock_data = generate_mock_data(start_date, end_date)
+                logger.info(f"Generated {len(mock_data)} mock records due to database error")
+                return mock_data
     
     except Exception as e:
         logger.error(f"Error fetching data: {e}")
@@ -376,10 +835,20 @@ def fetch_and_export_to_csv(table: str = DEFAULT_TABLE,
                          date_column: str = DEFAULT_DATE_COLUMN,
                          output_file: Optional[str] = None,
                          dry_run: bool = False,
-                         fallback_days: int = 30) -> str:
+                         fallback_days: int = 30,
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         engine: str = DEFAULT_EXPORT_ENGINE,
+                         parallelism: int = DEFAULT_PARALLELISM) -> str:
     """Fetch data from Postgres and export to CSV.
     
     This function can be imported and called directly from other modules.
+    With the "cursor" engine, rows are streamed from a server-side cursor and
+    written batch by batch, so memory use is bounded by `batch_size`
+    regardless of table size. The "copy" engine has Postgres write the CSV
+    with COPY ... TO STDOUT, which is much faster; its columns follow the
+    table's order instead of being sorted by name. With `parallelism` > 1
+    and both dates set, the range is exported as concurrent date partitions
+    that are merged in order (see export_partitioned_to_csv).
     
     Args:
         table: Table name to query
@@ -389,10 +858,40 @@ def fetch_and_export_to_csv(table: str = DEFAULT_TABLE,
         output_file: Path to output file. If None, a default path is generated
         dry_run: If True, don't actually write to file
         fallback_days: Number of days to use for fallback query if no results
+        batch_size: Rows fetched and written per batch (cursor engine)
+        engine: Export engine, one of EXPORT_ENGINES
+        parallelism: Number of date partitions exported concurrently
         
     Returns:
         Path to the output CSV file
     """
+    if engine not in EXPORT_ENGINES:
+        raise ValueError(f"Unknown export engine: {engine} (expected one of {', '.join(EXPORT_ENGINES)})")
+    
+    if not dry_run and PSYCOPG2_AVAILABLE:
+        output_file = output_file or generate_output_filename(table, start_date, end_date)
+        if parallelism > 1 and start_date and end_date:
+            rows = export_partitioned_to_csv(table, start_date, end_date, output_file, date_column,
+                                             parallelism=parallelism, engine=engine, batch_size=batch_size)
+            if not rows and fallback_days > 0:
+                logger.warning(f"No results found for date range {start_date} to {end_date}. Falling back to last {fallback_days} days")
+                rows = export_query_to_csv(build_last_n_days_query(table, fallback_days, date_column),
+                                           output_file, engine, batch_size)
+        elif engine == "copy":
+            rows = copy_export_to_csv(table, output_file, start_date, end_date, date_column,
+                                      fallback_days=fallback_days)
+        else:
+            rows = write_batches_to_csv(
+                iter_record_batches(table, start_date, end_date, date_column,
+                                    fallback_days=fallback_days, batch_size=batch_size),
+                output_file
+            )
+        if not rows:
+            logger.warning("Both primary and fallback queries returned no results")
+            raise ValueError("Both primary and fallback queries returned no results")
+        logger.info(f"Exported {rows} rows to {output_file}")
+        return output_file
+    
     # Fetch data with fallback for empty results
     results = fetch_to_dataframe(table, start_date, end_date, date_column, dry_run=dry_run, fallback_days=fallback_days)
     
@@ -429,11 +928,24 @@ def main(argv=None):
     parser.add_argument("--date-column", default=DEFAULT_DATE_COLUMN, 
                         help=f"Date column for filtering (default: {DEFAULT_DATE_COLUMN})")
     parser.add_argument("--limit", type=int, help="Limit the number of rows returned")
-    parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--output", help="Output file path (--incremental refuses to overwrite an existing file)")
     parser.add_argument("--dry-run", action="store_true", help="Print sample rows without writing to file")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     parser.add_argument("--fallback-days", type=int, default=30, 
                         help="Number of days to use for fallback query if no results (default: 30)")
+    parser.add_argument("--engine", choices=EXPORT_ENGINES, default=DEFAULT_EXPORT_ENGINE,
+                        help="Export engine; 'copy' streams CSV straight from Postgres with COPY "
+                             f"(default: {DEFAULT_EXPORT_ENGINE})")
+    parser.add_argument("--parallelism", type=int, default=DEFAULT_PARALLELISM,
+                        help="Split --start..--end into this many date partitions extracted concurrently "
+                             f"(default: {DEFAULT_PARALLELISM}; keep PG_POOL_MAX_SIZE at least as large)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only export rows after the cursor saved by the previous run (keyset pagination)")
+    parser.add_argument("--key-column", default=DEFAULT_KEY_COLUMN,
+                        help=f"Unique key that breaks date ties in --incremental mode (default: {DEFAULT_KEY_COLUMN})")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Rows per page in --incremental mode (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--state-file", help=f"Cursor state file for --incremental (default: {DEFAULT_STATE_FILE})")
     
     args = parser.parse_args(argv)
     
@@ -442,6 +954,31 @@ def main(argv=None):
     logging.basicConfig(level=log_level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     
     try:
+        if args.incremental and not args.dry_run:
+            state = ETLStateStore(args.state_file or DEFAULT_STATE_FILE)
+            output_file = args.output or generate_incremental_filename(args.table)
+            # Each page is on disk before its cursor is saved, and an existing
+            # file (a previous run's rows) is never overwritten
+            rows = write_batches_to_csv(
+                iter_incremental_pages(args.table, state, args.date_column, args.key_column,
+                                       start_date=args.start, page_size=args.page_size),
+                output_file, durable=True, mode="x"
+            )
+            if not rows:
+                print(f"No new rows in {args.table} since the last run")
+                return 0
+            print(f"Exported {rows} new rows to {output_file}")
+            return 0
+        
+        if (args.engine == "copy" or args.parallelism > 1) and not args.dry_run:
+            # Stream straight to the file instead of loading every row
+            output_file = fetch_and_export_to_csv(
+                args.table, args.start, args.end, args.date_column, args.output,
+                fallback_days=args.fallback_days, engine=args.engine, parallelism=args.parallelism
+            )
+            print(f"Exported {args.table} to {output_file}")
+            return 0
+        
         # Fetch data with fallback for empty results
         results = fetch_to_dataframe(
             args.table, 
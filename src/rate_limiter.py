@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import threading
+import time
+from collections import deque
+from typing import Dict, Tuple
+
+# Klaviyo publishes rate limits per endpoint as (burst per second, steady per minute) tiers.
+# See https://developers.klaviyo.com/en/docs/rate_limits_and_error_handling
+KLAVIYO_RATE_LIMIT_TIERS: Dict[str, Tuple[int, int]] = {
+    "XS": (1, 15),
+    "S": (3, 60),
+    "M": (10, 150),
+    "L": (75, 700),
+    "XL": (350, 3500),
+}
+
+# Campaign endpoints are in the M tier
+DEFAULT_KLAVIYO_TIER = "M"
+
+
+class SlidingWindow:
+    """Thread-safe limit of `capacity` acquisitions in any `window` seconds.
+
+    Never lets more than `capacity` requests through in a window, including
+    the first one, so a burst at start-up can't exceed the limit.
+    """
+
+    def __init__(self, capacity: int, window: float):
+        if capacity <= 0 or window <= 0:
+            raise ValueError("capacity and window must be positive")
+        self.capacity = int(capacity)
+        self.window = float(window)
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a slot if one is free.
+
+        Returns:
+            0 if the slot was taken, otherwise the number of seconds until the
+            oldest slot leaves the window
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._times and self._times[0] <= now - self.window:
+                self._times.popleft()
+            if len(self._times) < self.capacity:
+                self._times.append(now)
+                return 0.0
+            return self._times[0] + self.window - now
+
+    def release(self) -> None:
+        """Return the most recently taken slot unused."""
+        with self._lock:
+            if self._times:
+                self._times.pop()
+
+    def acquire(self) -> None:
+        """Block until a slot is free and take it."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Rate limiter enforcing a per-second and a per-minute limit together.
+
+    Both limits are sliding windows, so neither is ever exceeded, even right
+    after start-up.
+
+    `pause()` holds every caller until a deadline, for server-side signals
+    such as a 429 Retry-After that the windows can't predict.
+    """
+
+    def __init__(self, burst_per_second: int, steady_per_minute: int):
+        self.burst = SlidingWindow(burst_per_second, 1.0)
+        self.steady = SlidingWindow(steady_per_minute, 60.0)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out slots for `seconds` (extends, never shortens, a pause)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def try_acquire(self) -> float:
+        """Take one request slot from both windows if both have room.
+
+        Returns:
+            0 if the slot was taken, otherwise the number of seconds to wait
+        """
+        with self._lock:
+            paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        wait = self.burst.try_acquire()
+        if wait > 0:
+            return wait
+        wait = self.steady.try_acquire()
+        if wait > 0:
+            # Give the burst slot back so the two windows stay consistent
+            self.burst.release()
+            return wait
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block until a request slot is available."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+def klaviyo_rate_limiter(tier: str = DEFAULT_KLAVIYO_TIER) -> RateLimiter:
+    """Create a rate limiter for a Klaviyo endpoint rate limit tier."""
+    try:
+        burst, steady = KLAVIYO_RATE_LIMIT_TIERS[tier.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown Klaviyo rate limit tier: {tier}. Must be one of {list(KLAVIYO_RATE_LIMIT_TIERS.keys())}")
+    return RateLimiter(burst, steady)
@@ -3,11 +3,28 @@ import os
 import sys
 import json
 import csv
+import functools
+import glob
+import gzip
+import hashlib
 import argparse
+import shutil
+import tempfile
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 import requests
 
+try:
+    from .rate_limiter import RateLimiter
+    from .utils.date_ranges import split_date_range
+    from .lookml_field_mapper import FIELD_MAP, source_fields
+except ImportError:
+    from rate_limiter import RateLimiter
+    from utils.date_ranges import split_date_range
+    from lookml_field_mapper import FIELD_MAP, source_fields
+
 # Constants
 SUPERMETRICS_API_ENDPOINT = "https://api.supermetrics.com/enterprise/v2/query/data/json"
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
@@ -16,6 +33,35 @@ REPORT_TYPE_MAP = {
     "events": "event"       # Updated to match actual Fivetran table name
 }
 
+# Field projection: request only the columns downstream uses instead of "*".
+# Set SUPERMETRICS_ALL_FIELDS=true (or pass --all-fields) to request everything;
+# PROJECT_FIELDS is only the default, callers pass all_fields to override it.
+ALL_FIELDS = ["*"]
+PROJECT_FIELDS = os.getenv("SUPERMETRICS_ALL_FIELDS", "false").lower() != "true"
+LOOKER_EXTRACT_CONFIG = os.path.join(os.path.dirname(DATA_DIR), "config", "looker_extract_klaviyo.json")
+
+# Fields each report needs besides those derived from FIELD_MAP and the Looker extract
+REPORT_BASE_FIELDS = {
+    "campaign": ["campaign_id", "delivered", "opened", "clicked"],
+    "events": ["event_id", "campaign_id", "event_name", "event_time", "email", "device"]
+}
+
+# Query budget shared by every Supermetrics call in the process
+QUERIES_PER_MINUTE = int(os.getenv("SUPERMETRICS_QUERIES_PER_MINUTE", "10"))
+MAX_RETRIES = 5
+MAX_BACKOFF = 60
+MAX_PAGES_PER_SHARD = 100  # Safety limit
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Field identifying a record, used to drop duplicates returned by adjacent shards;
+# reports without one are not deduplicated, since identical rows can be legitimate
+RECORD_KEYS = {
+    "events": "event_id"
+}
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
 # Configuration
 def get_api_key(dry_run=False):
     api_key = os.getenv("SUPERMETRICS_API_KEY")
@@ -23,8 +69,54 @@ def get_api_key(dry_run=False):
         raise ValueError("SUPERMETRICS_API_KEY environment variable not set")
     return api_key or "dummy_key_for_dry_run"
 
+@functools.lru_cache(maxsize=None)
+def _looker_extract_fields(config_file=LOOKER_EXTRACT_CONFIG):
+    try:
+        with open(config_file) as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: could not read Looker extract config {config_file}: {e}")
+        return ()
+    return tuple(field["name"] for field in config.get("extractConfig", {}).get("extract", {}).get("fields", []))
+
+def report_fields(report_type, all_fields=None):
+    """Return the fields to request for a report type
+    
+    Campaign reports request the raw fields FIELD_MAP normalizes plus the
+    source fields of every Looker extract field (mapped back through
+    lookml_field_mapper); events request their base fields. Returns
+    ALL_FIELDS when `all_fields` is set (default: not PROJECT_FIELDS).
+    """
+    if all_fields is None:
+        all_fields = not PROJECT_FIELDS
+    if all_fields:
+        return list(ALL_FIELDS)
+    fields = list(REPORT_BASE_FIELDS.get(report_type, []))
+    if report_type == "campaign":
+        fields += list(FIELD_MAP.keys()) + source_fields(_looker_extract_fields())
+    if not fields:
+        return list(ALL_FIELDS)
+    return list(dict.fromkeys(fields))
+
 # API Functions
-def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False):
+def get_scheduler():
+    """Return the process-wide Supermetrics request scheduler
+    
+    Every request takes a slot from it, so concurrent shards and reports share
+    one queries-per-minute budget, and a 429 Retry-After pauses all of them.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimiter(max(1, QUERIES_PER_MINUTE // 60), QUERIES_PER_MINUTE)
+    return _scheduler
+
+class SupermetricsFetchError(RuntimeError):
+    """Raised when a page could not be fetched after all retries"""
+
+def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False, scheduler=None,
+               raise_on_failure=False, fields=None):
     api_key = get_api_key(dry_run)
     ds_id = REPORT_TYPE_MAP.get(report_type)
     if not ds_id:
@@ -39,7 +131,7 @@ def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False
         "ds_id": ds_id,
         "start_date": start_date,
         "end_date": end_date,
-        "fields": ["*"]  # Request all available fields
+        "fields": fields or report_fields(report_type)
     }
     
     if page_token:
@@ -97,11 +189,12 @@ def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False
         next_token = "mock_page_2" if not page_token else None
         return mock_data, next_token
     
-    max_retries = 5
+    scheduler = scheduler or get_scheduler()
     retry_count = 0
     backoff_time = 1
     
-    while retry_count < max_retries:
+    while retry_count < MAX_RETRIES:
+        scheduler.acquire()
         try:
             response = requests.post(
                 SUPERMETRICS_API_ENDPOINT,
@@ -110,13 +203,13 @@ def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False
                 timeout=30
             )
             
-            # Handle rate limiting
+            # Handle rate limiting: hold every caller, not just this one
             if response.status_code == 429:
                 retry_after = int(response.headers.get("Retry-After", backoff_time))
-                print(f"Rate limited. Retrying after {retry_after} seconds...")
-                time.sleep(retry_after)
+                print(f"Rate limited. Pausing all requests for {retry_after} seconds...")
+                scheduler.pause(retry_after)
                 retry_count += 1
-                backoff_time = min(backoff_time * 2, 60)  # Exponential backoff, max 60 seconds
+                backoff_time = min(backoff_time * 2, MAX_BACKOFF)  # Exponential backoff
                 continue
             
             # Handle server errors
@@ -124,7 +217,7 @@ def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False
                 print(f"Server error (HTTP {response.status_code}). Retrying after {backoff_time} seconds...")
                 time.sleep(backoff_time)
                 retry_count += 1
-                backoff_time = min(backoff_time * 2, 60)  # Exponential backoff, max 60 seconds
+                backoff_time = min(backoff_time * 2, MAX_BACKOFF)  # Exponential backoff
                 continue
             
             # Raise for other HTTP errors
@@ -136,44 +229,397 @@ def fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False
         except requests.exceptions.RequestException as e:
             print(f"Error fetching data: {e}")
             retry_count += 1
-            if retry_count < max_retries:
+            if retry_count < MAX_RETRIES:
                 print(f"Retrying in {backoff_time} seconds...")
                 time.sleep(backoff_time)
-                backoff_time = min(backoff_time * 2, 60)  # Exponential backoff, max 60 seconds
+                backoff_time = min(backoff_time * 2, MAX_BACKOFF)  # Exponential backoff
             else:
-                print(f"Max retries ({max_retries}) reached. Giving up.")
-                return [], None
+                print(f"Max retries ({MAX_RETRIES}) reached. Giving up.")
+                break
     
+    if raise_on_failure:
+        raise SupermetricsFetchError(
+            f"Failed to fetch {report_type} data for {start_date}..{end_date} after {MAX_RETRIES} attempts")
     return [], None
 
-def fetch_all_data(start_date, end_date, report_type, dry_run=False):
-    all_data = []
-    page_token = None
-    page_count = 0
-    max_pages = 100  # Safety limit
+def iter_shard_pages(start_date, end_date, report_type, dry_run=False, scheduler=None, page_token=None,
+                     raise_on_failure=False, fields=None):
+    """Yield (page, next_page_token) for one date window as pages arrive
     
-    print(f"Fetching {report_type} data from {start_date} to {end_date}...")
+    Starts from `page_token` when resuming a partially fetched window.
+    """
+    page_count = 0
+    row_count = 0
     
-    while page_count < max_pages:
-        data, next_page_token = fetch_data(start_date, end_date, report_type, page_token, dry_run)
-        all_data.extend(data)
+    while page_count < MAX_PAGES_PER_SHARD:
+        data, next_page_token = fetch_data(start_date, end_date, report_type, page_token, dry_run, scheduler,
+                                           raise_on_failure, fields=fields)
         page_token = next_page_token
         page_count += 1
+        row_count += len(data)
         
-        print(f"Fetched page {page_count} with {len(data)} records. Total records: {len(all_data)}")
+        print(f"[{start_date}..{end_date}] Fetched page {page_count} with {len(data)} records. "
+              f"Shard total: {row_count}")
+        yield data, next_page_token
         
         if not page_token:
             break
-        
-        # Respect rate limits
-        time.sleep(6)  # ~10 queries per minute
     
-    if page_count >= max_pages:
-        print(f"Warning: Reached maximum page limit ({max_pages}). Data may be incomplete.")
+    if page_count >= MAX_PAGES_PER_SHARD:
+        print(f"Warning: Reached maximum page limit ({MAX_PAGES_PER_SHARD}) for {start_date}..{end_date}. "
+              f"Data may be incomplete.")
+
+def fetch_shard(start_date, end_date, report_type, dry_run=False, scheduler=None, fields=None):
+    """Fetch every page of one date window"""
+    shard_data = []
+    for page, _ in iter_shard_pages(start_date, end_date, report_type, dry_run, scheduler, fields=fields):
+        shard_data.extend(page)
+    return shard_data
+
+def _record_key(record, report_type):
+    """Return the record's natural key, or None if the report has none"""
+    key_field = RECORD_KEYS.get(report_type)
+    if key_field:
+        return record.get(key_field)
+    return None
+
+def merge_shards(shard_results, report_type):
+    """Concatenate shard results in order, dropping shard-edge duplicates
+    
+    A record is dropped when its natural key was already seen in the same or
+    the previous shard, so only two shards' keys are held at a time.
+    """
+    merged = []
+    previous = set()
+    for shard_data in shard_results:
+        current = set()
+        for record in shard_data:
+            key = _record_key(record, report_type)
+            if key is not None:
+                if key in previous or key in current:
+                    continue
+                current.add(key)
+            merged.append(record)
+        previous = current
+    return merged
+
+def fetch_all_data(start_date, end_date, report_type, dry_run=False, shard_days=None,
+                   max_concurrency=DEFAULT_MAX_CONCURRENCY, scheduler=None, fields=None):
+    """Fetch a date range, optionally split into shards fetched concurrently
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        report_type: Report type (campaign or events)
+        dry_run: If True, return mock data without API calls
+        shard_days: Days per shard (default: the whole range as one query)
+        max_concurrency: Maximum shards fetched at once
+        scheduler: RateLimiter shared by all requests (default: get_scheduler())
+        fields: Fields to request (default: report_fields(report_type))
+    
+    Returns:
+        List of records in shard (date) order with shard-edge duplicates removed
+    """
+    shards = split_date_range(start_date, end_date, shard_days) if shard_days else [(start_date, end_date)]
     
+    print(f"Fetching {report_type} data from {start_date} to {end_date} "
+          f"in {len(shards)} shard(s) with concurrency {max_concurrency}...")
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(shards)))) as executor:
+        shard_results = list(executor.map(
+            lambda shard: fetch_shard(shard[0], shard[1], report_type, dry_run, scheduler, fields), shards))
+    
+    all_data = merge_shards(shard_results, report_type)
+    print(f"Fetched {len(all_data)} records "
+          f"({sum(len(r) for r in shard_results) - len(all_data)} duplicates removed)")
     return all_data
 
+def stream_all_data(start_date, end_date, report_type, dry_run=False, shard_days=None,
+                    max_concurrency=DEFAULT_MAX_CONCURRENCY, scheduler=None, compress=False, output_file=None,
+                    resume=False, fields=None):
+    """Fetch a date range straight into an NDJSON file without holding it in memory
+    
+    Takes the same fetch options as fetch_all_data. Each shard streams its
+    pages to a part file in `<output>.parts/` as they arrive, and a checkpoint
+    with the shard's next page token and bytes written is saved after every
+    page. Once every shard is complete, the parts are concatenated in shard
+    order (dropping shard-edge duplicates) and the parts and checkpoint are
+    removed.
+    
+    Args:
+        compress: Gzip the output
+        output_file: Output path (default: DATA_DIR/supermetrics_raw_<type>_<date>.ndjson[.gz])
+        resume: Continue the interrupted run for the same report type, dates
+            and sharding from its checkpoint instead of starting over
+    
+    Returns:
+        Path of the NDJSON file; its manifest is written next to it
+    
+    Raises:
+        SupermetricsFetchError: If a page fails after all retries; completed
+            pages stay checkpointed for `resume`
+    """
+    shards = split_date_range(start_date, end_date, shard_days) if shard_days else [(start_date, end_date)]
+    run = {"report_type": report_type, "start_date": start_date, "end_date": end_date,
+           "shard_days": shard_days, "compress": compress}
+    
+    if resume and not output_file:
+        output_file = find_checkpointed_output(run)
+    output_file = output_file or default_ndjson_path(report_type, compress)
+    
+    if dry_run:
+        data = fetch_all_data(start_date, end_date, report_type, dry_run, shard_days, max_concurrency, scheduler,
+                              fields)
+        print(f"[DRY RUN] Would stream {len(data)} records to {output_file}")
+        return output_file
+    
+    checkpoint = BackfillCheckpoint(checkpoint_path_for(output_file), run, output_file)
+    parts_dir = f"{output_file}.parts"
+    if resume and checkpoint.load():
+        print(f"Resuming {report_type} backfill from {checkpoint.path}")
+    else:
+        if resume:
+            print(f"No checkpoint for this run at {checkpoint.path}; starting from the first page")
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir, exist_ok=True)
+    checkpoint.save()
+    
+    print(f"Streaming {report_type} data from {start_date} to {end_date} "
+          f"in {len(shards)} shard(s) to {output_file}...")
+    
+    def fetch_part(indexed_shard):
+        index, (shard_start, shard_end) = indexed_shard
+        shard_key = f"{shard_start}..{shard_end}"
+        part_path = os.path.join(parts_dir, f"{index:05d}.ndjson")
+        state = checkpoint.shard(shard_key)
+        if state.get("done"):
+            return part_path
+        
+        with open(part_path, "ab") as part:
+            # Drop anything written after the last checkpointed page
+            part.truncate(state.get("bytes", 0))
+            rows = state.get("rows", 0)
+            for page, next_page_token in iter_shard_pages(shard_start, shard_end, report_type, dry_run, scheduler,
+                                                          page_token=state.get("page_token"),
+                                                          raise_on_failure=True, fields=fields):
+                part.write("".join(_ndjson_line(record) for record in page).encode("utf-8"))
+                part.flush()
+                rows += len(page)
+                checkpoint.update(shard_key, page_token=next_page_token, rows=rows, bytes=part.tell(),
+                                  done=not next_page_token)
+        return part_path
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(shards)))) as executor:
+        part_paths = list(executor.map(fetch_part, enumerate(shards)))
+    
+    writer = NDJSONWriter(output_file, compress, key_func=lambda record: _record_key(record, report_type))
+    try:
+        for part_path in part_paths:
+            writer.next_window()
+            writer.write_records(read_ndjson(part_path))
+    finally:
+        writer.close(report_type=report_type, start_date=start_date, end_date=end_date)
+    
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    checkpoint.remove()
+    print(f"Streamed {writer.rows} records to {output_file} ({writer.duplicates} duplicates removed)")
+    return output_file
+
+# Checkpoint Functions
+def checkpoint_path_for(ndjson_file):
+    """Return the checkpoint path for an NDJSON output file"""
+    return f"{ndjson_file}.checkpoint.json"
+
+def find_checkpointed_output(run, data_dir=None):
+    """Return the output file of an interrupted run with the same parameters, if any"""
+    pattern = os.path.join(data_dir or DATA_DIR, f"supermetrics_raw_{run['report_type']}_*.checkpoint.json")
+    for path in sorted(glob.glob(pattern), reverse=True):
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            continue
+        if saved.get("run") == run:
+            return saved.get("output_file")
+    return None
+
+class BackfillCheckpoint:
+    """Per-shard progress of a streamed backfill, saved atomically after every page
+    
+    Shaped as::
+    
+        {"version": 1, "run": {report_type, start_date, end_date, shard_days, compress},
+         "output_file": "...",
+         "shards": {"<start>..<end>": {"page_token": ..., "rows": n, "bytes": n, "done": bool}}}
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path, run, output_file):
+        self.path = path
+        self.run = run
+        self.output_file = output_file
+        self.shards = {}
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Load saved progress; returns False if there is none for this run"""
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+        if saved.get("version") != self.VERSION or saved.get("run") != self.run:
+            print(f"Warning: checkpoint {self.path} belongs to a different run; ignoring it")
+            return False
+        self.shards = saved.get("shards", {})
+        return True
+    
+    def shard(self, shard_key):
+        """Return the saved progress for a shard (empty if it hasn't started)"""
+        with self._lock:
+            return dict(self.shards.get(shard_key, {}))
+    
+    def update(self, shard_key, **progress):
+        """Record a shard's progress and save the checkpoint"""
+        with self._lock:
+            self.shards[shard_key] = progress
+            self._save()
+    
+    def save(self):
+        """Atomically write the checkpoint"""
+        with self._lock:
+            self._save()
+    
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.VERSION, "run": self.run, "output_file": self.output_file,
+                           "shards": self.shards}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def remove(self):
+        """Delete the checkpoint once the run has completed"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 # Output Functions
+def _ndjson_line(record):
+    return json.dumps(record, separators=(",", ":"), default=str) + "\n"
+
+def _is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+def manifest_path_for(ndjson_file):
+    """Return the side manifest path for an NDJSON file"""
+    return f"{ndjson_file}.manifest.json"
+
+def default_ndjson_path(report_type, compress=False):
+    """Return the default NDJSON output path for a report type"""
+    timestamp = date.today().strftime("%Y%m%d")
+    suffix = ".ndjson.gz" if compress else ".ndjson"
+    return os.path.join(DATA_DIR, f"supermetrics_raw_{report_type}_{timestamp}{suffix}")
+
+class NDJSONWriter:
+    """Thread-safe writer appending records to a compact NDJSON file
+    
+    The union of record fields and the row count are tracked as records are
+    written and saved to a side manifest on close, so a CSV can be produced
+    later in one pass. Records whose `key_func` key was already written in
+    the current or previous window (see `next_window`) are skipped; only a
+    digest of each key in those two windows is kept in memory. Records with a
+    None key are always written.
+    """
+    
+    def __init__(self, path, compress=False, key_func=None):
+        self.path = path
+        self.compress = compress
+        self.fields = set()
+        self.rows = 0
+        self.duplicates = 0
+        self._key_func = key_func
+        self._previous = set()
+        self._current = set()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8") if compress else open(path, "w", encoding="utf-8")
+    
+    def write_records(self, records):
+        """Append records, returning how many were written"""
+        written = 0
+        with self._lock:
+            for record in records:
+                key = self._key_func(record) if self._key_func else None
+                if key is not None:
+                    digest = hashlib.sha1(str(key).encode("utf-8")).digest()
+                    if digest in self._previous or digest in self._current:
+                        self.duplicates += 1
+                        continue
+                    self._current.add(digest)
+                self._file.write(_ndjson_line(record))
+                self.fields.update(record.keys())
+                self.rows += 1
+                written += 1
+        return written
+    
+    def next_window(self):
+        """Start a new dedup window (e.g. the next shard), forgetting keys older than the last one"""
+        with self._lock:
+            self._previous, self._current = self._current, set()
+    
+    def close(self, **metadata):
+        """Close the file and write the manifest, returning it"""
+        with self._lock:
+            self._file.close()
+            manifest = {
+                "file": os.path.basename(self.path),
+                "compression": "gzip" if self.compress else None,
+                "rows": self.rows,
+                "fields": sorted(self.fields),
+                "created_at": datetime.now().isoformat(),
+                **metadata
+            }
+            with open(manifest_path_for(self.path), "w") as f:
+                json.dump(manifest, f, indent=2)
+        return manifest
+
+def read_ndjson(path):
+    """Yield records from a plain or gzipped NDJSON file"""
+    opener = gzip.open if _is_gzip(path) else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def ndjson_to_csv(ndjson_file, csv_file=None):
+    """Convert an NDJSON file to CSV in one pass using its manifest's field list
+    
+    Returns:
+        Path of the CSV file
+    """
+    with open(manifest_path_for(ndjson_file)) as f:
+        fieldnames = json.load(f)["fields"]
+    
+    if not csv_file:
+        base = ndjson_file[:-3] if ndjson_file.endswith(".gz") else ndjson_file
+        csv_file = os.path.splitext(base)[0] + ".csv"
+    
+    with open(csv_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(read_ndjson(ndjson_file))
+    print(f"Data written to {csv_file}")
+    return csv_file
+
 def write_to_json(data, report_type, dry_run=False):
     if not data:
         print("No data to write to JSON")
@@ -229,17 +675,100 @@ def write_to_csv(data, json_file, dry_run=False):
         print(f"Error writing to CSV: {e}")
         return None
 
+# Pull Functions
+def pull_report(start_date, end_date, report_type, dry_run=False, csv_output=False, shard_days=None,
+                max_concurrency=DEFAULT_MAX_CONCURRENCY, ndjson=False, compress=False, resume=False,
+                all_fields=None):
+    """Fetch one report and write it to its own output file(s)
+    
+    `all_fields` requests every field instead of the projection (default:
+    not PROJECT_FIELDS).
+    
+    Returns:
+        Path of the JSON/NDJSON output, or None if nothing was written
+    """
+    fields = report_fields(report_type, all_fields)
+    if ndjson:
+        try:
+            ndjson_file = stream_all_data(start_date, end_date, report_type, dry_run,
+                                          shard_days=shard_days, max_concurrency=max_concurrency,
+                                          compress=compress, resume=resume, fields=fields)
+        except SupermetricsFetchError as e:
+            print(f"Error: {e}. Progress is checkpointed; rerun with --resume to continue.")
+            return None
+        if csv_output:
+            if dry_run:
+                print(f"[DRY RUN] Would convert {ndjson_file} to CSV")
+            else:
+                ndjson_to_csv(ndjson_file)
+        return ndjson_file
+    
+    data = fetch_all_data(start_date, end_date, report_type, dry_run,
+                          shard_days=shard_days, max_concurrency=max_concurrency, fields=fields)
+    
+    if not data:
+        print(f"No {report_type} data fetched.")
+        return None
+    
+    json_file = write_to_json(data, report_type, dry_run)
+    
+    if csv_output and json_file:
+        write_to_csv(data, json_file, dry_run)
+    
+    return json_file
+
+def pull_reports(start_date, end_date, report_types, **options):
+    """Pull several report types concurrently under the shared query budget
+    
+    Each report runs in its own thread with its own shard pool, so a small
+    report (campaign) is never queued behind the shards of a large one
+    (events); they only share the process-wide scheduler.
+    
+    Args:
+        report_types: Report types to pull
+        **options: Passed through to pull_report
+    
+    Returns:
+        Dict mapping report type to its output path (None on failure)
+    """
+    report_types = list(dict.fromkeys(report_types))
+    with ThreadPoolExecutor(max_workers=len(report_types)) as executor:
+        futures = {report_type: executor.submit(pull_report, start_date, end_date, report_type, **options)
+                   for report_type in report_types}
+        return {report_type: future.result() for report_type, future in futures.items()}
+
 # Main Function
 def main():
     parser = argparse.ArgumentParser(description="Fetch Klaviyo data via Supermetrics API")
     parser.add_argument("--start-date", required=True, help="Start date in YYYY-MM-DD format")
     parser.add_argument("--end-date", required=True, help="End date in YYYY-MM-DD format")
-    parser.add_argument("--report-type", required=True, choices=["campaign", "events"], 
-                        help="Type of report to fetch (campaign or events)")
+    parser.add_argument("--report-type", required=True, nargs="+", choices=list(REPORT_TYPE_MAP.keys()),
+                        help="Report type(s) to fetch; several are pulled concurrently, each to its own file")
     parser.add_argument("--dry-run", action="store_true", help="Perform a dry run without making actual API calls")
     parser.add_argument("--csv", action="store_true", help="Also output data as CSV")
+    parser.add_argument("--shard-days", type=int,
+                        help="Split the date range into shards of this many days (e.g. 7 or 30)")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f"Maximum shards fetched at once per report (default: {DEFAULT_MAX_CONCURRENCY})")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream pages to an NDJSON file instead of collecting them in memory")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the NDJSON output (requires --ndjson)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted --ndjson run from its last checkpointed page")
+    parser.add_argument("--all-fields", action="store_true",
+                        help='Request every field ("*") instead of the projected field list')
     args = parser.parse_args()
     
+    if args.gzip and not args.ndjson:
+        parser.error("--gzip requires --ndjson")
+    if args.resume and not args.ndjson:
+        parser.error("--resume requires --ndjson")
+    
+    if args.shard_days is not None and args.shard_days < 1:
+        parser.error("--shard-days must be at least 1")
+    if args.max_concurrency < 1:
+        parser.error("--max-concurrency must be at least 1")
+    
     # Validate dates
     try:
         datetime.strptime(args.start_date, "%Y-%m-%d")
@@ -248,20 +777,16 @@ def main():
         print("Error: Dates must be in YYYY-MM-DD format")
         return 1
     
-    # Fetch data
-    data = fetch_all_data(args.start_date, args.end_date, args.report_type, args.dry_run)
+    outputs = pull_reports(args.start_date, args.end_date, args.report_type, dry_run=args.dry_run,
+                           csv_output=args.csv, shard_days=args.shard_days,
+                           max_concurrency=args.max_concurrency, ndjson=args.ndjson,
+                           compress=args.gzip, resume=args.resume, all_fields=args.all_fields or None)
     
-    if not data:
-        print("No data fetched. Exiting.")
+    failed = [report_type for report_type, output_file in outputs.items() if not output_file]
+    if failed:
+        print(f"No data written for: {', '.join(failed)}. Exiting.")
         return 1
     
-    # Write to JSON
-    json_file = write_to_json(data, args.report_type, args.dry_run)
-    
-    # Write to CSV if requested
-    if args.csv and json_file:
-        write_to_csv(data, json_file, args.dry_run)
-    
     return 0
 
 if __name__ == "__main__":
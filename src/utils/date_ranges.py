@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+from datetime import date, timedelta
+from typing import List, Tuple
+
+
+def split_date_range(start_date: str, end_date: str, shard_days: int) -> List[Tuple[str, str]]:
+    """Split an inclusive YYYY-MM-DD range into consecutive shards
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range (inclusive)
+        shard_days: Maximum number of days per shard
+
+    Returns:
+        List of (start, end) ISO date pairs in chronological order that cover
+        the range exactly once; the last shard may be shorter
+    """
+    if shard_days < 1:
+        raise ValueError("shard_days must be at least 1")
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    shards = []
+    while start <= end:
+        shard_end = min(start + timedelta(days=shard_days - 1), end)
+        shards.append((start.isoformat(), shard_end.isoformat()))
+        start = shard_end + timedelta(days=1)
+    return shards
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.postgres_extract_export import PSYCOPG2_AVAILABLE, get_connection, fetch_and_export_to_csv
+
+ROWS = int(os.environ.get("EXPORT_BENCH_ROWS", "200000"))
+TABLE = "export_engine_bench"
+
+pytestmark = [
+    pytest.mark.perf,
+    pytest.mark.skipif(not PSYCOPG2_AVAILABLE or not os.environ.get("PG_HOST"),
+                       reason="needs psycopg2 and a Postgres database (PG_HOST, PG_DB, PG_USER, PG_PASSWORD)"),
+]
+
+
+@pytest.fixture(scope="module")
+def bench_table():
+    """Create and fill a throwaway table shaped like the Fivetran event table"""
+    conn = get_connection()
+    with conn, conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} AS
+            SELECT md5(i::text) AS event_id,
+                   'campaign_' || (i % 50) AS campaign_id,
+                   (ARRAY['send', 'open', 'click'])[1 + i % 3] AS event_type,
+                   TIMESTAMP '2023-01-01' + (i % 365) * INTERVAL '1 day' AS created_at,
+                   round((i % 1000) / 10.0, 2) AS revenue
+            FROM generate_series(1, {ROWS}) AS i
+        """)
+    yield TABLE
+    with conn, conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    conn.close()
+
+
+def time_export(engine, table, output_file):
+    start = time.perf_counter()
+    fetch_and_export_to_csv(table, "2023-01-01", "2023-12-31", output_file=output_file,
+                            fallback_days=0, engine=engine)
+    return time.perf_counter() - start
+
+
+def test_copy_engine_beats_cursor_engine(bench_table, tmp_path):
+    cursor_seconds = time_export("cursor", bench_table, str(tmp_path / "cursor.csv"))
+    copy_seconds = time_export("copy", bench_table, str(tmp_path / "copy.csv"))
+    print(f"{ROWS} rows: cursor {cursor_seconds:.2f}s, copy {copy_seconds:.2f}s "
+          f"({cursor_seconds / copy_seconds:.1f}x)")
+
+    with open(tmp_path / "cursor.csv") as f:
+        cursor_rows = sum(1 for _ in f)
+    with open(tmp_path / "copy.csv") as f:
+        copy_rows = sum(1 for _ in f)
+    assert cursor_rows == copy_rows == ROWS + 1
+    assert copy_seconds < cursor_seconds
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import importlib.util
+import pytest
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+
+SIZES = [1000, 10000, 100000]
+
+
+def make_series(n, step=1, offset=0):
+    """Build n daily rows spread over campaigns of 365 days each"""
+    start = date(2020, 1, 1)
+    return [{"campaign_id": f"c{i // 365}", "date": (start + timedelta(days=i % 365)).isoformat(), "value": i}
+            for i in range(offset, offset + n * step, step)]
+
+
+def legacy_merge(opens, clicks, revenue):
+    """The original nested-loop merge, kept as the baseline"""
+    combined = []
+    for open_item in opens:
+        row = {"date": open_item["date"], "opened": open_item["value"], "clicked": 0, "revenue": 0}
+        for click_item in clicks:
+            if click_item["date"] == open_item["date"]:
+                row["clicked"] = click_item["value"]
+                break
+        for rev_item in revenue:
+            if rev_item["date"] == open_item["date"]:
+                row["revenue"] = rev_item["value"]
+                break
+        combined.append(row)
+    return combined
+
+
+@pytest.fixture(scope="module")
+def merge_metric_series():
+    """Import fetch_metrics inside the tests: importing it loads config, which
+    exits when the Klaviyo environment variables are missing"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("ALLOW_MISSING_ENV_VARS", "true")
+        from fetch_metrics import merge_metric_series
+    return merge_metric_series
+
+
+def time_merge(func, n, repeat=3):
+    """Best of `repeat` runs, so one slow run from GC or scheduling doesn't skew the result"""
+    opens, clicks, revenue = make_series(n), make_series(n, offset=1), make_series(n, step=2)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(opens, clicks, revenue)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.perf
+def test_indexed_merge_scales_linearly(merge_metric_series):
+    """Each step up in size should cost roughly proportionally more time"""
+    timings = {n: time_merge(lambda o, c, r: merge_metric_series(o, c, r, vectorized=False), n) for n in SIZES}
+    for n, seconds in timings.items():
+        print(f"indexed merge n={n}: {seconds:.4f}s")
+
+    # Allow 3x the size ratio for sorting's log factor and timer noise; a
+    # quadratic merge would be 10x the size ratio at each step
+    for smaller, larger in zip(SIZES, SIZES[1:]):
+        assert timings[larger] / timings[smaller] < 3 * (larger / smaller)
+
+
+@pytest.mark.perf
+def test_indexed_merge_beats_legacy_loop(merge_metric_series):
+    n = 3000
+    legacy = time_merge(legacy_merge, n, repeat=1)
+    indexed = time_merge(lambda o, c, r: merge_metric_series(o, c, r, vectorized=False), n)
+    print(f"n={n}: legacy {legacy:.4f}s, indexed {indexed:.4f}s")
+
+    assert indexed < legacy
+
+
+@pytest.mark.perf
+@pytest.mark.skipif(not PANDAS_AVAILABLE, reason="pandas not installed")
+def test_vectorized_merge_matches_indexed(merge_metric_series):
+    n = SIZES[-1]
+    opens, clicks, revenue = make_series(n), make_series(n, offset=1), make_series(n, step=2)
+    # Rows without a campaign_id fall back to the campaign_id argument on both paths
+    opens.append({"date": "2020-01-01", "value": 7})
+
+    expected = merge_metric_series(opens, clicks, revenue, campaign_id="fallback", vectorized=False)
+    assert merge_metric_series(opens, clicks, revenue, campaign_id="fallback", vectorized=True) == expected
+
+
+@pytest.mark.perf
+@pytest.mark.skipif(not PANDAS_AVAILABLE, reason="pandas not installed")
+def test_vectorized_merge_timing(merge_metric_series):
+    """At the largest size the pandas path should be no slower than the dict index"""
+    for n in SIZES:
+        seconds = time_merge(lambda o, c, r: merge_metric_series(o, c, r, vectorized=True), n)
+        print(f"vectorized merge n={n}: {seconds:.4f}s")
+
+    n = SIZES[-1]
+    vectorized = time_merge(lambda o, c, r: merge_metric_series(o, c, r, vectorized=True), n)
+    indexed = time_merge(lambda o, c, r: merge_metric_series(o, c, r, vectorized=False), n)
+    # 25% headroom for timer noise between the two measurements
+    assert vectorized <= indexed * 1.25
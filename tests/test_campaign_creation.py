@@ -18,7 +18,7 @@ from create_send_campaign import (
 
 class TestCampaignCreation(unittest.TestCase):
     
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_create_campaign(self, mock_post):
         # Setup mock response
         mock_response = MagicMock()
@@ -33,7 +33,7 @@ class TestCampaignCreation(unittest.TestCase):
         self.assertEqual(result, "test-campaign-id")
         mock_post.assert_called_once()
         
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_campaign_messages(self, mock_get):
         # Setup mock response
         mock_response = MagicMock()
@@ -53,7 +53,7 @@ class TestCampaignCreation(unittest.TestCase):
         self.assertEqual(result, ["message-1", "message-2"])
         mock_get.assert_called_once()
     
-    @patch('requests.patch')
+    @patch('requests.Session.patch')
     def test_assign_template(self, mock_patch):
         # Setup mock response
         mock_response = MagicMock()
@@ -67,7 +67,7 @@ class TestCampaignCreation(unittest.TestCase):
         self.assertTrue(result)
         mock_patch.assert_called_once()
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_check_message_status(self, mock_get):
         # Setup mock response
         mock_response = MagicMock()
@@ -102,7 +102,7 @@ class TestCampaignCreation(unittest.TestCase):
         mock_check_status.assert_called_once()
         mock_sleep.assert_not_called()
     
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_send_campaign(self, mock_post):
         # Setup mock response
         mock_response = MagicMock()
@@ -17,7 +17,10 @@ unittest.mock.patch.dict('sys.modules', {
 
 from src.etl_runner import (
     extract,
+    extract_klaviyo,
+    extract_klaviyo_incremental,
     extract_fivetran,
+    extract_fivetran_tables,
     transform,
     load,
     write_to_csv,
@@ -90,18 +93,18 @@ SAMPLE_TRANSFORMED_DATA = [
 # Test extract function
 @patch("src.etl_runner.fetch_all_campaigns")
 @patch("src.etl_runner.fetch_campaign_metrics")
-@patch("src.etl_runner.time.sleep")
-def test_extract(mock_sleep, mock_fetch_metrics, mock_fetch_campaigns):
+def test_extract(mock_fetch_metrics, mock_fetch_campaigns):
     # Mock the API calls
     mock_fetch_campaigns.return_value = [
         {"id": "campaign_123", "name": "Test Campaign 1"},
         {"id": "campaign_456", "name": "Test Campaign 2"}
     ]
     
-    mock_fetch_metrics.side_effect = [
-        {"delivered": 100, "opened": 45, "clicked": 20, "revenue": 250.0},
-        {"delivered": 200, "opened": 100, "clicked": 50, "revenue": 500.0}
-    ]
+    metrics_by_campaign = {
+        "campaign_123": {"delivered": 100, "opened": 45, "clicked": 20, "revenue": 250.0},
+        "campaign_456": {"delivered": 200, "opened": 100, "clicked": 50, "revenue": 500.0}
+    }
+    mock_fetch_metrics.side_effect = lambda campaign_id, dry_run: metrics_by_campaign[campaign_id]
     
     # Call the function
     result = extract(dry_run=True)
@@ -114,7 +117,197 @@ def test_extract(mock_sleep, mock_fetch_metrics, mock_fetch_campaigns):
     assert result[1]["delivered"] == 200
     assert mock_fetch_campaigns.call_count == 1
     assert mock_fetch_metrics.call_count == 2
-    assert mock_sleep.call_count == 2
+
+# Test extract_klaviyo keeps the sequential order when metrics finish out of order
+@patch("src.etl_runner.fetch_all_campaigns")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_extract_klaviyo_preserves_order(mock_fetch_metrics, mock_fetch_campaigns):
+    import time
+    campaign_ids = [f"campaign_{i}" for i in range(20)]
+    mock_fetch_campaigns.return_value = [{"id": campaign_id} for campaign_id in campaign_ids]
+    
+    def slow_metrics(campaign_id, dry_run):
+        # Earlier campaigns finish last
+        time.sleep(0.001 * (20 - int(campaign_id.split("_")[1])))
+        return {"delivered": int(campaign_id.split("_")[1])}
+    mock_fetch_metrics.side_effect = slow_metrics
+    
+    limiter = MagicMock()
+    result = extract_klaviyo(dry_run=True, max_workers=4, limiter=limiter)
+    
+    assert [record["id"] for record in result] == campaign_ids
+    assert [record["delivered"] for record in result] == list(range(20))
+    assert limiter.acquire.call_count == 20
+
+# Test the shared HTTP pool is sized to the worker pool before metrics are fetched
+@patch("src.etl_runner.get_session")
+@patch("src.etl_runner.fetch_all_campaigns")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_extract_klaviyo_sizes_http_pool(mock_fetch_metrics, mock_fetch_campaigns, mock_get_session):
+    mock_fetch_campaigns.return_value = [{"id": "campaign_123"}]
+    mock_fetch_metrics.return_value = {"delivered": 1}
+    
+    extract_klaviyo(dry_run=False, max_workers=24, limiter=MagicMock())
+    
+    mock_get_session.assert_called_once_with(pool_size=24)
+
+# Test incremental extraction only fetches metric days after the watermark
+@patch("src.etl_runner.fetch_all_campaigns")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_extract_klaviyo_incremental(mock_fetch_metrics, mock_fetch_campaigns, tmp_path):
+    from datetime import date
+    from src.etl_state import ETLStateStore
+    
+    state = ETLStateStore(str(tmp_path / "etl_state.json"))
+    state.set_records("klaviyo", "campaigns", [
+        {"id": "campaign_123", "name": "Old Name", "delivered": 100, "opened": 45, "clicked": 20, "revenue": 250.0},
+        {"id": "campaign_old", "name": "Archived", "delivered": 10}
+    ])
+    state.set_watermark("klaviyo", "campaign_metrics", "2025-05-09", key="campaign_123")
+    state.set_watermark("klaviyo", "campaign_metrics", "2025-05-10", key="campaign_456")
+    
+    mock_fetch_campaigns.return_value = [
+        {"id": "campaign_123", "name": "Test Campaign 1"},
+        {"id": "campaign_456", "name": "Test Campaign 2"},
+        {"id": "campaign_789", "name": "Test Campaign 3"}
+    ]
+    mock_fetch_metrics.side_effect = lambda campaign_id, dry_run, start_date, end_date, raise_on_error: {
+        "delivered": 10, "opened": 5, "clicked": 1, "revenue": 10.0
+    }
+    
+    result = extract_klaviyo_incremental(state, dry_run=True, limiter=MagicMock(), today=date(2025, 5, 11))
+    
+    # campaign_456 is already up to date; the other two get only the missing days
+    windows = {call.args[0]: (call.kwargs["start_date"], call.kwargs["end_date"])
+               for call in mock_fetch_metrics.call_args_list}
+    assert windows == {
+        "campaign_123": ("2025-05-10", "2025-05-10"),
+        "campaign_789": ("2025-04-11", "2025-05-10")
+    }
+    
+    by_id = {record["id"]: record for record in result}
+    assert [record["id"] for record in result] == ["campaign_123", "campaign_456", "campaign_789", "campaign_old"]
+    assert by_id["campaign_123"]["name"] == "Test Campaign 1"
+    assert by_id["campaign_123"]["delivered"] == 110
+    assert by_id["campaign_123"]["revenue"] == 260.0
+    assert by_id["campaign_789"]["opened"] == 5
+    assert state.get_watermark("klaviyo", "campaign_metrics", "campaign_123") == "2025-05-10"
+    assert state.get_records("klaviyo", "campaigns") == result
+
+# Test rates are recomputed from the counters summed over every window
+@patch("src.etl_runner.fetch_all_campaigns")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_extract_klaviyo_incremental_recomputes_rates(mock_fetch_metrics, mock_fetch_campaigns, tmp_path):
+    from datetime import date
+    from src.etl_state import ETLStateStore
+    
+    state = ETLStateStore(str(tmp_path / "etl_state.json"))
+    mock_fetch_campaigns.return_value = [{"id": "campaign_1", "open_rate": 0.9}]
+    windows = iter([
+        {"delivered": 100, "opened": 50, "clicked": 10, "open_rate": 0.5, "click_rate": 0.1},
+        {"delivered": 300, "opened": 30, "clicked": 3, "open_rate": 0.1, "click_rate": 0.01},
+    ])
+    mock_fetch_metrics.side_effect = lambda campaign_id, dry_run, start_date, end_date, raise_on_error: next(windows)
+    
+    extract_klaviyo_incremental(state, dry_run=True, limiter=MagicMock(), today=date(2025, 5, 11))
+    [record] = extract_klaviyo_incremental(state, dry_run=True, limiter=MagicMock(), today=date(2025, 5, 12))
+    
+    assert record["delivered"] == 400
+    assert record["open_rate"] == record["opened"] / record["delivered"] == 0.2
+    assert record["click_rate"] == 13 / 400
+
+# Test a failed metric fetch leaves the campaign's watermark where it was
+@patch("src.etl_runner.fetch_all_campaigns")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_extract_klaviyo_incremental_failed_fetch_keeps_watermark(mock_fetch_metrics, mock_fetch_campaigns, tmp_path):
+    from datetime import date
+    import requests
+    from src.etl_state import ETLStateStore
+    
+    state = ETLStateStore(str(tmp_path / "etl_state.json"))
+    state.set_watermark("klaviyo", "campaign_metrics", "2025-05-08", key="campaign_bad")
+    state.set_watermark("klaviyo", "campaign_metrics", "2025-05-08", key="campaign_ok")
+    mock_fetch_campaigns.return_value = [{"id": "campaign_bad"}, {"id": "campaign_ok"}]
+    
+    def fetch(campaign_id, dry_run, start_date, end_date, raise_on_error):
+        if campaign_id == "campaign_bad":
+            raise requests.exceptions.ConnectionError("boom")
+        return {"delivered": 1}
+    mock_fetch_metrics.side_effect = fetch
+    
+    extract_klaviyo_incremental(state, dry_run=True, limiter=MagicMock(), today=date(2025, 5, 11))
+    
+    assert state.get_watermark("klaviyo", "campaign_metrics", "campaign_bad") == "2025-05-08"
+    assert state.get_watermark("klaviyo", "campaign_metrics", "campaign_ok") == "2025-05-10"
+
+# Test run_etl only saves watermarks after a successful load
+@patch("src.etl_runner.extract_klaviyo_incremental")
+@patch("src.etl_runner.transform")
+@patch("src.etl_runner.load")
+def test_run_etl_incremental_saves_state_after_load(mock_load, mock_transform, mock_incremental, tmp_path):
+    state_file = str(tmp_path / "etl_state.json")
+    mock_incremental.return_value = SAMPLE_RAW_DATA
+    mock_transform.return_value = SAMPLE_TRANSFORMED_DATA
+    
+    mock_load.return_value = False
+    assert run_etl(output_file="test.csv", incremental=True, state_file=state_file) is False
+    assert not os.path.exists(state_file)
+    
+    mock_load.return_value = True
+    assert run_etl(output_file="test.csv", incremental=True, state_file=state_file) is True
+    assert os.path.exists(state_file)
+
+# Test the streaming path writes every page and matches the batch CSV layout
+@patch("src.etl_runner.iter_campaign_pages")
+@patch("src.etl_runner.fetch_campaign_metrics")
+def test_run_etl_stream_csv(mock_fetch_metrics, mock_iter_pages, tmp_path):
+    mock_iter_pages.return_value = iter([
+        [{"id": "campaign_1", "name": "Campaign 1", "send_time": "2025-05-01T10:00:00Z"}],
+        [{"id": "campaign_2", "name": "Campaign 2", "send_time": "2025-05-08T10:00:00Z", "list_id": "list_1"}]
+    ])
+    mock_fetch_metrics.side_effect = lambda campaign_id, dry_run: {"delivered": 100}
+    output_file = str(tmp_path / "out.csv")
+    
+    assert run_etl(dry_run=True, output_file=output_file, stream=True) is True
+    
+    with open(output_file, "r") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert [row["campaign_name"] for row in rows] == ["Campaign 1", "Campaign 2"]
+    assert rows[0]["date"] == "2025-05-01"
+    assert rows[1]["delivered"] == "100"
+    # Header is the sorted union of keys across all pages
+    assert reader.fieldnames == sorted(reader.fieldnames)
+    assert "list_id" in reader.fieldnames
+
+# Test load_stream JSON output and empty input
+def test_load_stream_json(tmp_path):
+    from src.etl_runner import load_stream
+    output_file = str(tmp_path / "out.json")
+    
+    assert load_stream(iter(SAMPLE_TRANSFORMED_DATA), output_file, "json") == 2
+    with open(output_file, "r") as f:
+        assert json.load(f) == SAMPLE_TRANSFORMED_DATA
+    
+    assert load_stream(iter([]), output_file, "json") == 0
+    assert not os.path.exists(output_file)
+
+# Test a failure mid-stream keeps the previous output and leaves no partial file
+@pytest.mark.parametrize("format", ["csv", "json"])
+def test_load_stream_failure_keeps_previous_output(tmp_path, format):
+    from src.etl_runner import load_stream
+    output_file = str(tmp_path / f"out.{format}")
+    with open(output_file, "w") as f:
+        f.write("previous run")
+    
+    def failing_records():
+        yield SAMPLE_TRANSFORMED_DATA[0]
+        raise RuntimeError("source went away")
+    
+    assert load_stream(failing_records(), output_file, format) == 0
+    with open(output_file, "r") as f:
+        assert f.read() == "previous run"
+    assert os.listdir(tmp_path) == [f"out.{format}"]
 
 # Test extract_fivetran function
 @patch("src.etl_runner.run_connector")
@@ -130,13 +323,14 @@ def test_extract_fivetran(mock_fetch_to_dataframe, mock_run_connector):
     
     # Assertions
     assert result == SAMPLE_RAW_DATA
-    mock_run_connector.assert_called_once_with("test_group", "test_connector", dry_run=True)
+    mock_run_connector.assert_called_once_with("test_group", "test_connector", dry_run=True, max_staleness=None)
     mock_fetch_to_dataframe.assert_called_once_with(
         table="klaviyo_campaigns",
         start_date="2025-05-01",
         end_date="2025-05-31",
         date_column=None,
-        dry_run=True
+        dry_run=True,
+        parallelism=1
     )
 
 # Test extract_fivetran with custom parameters
@@ -155,18 +349,20 @@ def test_extract_fivetran_custom_params(mock_fetch_to_dataframe, mock_run_connec
         connector_id="custom_connector",
         table="custom_table",
         date_column="custom_date",
-        dry_run=True
+        dry_run=True,
+        parallelism=1
     )
     
     # Assertions
     assert result == SAMPLE_RAW_DATA
-    mock_run_connector.assert_called_once_with("custom_group", "custom_connector", dry_run=True)
+    mock_run_connector.assert_called_once_with("custom_group", "custom_connector", dry_run=True, max_staleness=None)
     mock_fetch_to_dataframe.assert_called_once_with(
         table="custom_table",
         start_date="2025-05-01",
         end_date="2025-05-31",
         date_column="custom_date",
-        dry_run=True
+        dry_run=True,
+        parallelism=1
     )
 
 # Test extract_fivetran with missing parameters
@@ -187,6 +383,74 @@ def test_extract_fivetran_connector_failure(mock_run_connector):
     with pytest.raises(RuntimeError, match="Fivetran sync failed"):
         extract_fivetran("2025-05-01", "2025-05-31")
 
+# Test extract_fivetran_tables starts each extraction as its connector finishes
+@patch("src.etl_runner.fetch_to_dataframe")
+@patch("src.etl_runner.run_connectors")
+def test_extract_fivetran_tables_extracts_as_connectors_finish(mock_run_connectors, mock_fetch_to_dataframe):
+    import threading
+    extracted = threading.Event()
+
+    def fake_run_connectors(group_id, connector_ids, dry_run=False, max_staleness=None, on_complete=None):
+        # The fast connector's table is extracted before the slow one finishes
+        on_complete("fast", {"connector_id": "fast", "success": True, "duration": 1.0})
+        assert extracted.wait(timeout=5)
+        on_complete("slow", {"connector_id": "slow", "success": True, "duration": 9.0})
+        return {c: {"connector_id": c, "success": True, "duration": 1.0} for c in connector_ids}
+
+    def fake_fetch(table, **kwargs):
+        extracted.set()
+        return [{"table": table}]
+
+    mock_run_connectors.side_effect = fake_run_connectors
+    mock_fetch_to_dataframe.side_effect = fake_fetch
+
+    result = extract_fivetran_tables("2025-05-01", "2025-05-31", {"fast": "campaign", "slow": "event"},
+                                     group_id="group")
+
+    assert result == {"campaign": [{"table": "campaign"}], "event": [{"table": "event"}]}
+
+# Test the CLI routes --connector-tables through the per-connector pipeline
+@patch("src.etl_runner.extract_fivetran")
+@patch("src.etl_runner.extract_fivetran_tables")
+def test_main_connector_tables_uses_per_connector_extraction(mock_tables, mock_single, tmp_path):
+    from src.etl_runner import main
+    mock_tables.return_value = {"event": [{"id": "e1"}], "campaign": [{"id": "c1"}]}
+    output_file = str(tmp_path / "out.json")
+    
+    assert main(["--source", "fivetran", "--start", "2025-05-01", "--end", "2025-05-31", "--group-id", "group",
+                 "--connector-tables", "conn_a=campaign, conn_b=event", "--format", "json",
+                 "--output", output_file]) == 0
+    
+    mock_single.assert_not_called()
+    assert mock_tables.call_args.args[2] == {"conn_a": "campaign", "conn_b": "event"}
+    with open(output_file) as f:
+        assert [record["id"] for record in json.load(f)] == ["c1", "e1"]
+
+def test_parse_connector_tables():
+    from src.etl_runner import parse_connector_tables
+    assert parse_connector_tables("a=campaign,b=event,") == {"a": "campaign", "b": "event"}
+    with pytest.raises(ValueError):
+        parse_connector_tables("a")
+
+@patch("src.etl_runner.fetch_to_dataframe")
+@patch("src.etl_runner.run_connectors")
+def test_extract_fivetran_tables_connector_failure(mock_run_connectors, mock_fetch_to_dataframe):
+    def fake_run_connectors(group_id, connector_ids, dry_run=False, max_staleness=None, on_complete=None):
+        results = {"ok": {"connector_id": "ok", "success": True, "duration": 1.0},
+                   "bad": {"connector_id": "bad", "success": False, "duration": 2.0}}
+        for connector_id, result in results.items():
+            on_complete(connector_id, result)
+        return results
+
+    mock_run_connectors.side_effect = fake_run_connectors
+    mock_fetch_to_dataframe.return_value = []
+
+    with pytest.raises(RuntimeError, match="bad"):
+        extract_fivetran_tables("2025-05-01", "2025-05-31", {"ok": "campaign", "bad": "event"}, group_id="group")
+    # Only the successful connector's table was extracted
+    assert mock_fetch_to_dataframe.call_count == 1
+    assert mock_fetch_to_dataframe.call_args.kwargs["table"] == "campaign"
+
 # Test transform function
 @patch("src.etl_runner.normalize_records")
 def test_transform(mock_normalize):
@@ -322,7 +586,8 @@ def test_run_etl_success(mock_load, mock_transform, mock_extract):
     
     # Assertions
     assert result is True
-    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True)
+    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True, use_async=False, max_staleness=None, parallelism=1,
+                                         connector_tables=None)
     mock_transform.assert_called_once_with(SAMPLE_RAW_DATA)
     mock_load.assert_called_once()
 
@@ -359,7 +624,11 @@ def test_run_etl_fivetran_success(mock_load, mock_transform, mock_extract):
         "test_connector", 
         "test_table", 
         "test_date", 
-        True
+        True,
+        use_async=False,
+        max_staleness=None,
+        parallelism=1,
+        connector_tables=None
     )
     mock_transform.assert_called_once_with(SAMPLE_RAW_DATA)
     mock_load.assert_called_once()
@@ -375,7 +644,8 @@ def test_run_etl_extract_failure(mock_extract):
     
     # Assertions
     assert result is False
-    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True)
+    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True, use_async=False, max_staleness=None, parallelism=1,
+                                         connector_tables=None)
 
 # Test run_etl function with transform failure
 @patch("src.etl_runner.extract")
@@ -390,7 +660,8 @@ def test_run_etl_transform_failure(mock_transform, mock_extract):
     
     # Assertions
     assert result is False
-    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True)
+    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True, use_async=False, max_staleness=None, parallelism=1,
+                                         connector_tables=None)
     mock_transform.assert_called_once_with(SAMPLE_RAW_DATA)
 
 # Test run_etl function with load failure
@@ -408,7 +679,8 @@ def test_run_etl_load_failure(mock_load, mock_transform, mock_extract):
     
     # Assertions
     assert result is False
-    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True)
+    mock_extract.assert_called_once_with("klaviyo", None, None, None, None, None, None, True, use_async=False, max_staleness=None, parallelism=1,
+                                         connector_tables=None)
     mock_transform.assert_called_once_with(SAMPLE_RAW_DATA)
     mock_load.assert_called_once()
 
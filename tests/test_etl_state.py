@@ -0,0 +1,51 @@
+import os
+import json
+import pytest
+
+from src.etl_state import ETLStateStore, STATE_VERSION
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state" / "etl_state.json")
+
+
+def test_watermarks_round_trip(state_path):
+    store = ETLStateStore(state_path)
+    assert store.get_watermark("klaviyo", "campaigns") is None
+    
+    store.set_watermark("klaviyo", "campaigns", "2025-05-01T00:00:00")
+    store.set_watermark("klaviyo", "campaign_metrics", "2025-04-30", key="campaign_1")
+    store.set_records("klaviyo", "campaigns", [{"id": "campaign_1"}])
+    store.save()
+    
+    reloaded = ETLStateStore(state_path)
+    assert reloaded.get_watermark("klaviyo", "campaigns") == "2025-05-01T00:00:00"
+    assert reloaded.get_watermark("klaviyo", "campaign_metrics", "campaign_1") == "2025-04-30"
+    assert reloaded.get_watermark("klaviyo", "campaign_metrics", "campaign_2") is None
+    assert reloaded.get_records("klaviyo", "campaigns") == [{"id": "campaign_1"}]
+
+
+def test_unsaved_changes_are_not_persisted(state_path):
+    store = ETLStateStore(state_path)
+    store.set_watermark("klaviyo", "campaigns", "2025-05-01")
+    assert not os.path.exists(state_path)
+    assert ETLStateStore(state_path).get_watermark("klaviyo", "campaigns") is None
+
+
+def test_save_leaves_no_temp_files(state_path):
+    store = ETLStateStore(state_path)
+    store.set_watermark("klaviyo", "campaigns", "2025-05-01")
+    store.save()
+    assert os.listdir(os.path.dirname(state_path)) == ["etl_state.json"]
+
+
+def test_corrupt_or_unknown_version_file_is_ignored(state_path):
+    os.makedirs(os.path.dirname(state_path))
+    with open(state_path, "w") as f:
+        f.write("{not json")
+    assert ETLStateStore(state_path).get_records("klaviyo", "campaigns") == []
+    
+    with open(state_path, "w") as f:
+        json.dump({"version": STATE_VERSION + 1, "watermarks": {"klaviyo": {"campaigns": {"__table__": "x"}}}}, f)
+    assert ETLStateStore(state_path).get_watermark("klaviyo", "campaigns") is None
@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 import responses
@@ -469,3 +470,187 @@ def test_get_client_from_env_missing_vars():
         with pytest.raises(ValueError) as excinfo:
             get_client_from_env()
         assert "No valid Fivetran credentials found" in str(excinfo.value)
+
+def test_adaptive_poll_intervals_back_off_to_cap():
+    from src.fivetran_api_client import adaptive_poll_intervals
+    delays = adaptive_poll_intervals(jitter=0)
+    first = [next(delays) for _ in range(12)]
+    assert first[0] == 2.0
+    assert first == sorted(first)
+    assert first[-1] == 60.0
+
+    # A connector that usually syncs in 40s is never polled less often than every 8s
+    short = adaptive_poll_intervals(expected_duration=40, jitter=0)
+    assert max(next(short) for _ in range(12)) == 8.0
+
+    for _ in range(20):
+        assert 1.6 <= next(adaptive_poll_intervals(jitter=0.2)) <= 2.4
+
+@responses.activate
+def test_wait_for_sync_completion_adaptive_polling(fivetran_client):
+    connector_id = "test_connector"
+    for state in ["syncing", "syncing", "syncing", "scheduled"]:
+        responses.add(
+            responses.GET,
+            f"https://api.fivetran.com/v1/connectors/{connector_id}",
+            json={"code": "Success", "data": {"id": connector_id, "status": {"sync_state": state}}},
+            status=200
+        )
+
+    with patch('time.sleep') as mock_sleep, patch('random.uniform', return_value=1.0):
+        result = fivetran_client.wait_for_sync_completion(connector_id)
+
+    assert result is True
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 3.0, 4.5]
+    assert connector_id in fivetran_client.sync_durations
+
+
+@responses.activate
+def test_wait_for_sync_completion_skips_duration_when_already_done(fivetran_client):
+    connector_id = "test_connector"
+    responses.add(
+        responses.GET,
+        f"https://api.fivetran.com/v1/connectors/{connector_id}",
+        json={"code": "Success", "data": {"id": connector_id, "status": {"sync_state": "scheduled"}}},
+        status=200
+    )
+
+    with patch('time.sleep'):
+        result = fivetran_client.wait_for_sync_completion(connector_id)
+
+    # Done on the first poll: the sync ran before we looked, so its duration is unknown
+    assert result is True
+    assert connector_id not in fivetran_client.sync_durations
+
+
+class FakeFivetranAPI:
+    """Local HTTP server that serves connector status like the Fivetran API"""
+
+    def __init__(self, states):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import threading
+        self.states = list(states)
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                state = fake.states[min(fake.requests, len(fake.states)) - 1]
+                body = json.dumps({"code": "Success", "data": {"status": {"sync_state": state}}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_webhook_ends_wait_before_next_poll():
+    import hmac
+    import hashlib
+    import threading
+    import time as real_time
+    import requests as real_requests
+    from src.fivetran_webhook import SyncWebhookListener
+
+    api = FakeFivetranAPI(["syncing"])
+    client = FivetranAPIClient("key", "secret", base_url=api.url)
+    body = json.dumps({"event": "sync_end", "connector_id": "conn1", "data": {"status": "SUCCESSFUL"}}).encode()
+    signature = hmac.new(b"whsec", body, hashlib.sha256).hexdigest().upper()
+
+    try:
+        with SyncWebhookListener(secret="whsec") as listener:
+            # Unsigned requests are rejected
+            assert real_requests.post(listener.url, data=body).status_code == 401
+
+            def send_webhook():
+                real_time.sleep(0.3)
+                real_requests.post(listener.url, data=body, headers={"X-Fivetran-Signature-256": signature})
+            threading.Thread(target=send_webhook).start()
+
+            started = real_time.time()
+            # A fixed 30s poll interval would normally make this wait 30s
+            result = client.wait_for_sync_completion("conn1", timeout=60, poll_interval=30, webhook=listener)
+            elapsed = real_time.time() - started
+    finally:
+        api.stop()
+
+    assert result is True
+    assert elapsed < 5
+    assert api.requests == 1
+
+def test_webhook_listener_requires_secret_off_loopback():
+    from src.fivetran_webhook import SyncWebhookListener
+
+    with pytest.raises(ValueError, match="FIVETRAN_WEBHOOK_SECRET"):
+        SyncWebhookListener("0.0.0.0", 0)
+    listener = SyncWebhookListener("0.0.0.0", 0, secret="whsec")
+    listener._server.server_close()
+    # Unsigned webhooks are still accepted on loopback
+    listener = SyncWebhookListener()
+    assert listener.url.startswith("http://127.0.0.1:")
+    listener._server.server_close()
+
+def test_sync_durations_persist_in_state(tmp_path):
+    from src.etl_state import ETLStateStore
+    path = str(tmp_path / "state.json")
+    client = FivetranAPIClient("key", "secret", state=ETLStateStore(path))
+    client._record_sync_duration("conn1", 40.0)
+
+    # A later run reads the typical duration back and keeps averaging it
+    restarted = FivetranAPIClient("key", "secret", state=ETLStateStore(path))
+    assert restarted.get_sync_duration("conn1") == 40.0
+    restarted._record_sync_duration("conn1", 50.0)
+    assert ETLStateStore(path).get_watermark("fivetran", "sync_durations", key="conn1") == "43.0"
+    assert FivetranAPIClient("key", "secret").get_sync_duration("conn1") is None
+
+@responses.activate
+def test_get_data_age(fivetran_client):
+    from datetime import datetime, timedelta, UTC
+    succeeded_at = (datetime.now(UTC) - timedelta(minutes=5)).isoformat().replace("+00:00", "Z")
+    for sync_state in ("scheduled", "syncing"):
+        responses.add(
+            responses.GET,
+            "https://api.fivetran.com/v1/connectors/conn1",
+            json={"code": "Success", "data": {"id": "conn1", "succeeded_at": succeeded_at,
+                                              "status": {"sync_state": sync_state}}},
+            status=200
+        )
+    
+    age = fivetran_client.get_data_age("conn1")
+    assert 290 <= age <= 330
+    # A sync in progress means the data isn't settled
+    assert fivetran_client.get_data_age("conn1") is None
+
+@responses.activate
+def test_get_connectors_follows_cursor_and_caches(fivetran_client):
+    from responses import matchers
+    url = "https://api.fivetran.com/v1/groups/test_group/connectors"
+    responses.add(responses.GET, url, status=200,
+                  match=[matchers.query_param_matcher({"limit": "1000"})],
+                  json={"code": "Success", "data": {"items": [{"id": "conn1"}], "next_cursor": "abc"}})
+    responses.add(responses.GET, url, status=200,
+                  match=[matchers.query_param_matcher({"limit": "1000", "cursor": "abc"})],
+                  json={"code": "Success", "data": {"items": [{"id": "conn2"}]}})
+    
+    connectors = fivetran_client.get_connectors("test_group")
+    assert [c["id"] for c in connectors] == ["conn1", "conn2"]
+    assert len(responses.calls) == 2
+    
+    # Served from the metadata cache until it expires or is bypassed
+    assert fivetran_client.get_connectors("test_group") == connectors
+    assert len(responses.calls) == 2
+    fivetran_client.get_connectors("test_group", use_cache=False)
+    assert len(responses.calls) == 4
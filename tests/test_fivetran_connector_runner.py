@@ -1,5 +1,6 @@
 import pytest
 import responses
+from datetime import datetime, timedelta, UTC
 from unittest.mock import patch, MagicMock
 
 from src.fivetran_connector_runner import run_connector
@@ -27,10 +28,10 @@ def test_run_connector_success():
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         
-        # Mock the connector list
-        mock_client.get_connectors.return_value = [
-            {"id": "test_connector", "name": "Test Connector"}
-        ]
+        # Mock the connector lookup
+        mock_client.get_connector.return_value = {
+            "id": "test_connector", "group_id": "test_group", "name": "Test Connector"
+        }
         
         # Mock the trigger_sync and wait_for_sync_completion methods
         mock_client.trigger_sync.return_value = {"code": "Success"}
@@ -43,10 +44,11 @@ def test_run_connector_success():
         assert result is True
         
         # Verify the client method calls
-        mock_client.get_connectors.assert_called_once_with("test_group")
+        mock_client.get_connector.assert_called_once_with("test_connector")
+        mock_client.get_connectors.assert_not_called()
         mock_client.trigger_sync.assert_called_once_with("test_connector")
         mock_client.wait_for_sync_completion.assert_called_once_with(
-            "test_connector", timeout=3600, poll_interval=30
+            "test_connector", timeout=3600, poll_interval=None, webhook=None
         )
 
 def test_run_connector_not_found():
@@ -56,8 +58,8 @@ def test_run_connector_not_found():
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         
-        # Mock the connector list (empty)
-        mock_client.get_connectors.return_value = []
+        # Mock a connector that belongs to another group
+        mock_client.get_connector.return_value = {"id": "test_connector", "group_id": "other_group"}
         
         # Call the function
         result = run_connector("test_group", "test_connector")
@@ -66,7 +68,8 @@ def test_run_connector_not_found():
         assert result is False
         
         # Verify the client method calls
-        mock_client.get_connectors.assert_called_once_with("test_group")
+        mock_client.get_connector.assert_called_once_with("test_connector")
+        mock_client.get_connectors.assert_not_called()
         mock_client.trigger_sync.assert_not_called()
         mock_client.wait_for_sync_completion.assert_not_called()
 
@@ -77,10 +80,10 @@ def test_run_connector_sync_failure():
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         
-        # Mock the connector list
-        mock_client.get_connectors.return_value = [
-            {"id": "test_connector", "name": "Test Connector"}
-        ]
+        # Mock the connector lookup
+        mock_client.get_connector.return_value = {
+            "id": "test_connector", "group_id": "test_group", "name": "Test Connector"
+        }
         
         # Mock the trigger_sync and wait_for_sync_completion methods
         mock_client.trigger_sync.return_value = {"code": "Success"}
@@ -93,10 +96,11 @@ def test_run_connector_sync_failure():
         assert result is False
         
         # Verify the client method calls
-        mock_client.get_connectors.assert_called_once_with("test_group")
+        mock_client.get_connector.assert_called_once_with("test_connector")
+        mock_client.get_connectors.assert_not_called()
         mock_client.trigger_sync.assert_called_once_with("test_connector")
         mock_client.wait_for_sync_completion.assert_called_once_with(
-            "test_connector", timeout=3600, poll_interval=30
+            "test_connector", timeout=3600, poll_interval=None, webhook=None
         )
 
 def test_run_connector_exception():
@@ -118,10 +122,10 @@ def test_run_connector_custom_params():
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         
-        # Mock the connector list
-        mock_client.get_connectors.return_value = [
-            {"id": "test_connector", "name": "Test Connector"}
-        ]
+        # Mock the connector lookup
+        mock_client.get_connector.return_value = {
+            "id": "test_connector", "group_id": "test_group", "name": "Test Connector"
+        }
         
         # Mock the trigger_sync and wait_for_sync_completion methods
         mock_client.trigger_sync.return_value = {"code": "Success"}
@@ -135,5 +139,85 @@ def test_run_connector_custom_params():
         
         # Verify the client method calls with custom parameters
         mock_client.wait_for_sync_completion.assert_called_once_with(
-            "test_connector", timeout=1800, poll_interval=15
+            "test_connector", timeout=1800, poll_interval=15, webhook=None
         )
+
+def test_run_connectors_runs_concurrently_and_reports():
+    import threading
+    from src.fivetran_connector_runner import run_connectors
+    both_started = threading.Barrier(2, timeout=5)
+    completed = []
+
+    shared_client = MagicMock()
+
+    def fake_run_connector(group_id, connector_id, **kwargs):
+        assert kwargs["client"] is shared_client
+        # Both syncs must be in flight at the same time
+        both_started.wait()
+        return connector_id != "bad_connector"
+
+    with patch('src.fivetran_connector_runner.get_client_from_env', return_value=shared_client), \
+            patch('src.fivetran_connector_runner.run_connector', side_effect=fake_run_connector):
+        results = run_connectors("test_group", ["good_connector", "bad_connector"],
+                                 on_complete=lambda connector_id, result: completed.append(connector_id))
+
+    assert results["good_connector"]["success"] is True
+    assert results["bad_connector"]["success"] is False
+    assert all(result["duration"] >= 0 for result in results.values())
+    assert sorted(completed) == ["bad_connector", "good_connector"]
+
+def test_parse_duration():
+    from src.fivetran_connector_runner import parse_duration
+    assert parse_duration("90") == 90
+    assert parse_duration("15m") == 900
+    assert parse_duration("2h") == 7200
+    assert parse_duration("1d") == 86400
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+def test_run_connector_skips_fresh_connector():
+    with patch('src.fivetran_connector_runner.get_client_from_env') as mock_get_client:
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        succeeded_at = (datetime.now(UTC) - timedelta(minutes=2)).isoformat()
+        mock_client.get_connector.return_value = {"id": "test_connector", "group_id": "test_group",
+                                                  "succeeded_at": succeeded_at,
+                                                  "status": {"sync_state": "scheduled"}}
+        
+        assert run_connector("test_group", "test_connector", max_staleness=900) is True
+        mock_client.trigger_sync.assert_not_called()
+        # The freshness check reuses the connector payload instead of fetching it again
+        mock_client.get_connector.assert_called_once_with("test_connector")
+        mock_client.get_data_age.assert_not_called()
+        
+        # Stale (or syncing) connectors are still synced
+        mock_client.get_connector.return_value["status"]["sync_state"] = "syncing"
+        mock_client.wait_for_sync_completion.return_value = True
+        assert run_connector("test_group", "test_connector", max_staleness=900) is True
+        mock_client.trigger_sync.assert_called_once_with("test_connector")
+
+@responses.activate
+def test_run_connector_unknown_connector():
+    client = FivetranAPIClient("key", "secret")
+    responses.add(responses.GET, "https://api.fivetran.com/v1/connectors/missing",
+                  json={"code": "NotFound_Connector", "message": "Connector not found"}, status=404)
+    
+    assert run_connector("test_group", "missing", client=client) is False
+    assert len(responses.calls) == 1
+
+def test_main_keeps_sync_durations_out_of_etl_state():
+    from src.fivetran_connector_runner import main, DEFAULT_STATE_FILE
+    from src.etl_state import DEFAULT_STATE_FILE as ETL_STATE_FILE
+    
+    results = {"conn1": {"connector_id": "conn1", "success": True, "duration": 1.0}}
+    with patch("sys.argv", ["fivetran_connector_runner.py", "--group", "g1", "--connector", "conn1"]), \
+         patch("src.fivetran_connector_runner.run_connectors", return_value=results) as mock_run, \
+         patch("src.fivetran_connector_runner.ETLStateStore") as mock_store:
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+    
+    assert excinfo.value.code == 0
+    # etl_runner rewrites its own state file, so the runner must not share it
+    assert DEFAULT_STATE_FILE != ETL_STATE_FILE
+    mock_store.assert_called_once_with(DEFAULT_STATE_FILE)
+    assert mock_run.call_args.kwargs["state"] is mock_store.return_value
@@ -0,0 +1,133 @@
+import os
+import json
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from src import http_cache
+from src.http_cache import HTTPCache, window_ttl, cached_get, configure_cache
+
+
+def make_response(status_code=200, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or {}).encode() if status_code == 200 else b""
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPCache(str(tmp_path / "cache"), ttl_rules=[("/campaigns", 60)], default_ttl=0)
+
+
+@pytest.fixture(autouse=True)
+def no_global_cache():
+    configure_cache(None)
+    yield
+    configure_cache(None)
+
+
+def test_fresh_entry_served_without_request(cache):
+    session = MagicMock()
+    session.get.return_value = make_response(body={"data": [1]}, headers={"ETag": '"v1"'})
+    
+    first = cache.get(session, "https://a.klaviyo.com/api/v1/campaigns", params={"count": 100})
+    second = cache.get(session, "https://a.klaviyo.com/api/v1/campaigns", params={"count": 100})
+    
+    assert first.json() == second.json() == {"data": [1]}
+    assert session.get.call_count == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidated": 0}
+
+
+def test_stale_entry_revalidated_with_etag(cache):
+    session = MagicMock()
+    session.get.side_effect = [
+        make_response(body={"data": [1]}, headers={"ETag": '"v1"', "Last-Modified": "Thu, 01 May 2025 00:00:00 GMT"}),
+        make_response(status_code=304)
+    ]
+    url = "https://a.klaviyo.com/api/v1/campaign-metrics"
+    
+    cache.get(session, url, params={"campaign_id": "c1"})
+    response = cache.get(session, url, params={"campaign_id": "c1"})
+    
+    assert response.status_code == 200
+    assert response.json() == {"data": [1]}
+    headers = session.get.call_args_list[1].kwargs["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Thu, 01 May 2025 00:00:00 GMT"
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidated": 1}
+
+
+def test_errors_are_not_cached(cache):
+    session = MagicMock()
+    error = make_response(status_code=500)
+    session.get.return_value = error
+    
+    assert cache.get(session, "https://example.com/campaigns").status_code == 500
+    assert cache.get(session, "https://example.com/campaigns").status_code == 500
+    assert session.get.call_count == 2
+
+
+def test_immutable_ttl_never_expires(cache):
+    session = MagicMock()
+    session.get.return_value = make_response(body={"opened": 1})
+    url = "https://example.com/other"
+    
+    cache.get(session, url, ttl=None)
+    with patch("src.http_cache.time.time", return_value=10 ** 12):
+        cache.get(session, url, ttl=None)
+    assert session.get.call_count == 1
+
+
+def test_cache_key_ignores_param_order():
+    key1 = HTTPCache.cache_key("https://x", {"a": 1, "b": 2, "api_key": "secret1"})
+    key2 = HTTPCache.cache_key("https://x", {"b": 2, "a": 1, "api_key": "secret1"})
+    assert key1 == key2
+    assert key1 != HTTPCache.cache_key("https://x", {"a": 1})
+
+
+def test_cache_key_separates_credentials():
+    key1 = HTTPCache.cache_key("https://x", {"a": 1, "api_key": "secret1"})
+    key2 = HTTPCache.cache_key("https://x", {"a": 1, "api_key": "secret2"})
+    assert key1 != key2
+    assert "secret1" not in key1
+    assert HTTPCache.cache_key("https://x", {"a": 1}, credential="Bearer a") != \
+        HTTPCache.cache_key("https://x", {"a": 1}, credential="Bearer b")
+
+
+def test_authorization_header_is_part_of_key(cache):
+    url = "https://api.example.com/campaigns"
+    session_a = MagicMock()
+    session_a.headers = {"Authorization": "Klaviyo-API-Key a"}
+    session_a.get.return_value = make_response(body={"account": "a"})
+    session_b = MagicMock()
+    session_b.headers = {"Authorization": "Klaviyo-API-Key b"}
+    session_b.get.return_value = make_response(body={"account": "b"})
+
+    assert cache.get(session_a, url).json() == {"account": "a"}
+    assert cache.get(session_b, url).json() == {"account": "b"}
+    assert session_b.get.call_count == 1
+    assert cache.get(session_b, url, headers={"Authorization": "Klaviyo-API-Key a"}).json() == {"account": "a"}
+
+
+def test_window_ttl():
+    today = date(2025, 5, 20)
+    assert window_ttl("2025-05-01", 3600, immutable_after_days=7, today=today) is None
+    assert window_ttl("2025-05-19", 3600, immutable_after_days=7, today=today) == 3600
+    assert window_ttl(None, 3600) == 3600
+
+
+def test_cached_get_passes_through_when_disabled():
+    session = MagicMock()
+    cached_get(session, "https://x", params={"a": 1}, ttl=None, timeout=10)
+    session.get.assert_called_once_with("https://x", params={"a": 1}, timeout=10)
+
+
+def test_cache_enabled_from_env(tmp_path):
+    with patch.dict(os.environ, {http_cache.CACHE_DIR_ENV: str(tmp_path / "env_cache")}):
+        cache = http_cache.get_cache()
+    assert cache is not None
+    assert os.path.isdir(str(tmp_path / "env_cache"))
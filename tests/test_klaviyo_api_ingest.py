@@ -25,7 +25,7 @@ def test_get_api_key_missing():
             get_api_key()
 
 # Test campaign fetching
-@patch("src.klaviyo_api_ingest.requests.get")
+@patch("requests.Session.get")
 def test_fetch_campaigns_success(mock_get):
     # Mock response
     mock_response = MagicMock()
@@ -47,7 +47,7 @@ def test_fetch_campaigns_success(mock_get):
     assert campaigns[0]["id"] == "campaign_123"
     assert token == "next_token"
 
-@patch("src.klaviyo_api_ingest.requests.get")
+@patch("requests.Session.get")
 def test_fetch_campaigns_error(mock_get):
     # Mock error response
     mock_get.side_effect = requests.exceptions.RequestException("API Error")
@@ -60,6 +60,28 @@ def test_fetch_campaigns_error(mock_get):
     assert campaigns == []
     assert token is None
 
+@patch("requests.Session.get")
+def test_fetch_campaigns_raise_on_error(mock_get):
+    mock_get.side_effect = requests.exceptions.RequestException("API Error")
+    
+    with patch.dict(os.environ, {"KLAVIYO_API_KEY": "test_api_key"}):
+        with pytest.raises(requests.exceptions.RequestException):
+            fetch_campaigns(dry_run=False, raise_on_error=True)
+
+# Test a failed page aborts pagination instead of truncating the listing
+@patch("src.klaviyo_api_ingest.time.sleep")
+@patch("requests.Session.get")
+def test_fetch_all_campaigns_propagates_page_error(mock_get, mock_sleep):
+    first_page = MagicMock()
+    first_page.json.return_value = {"data": [{"id": "campaign_1"}], "next_page_token": "token1"}
+    first_page.raise_for_status.return_value = None
+    mock_get.side_effect = [first_page, requests.exceptions.ConnectionError("reset")]
+    
+    with patch.dict(os.environ, {"KLAVIYO_API_KEY": "test_api_key"}):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            fetch_all_campaigns(dry_run=False)
+    assert mock_get.call_count == 2
+
 # Test pagination
 @patch("src.klaviyo_api_ingest.fetch_campaigns")
 def test_fetch_all_campaigns(mock_fetch):
@@ -81,7 +103,7 @@ def test_fetch_all_campaigns(mock_fetch):
     assert mock_fetch.call_count == 3
 
 # Test metrics fetching
-@patch("src.klaviyo_api_ingest.requests.get")
+@patch("requests.Session.get")
 def test_fetch_campaign_metrics(mock_get):
     # Mock response
     mock_response = MagicMock()
@@ -157,3 +179,133 @@ def test_write_to_json():
     finally:
         # Clean up
         os.unlink(temp_path)
+
+# Test async pagination pipelines metrics requests
+def test_async_fetch_all_campaigns_merges_metrics_in_order():
+    import asyncio
+    from src.klaviyo_api_ingest import async_fetch_all_campaigns
+    
+    pages = {
+        None: ([{"id": "campaign_1"}, {"id": "campaign_2"}], "token1"),
+        "token1": ([{"id": "campaign_3"}], None)
+    }
+    metrics_calls = []
+    
+    def fake_metrics(campaign_id, dry_run=False):
+        metrics_calls.append(campaign_id)
+        return {"delivered": int(campaign_id.split("_")[1])}
+    
+    with patch("src.klaviyo_api_ingest.fetch_campaigns", side_effect=lambda token, dry_run, raise_on_error=False: pages[token]), \
+         patch("src.klaviyo_api_ingest.fetch_campaign_metrics", side_effect=fake_metrics):
+        campaigns = asyncio.run(async_fetch_all_campaigns(concurrency=2))
+    
+    assert [c["id"] for c in campaigns] == ["campaign_1", "campaign_2", "campaign_3"]
+    assert [c["delivered"] for c in campaigns] == [1, 2, 3]
+    assert sorted(metrics_calls) == ["campaign_1", "campaign_2", "campaign_3"]
+
+def test_async_fetch_campaign_metrics_waits_for_limiter():
+    import asyncio
+    from src.klaviyo_api_ingest import async_fetch_campaign_metrics
+    
+    limiter = MagicMock()
+    limiter.try_acquire.side_effect = [0.01, 0]
+    
+    with patch("src.klaviyo_api_ingest.fetch_campaign_metrics", return_value={"opened": 5}):
+        metrics = asyncio.run(async_fetch_campaign_metrics("campaign_1", limiter=limiter))
+    
+    assert metrics == {"opened": 5}
+    assert limiter.try_acquire.call_count == 2
+
+# Test the generator follows every page lazily
+@patch("src.klaviyo_api_ingest.time.sleep")
+@patch("src.klaviyo_api_ingest.fetch_campaigns")
+def test_iter_campaigns_follows_every_page(mock_fetch, mock_sleep):
+    from src.klaviyo_api_ingest import iter_campaigns
+    pages = 25
+    mock_fetch.side_effect = [
+        ([{"id": f"campaign_{i}"}], f"token{i}" if i < pages - 1 else None)
+        for i in range(pages)
+    ]
+    
+    campaigns = iter_campaigns()
+    assert next(campaigns) == {"id": "campaign_0"}
+    # Pages are fetched lazily
+    assert mock_fetch.call_count == 1
+    
+    rest = list(campaigns)
+    assert len(rest) == pages - 1
+    assert mock_fetch.call_count == pages
+
+# Test pagination stops on a repeated page token or past the page cap
+@patch("src.klaviyo_api_ingest.time.sleep")
+@patch("src.klaviyo_api_ingest.fetch_campaigns")
+def test_iter_campaigns_stops_on_repeated_token(mock_fetch, mock_sleep):
+    from src.klaviyo_api_ingest import iter_campaigns
+    mock_fetch.side_effect = lambda token, dry_run, raise_on_error=False: ([{"id": f"campaign_{token}"}], "token1")
+    
+    with pytest.raises(RuntimeError, match="twice"):
+        list(iter_campaigns())
+    assert mock_fetch.call_count == 2
+
+@patch("src.klaviyo_api_ingest.time.sleep")
+@patch("src.klaviyo_api_ingest.fetch_campaigns")
+def test_iter_campaigns_stops_at_page_cap(mock_fetch, mock_sleep):
+    from src.klaviyo_api_ingest import iter_campaigns
+    mock_fetch.side_effect = lambda token, dry_run, raise_on_error=False: ([{"id": "c"}], f"{token}x")
+    
+    with patch("src.klaviyo_api_ingest.MAX_CAMPAIGN_PAGES", 5):
+        with pytest.raises(RuntimeError, match="5 pages"):
+            list(iter_campaigns())
+    assert mock_fetch.call_count == 5
+
+def test_async_fetch_all_campaigns_stops_on_repeated_token():
+    import asyncio
+    from src.klaviyo_api_ingest import async_fetch_all_campaigns
+    
+    with patch("src.klaviyo_api_ingest.fetch_campaigns",
+               side_effect=lambda token, dry_run, raise_on_error=False: ([{"id": "campaign_1"}], "token1")), \
+         patch("src.klaviyo_api_ingest.fetch_campaign_metrics", return_value={}):
+        with pytest.raises(RuntimeError, match="twice"):
+            asyncio.run(async_fetch_all_campaigns())
+
+# Test the async path runs `concurrency` metrics requests at once on its own executor
+def test_async_fetch_all_campaigns_runs_full_concurrency():
+    import asyncio
+    import threading
+    from src.klaviyo_api_ingest import async_fetch_all_campaigns
+    
+    concurrency = 12
+    campaigns = [{"id": f"campaign_{i}"} for i in range(concurrency)]
+    # Every worker must be in flight at the same time for the barrier to open
+    barrier = threading.Barrier(concurrency, timeout=5)
+    
+    def fake_metrics(campaign_id, dry_run=False):
+        barrier.wait()
+        return {"delivered": 1}
+    
+    with patch("src.klaviyo_api_ingest.fetch_campaigns", return_value=(campaigns, None)), \
+         patch("src.klaviyo_api_ingest.fetch_campaign_metrics", side_effect=fake_metrics), \
+         patch("src.klaviyo_api_ingest.get_session") as mock_get_session:
+        result = asyncio.run(async_fetch_all_campaigns(concurrency=concurrency))
+    
+    assert [c["delivered"] for c in result] == [1] * concurrency
+    mock_get_session.assert_called_once_with(pool_size=concurrency + 1)
+
+# Test page requests take a limiter slot as well as metrics requests
+def test_async_fetch_all_campaigns_rate_limits_pages():
+    import asyncio
+    from src.klaviyo_api_ingest import async_fetch_all_campaigns
+    
+    pages = {
+        None: ([{"id": "campaign_1"}], "token1"),
+        "token1": ([{"id": "campaign_2"}], None)
+    }
+    limiter = MagicMock()
+    limiter.try_acquire.return_value = 0
+    
+    with patch("src.klaviyo_api_ingest.fetch_campaigns", side_effect=lambda token, dry_run, raise_on_error=False: pages[token]), \
+         patch("src.klaviyo_api_ingest.fetch_campaign_metrics", return_value={}):
+        asyncio.run(async_fetch_all_campaigns(dry_run=True, limiter=limiter))
+    
+    # Two pages plus two metrics requests
+    assert limiter.try_acquire.call_count == 4
@@ -0,0 +1,122 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from src import klaviyo_http
+from src.klaviyo_http import create_session, get_session, reset_session, build_retry
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    reset_session()
+    yield
+    reset_session()
+
+
+def test_create_session_mounts_pooled_retrying_adapter():
+    session = create_session(pool_size=16, api_key="pk_test", api_version="2025-04-15")
+    adapter = session.get_adapter("https://a.klaviyo.com/api/campaigns")
+    
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == klaviyo_http.MAX_RETRIES
+    assert session.headers["Authorization"] == "Klaviyo-API-Key pk_test"
+    assert session.headers["revision"] == "2025-04-15"
+
+
+def test_retry_policy():
+    retry = build_retry()
+    assert 429 in retry.status_forcelist
+    assert 500 in retry.status_forcelist
+    assert retry.respect_retry_after_header is True
+    assert retry.raise_on_status is False
+    # Idempotent methods retry on 5xx; writes only when rate limited
+    assert retry.is_retry("GET", 502)
+    assert not retry.is_retry("POST", 502)
+    assert not retry.is_retry("PATCH", 503)
+    assert retry.is_retry("POST", 429)
+    assert "POST" not in retry.allowed_methods
+
+
+def test_get_session_is_shared():
+    with patch.dict(os.environ, {"KLAVIYO_API_KEY": "pk_env"}):
+        first = get_session()
+        second = get_session()
+    assert first is second
+    assert first.headers["Authorization"] == "Klaviyo-API-Key pk_env"
+
+
+def test_reset_session_creates_new_session():
+    first = get_session()
+    reset_session()
+    assert get_session() is not first
+
+
+@pytest.fixture
+def flaky_server():
+    """Local HTTP server answering every POST with 503 once, then 201."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            calls.append(self.headers.get("Idempotency-Key"))
+            status = 503 if len(calls) % 2 else 201
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/profiles", calls
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_with_idempotency_key_retries_server_errors(flaky_server):
+    url, calls = flaky_server
+    session = create_session(pool_size=2)
+    with patch("urllib3.util.retry.time.sleep"):
+        response = session.post(url, json={}, headers={"Idempotency-Key": "abc"})
+    
+    assert response.status_code == 201
+    assert calls == ["abc", "abc"]
+
+
+def test_post_without_idempotency_key_is_not_retried(flaky_server):
+    url, calls = flaky_server
+    session = create_session(pool_size=2)
+    with patch("urllib3.util.retry.time.sleep"):
+        response = session.post(url, json={})
+    
+    assert response.status_code == 503
+    assert calls == [None]
+    # The per-request policy does not leak into the adapter default
+    adapter = session.get_adapter(url)
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+def test_idempotent_write_retry_policy():
+    retry = build_retry(idempotent_writes=True)
+    assert retry.is_retry("POST", 502)
+    assert retry.is_retry("PATCH", 503)
+    assert retry.is_retry("GET", 504)
+
+
+def test_get_session_grows_pool_to_requested_size():
+    first = get_session()
+    assert first.get_adapter("https://a.klaviyo.com")._pool_maxsize == klaviyo_http.DEFAULT_POOL_SIZE
+    
+    grown = get_session(pool_size=32)
+    assert grown is first
+    assert grown.get_adapter("https://a.klaviyo.com")._pool_maxsize == 32
+    
+    # A smaller request never shrinks the shared pool
+    get_session(pool_size=4)
+    assert first.get_adapter("https://a.klaviyo.com")._pool_maxsize == 32
@@ -10,7 +10,8 @@ from src.lookml_field_mapper import (
     normalize_records,
     get_field_mapping,
     get_derived_fields,
-    format_date
+    format_date,
+    source_fields
 )
 
 # Test field mapping
@@ -113,3 +114,10 @@ def test_format_date():
     assert format_date("2025-05-01") == "2025-05-01"  # Already in correct format
     assert format_date("") == ""
     assert format_date(None) == ""
+
+# Test Looker field names are mapped back to Klaviyo source fields
+def test_source_fields():
+    assert source_fields(["date", "campaign_name", "subject_line", "open_rate"]) == \
+        ["send_time", "name", "subject", "open_rate"]
+    # Unmapped fields pass through; derived fields need no source field
+    assert source_fields(["campaign_id", "engagement_score", "recipients"]) == ["campaign_id", "recipients"]
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from src.metric_catalog import MetricCatalog, CATALOG_VERSION
+
+
+def make_page(metrics, next_url=None):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        "data": [{"id": metric_id, "attributes": {"name": name}} for name, metric_id in metrics],
+        "links": {"next": next_url},
+    }
+    return response
+
+
+@pytest.fixture
+def session():
+    session = MagicMock()
+    session.get.side_effect = [
+        make_page([("Opened Email", "m1"), ("Clicked Email", "m2")], "https://a.klaviyo.com/api/metrics/?page[cursor]=x"),
+        make_page([("Placed Order", "m3"), ("Opened Email", "dup")]),
+    ]
+    return session
+
+
+def test_bulk_lookup_makes_one_paginated_pass(tmp_path, session):
+    catalog = MetricCatalog(str(tmp_path / "metrics.json"), session=session)
+
+    ids = catalog.lookup(["Opened Email", "Clicked Email", "Placed Order", "Unknown"])
+
+    assert ids == {"Opened Email": "m1", "Clicked Email": "m2", "Placed Order": "m3", "Unknown": None}
+    assert session.get.call_count == 2
+    assert session.get.call_args_list[1].kwargs["params"] is None
+    # Later lookups, including for unknown names, are served from memory
+    assert catalog.get("Unknown") is None
+    assert catalog.get("Placed Order") == "m3"
+    assert session.get.call_count == 2
+
+
+def test_catalog_persists_with_version(tmp_path, session):
+    path = str(tmp_path / "metrics.json")
+    MetricCatalog(path, session=session).lookup(["Opened Email"])
+
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["version"] == CATALOG_VERSION
+    assert saved["metrics"]["Placed Order"] == "m3"
+
+    reloaded_session = MagicMock()
+    reloaded = MetricCatalog(path, session=reloaded_session)
+    assert reloaded.get("Clicked Email") == "m2"
+    reloaded_session.get.assert_not_called()
+
+
+def test_stale_catalog_is_refetched(tmp_path, session):
+    path = str(tmp_path / "metrics.json")
+    with open(path, "w") as f:
+        json.dump({"version": CATALOG_VERSION, "fetched_at": time.time() - 7200,
+                   "metrics": {"Opened Email": "old"}}, f)
+
+    catalog = MetricCatalog(path, ttl=3600, session=session)
+
+    assert catalog.get("Opened Email") == "m1"
+    assert session.get.call_count == 2
+
+
+def test_reads_legacy_flat_cache(tmp_path):
+    path = str(tmp_path / "metrics.json")
+    with open(path, "w") as f:
+        json.dump({"Opened Email": "123", "Clicked Email": None}, f)
+    session = MagicMock()
+
+    catalog = MetricCatalog(path, session=session)
+
+    assert catalog.get("Opened Email") == "123"
+    session.get.assert_not_called()
+
+
+def test_unsupported_version_is_ignored(tmp_path, session):
+    path = str(tmp_path / "metrics.json")
+    with open(path, "w") as f:
+        json.dump({"version": CATALOG_VERSION + 1, "fetched_at": time.time(), "metrics": {"Opened Email": "x"}}, f)
+
+    assert MetricCatalog(path, session=session).get("Opened Email") == "m1"
+
+
+def test_failed_refresh_falls_back_to_stale_catalog(tmp_path):
+    path = str(tmp_path / "metrics.json")
+    with open(path, "w") as f:
+        json.dump({"version": CATALOG_VERSION, "fetched_at": time.time() - 7200,
+                   "metrics": {"Opened Email": "old"}}, f)
+    session = MagicMock()
+    session.get.side_effect = requests.ConnectionError("down")
+
+    catalog = MetricCatalog(path, ttl=3600, session=session)
+
+    assert catalog.lookup(["Opened Email", "Placed Order"]) == {"Opened Email": "old", "Placed Order": None}
@@ -6,42 +6,50 @@ import pytest
 from datetime import datetime, timedelta, UTC
 from unittest.mock import patch, MagicMock
 
-from fetch_metrics import get_metric_id, fetch_metrics
+from fetch_metrics import get_metric_id, fetch_metrics, merge_metric_series, PANDAS_AVAILABLE, reset_metric_catalog
 
 
-def test_get_metric_id_caching():
+@pytest.fixture(autouse=True)
+def catalog_file(tmp_path, monkeypatch):
+    """Keep the persisted metric catalog out of the working directory"""
+    path = str(tmp_path / ".metric_ids.json")
+    monkeypatch.setattr("fetch_metrics.METRIC_CATALOG_FILE", path)
+    reset_metric_catalog()
+    yield path
+    reset_metric_catalog()
+
+
+def test_get_metric_id_caching(catalog_file):
     # Create a temporary cache file
     test_cache = {
         "Opened Email": "123",
         "Clicked Email": "456"
     }
     
-    with open(".metric_ids.json", "w") as f:
+    with open(catalog_file, "w") as f:
         json.dump(test_cache, f)
+    reset_metric_catalog()
     
     # Test that the function uses the cache
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         metric_id = get_metric_id("Opened Email")
         assert metric_id == "123"
         mock_get.assert_not_called()  # Should not call API when cache exists
     
     # Test force refresh
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = MagicMock()
-        mock_response.json.return_value = {"data": [{"id": "789"}]}
+        mock_response.json.return_value = {"data": [{"id": "789", "attributes": {"name": "Opened Email"}}]}
         mock_get.return_value = mock_response
         
         metric_id = get_metric_id("Opened Email", force_refresh=True)
         assert metric_id == "789"
         mock_get.assert_called_once()  # Should call API when force_refresh=True
-    
-    # Clean up
-    os.remove(".metric_ids.json")
 
 
 def test_fetch_metrics_date_handling():
     # Test that the function uses UTC dates in ISO 8601 format
-    with patch("requests.get") as mock_get, \
+    with patch("requests.Session.get") as mock_get, \
          patch("builtins.open", MagicMock()), \
          patch("csv.DictWriter", MagicMock()), \
          patch("json.dump", MagicMock()):
@@ -68,7 +76,7 @@ def test_fetch_metrics_date_handling():
 
 def test_metric_window():
     # Test that the function correctly handles the date window
-    with patch("requests.get") as mock_get, \
+    with patch("requests.Session.get") as mock_get, \
          patch("builtins.open", MagicMock()), \
          patch("csv.DictWriter", MagicMock()), \
          patch("json.dump", MagicMock()):
@@ -97,7 +105,7 @@ def test_metric_window():
 
 def test_dry_run_mode():
     # Test that dry run mode doesn't make API calls
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         result = fetch_metrics(dry_run=True)
         assert result is True
         mock_get.assert_not_called()
@@ -105,7 +113,7 @@ def test_dry_run_mode():
 
 def test_mock_mode():
     # Test that mock mode generates fake data without API calls
-    with patch("requests.get") as mock_get, \
+    with patch("requests.Session.get") as mock_get, \
          patch("builtins.open", MagicMock()), \
          patch("csv.DictWriter", MagicMock()), \
          patch("json.dump", MagicMock()), \
@@ -114,3 +122,137 @@ def test_mock_mode():
         result = fetch_metrics()
         assert result is True
         mock_get.assert_not_called()
+
+
+def test_fetch_metrics_by_campaign_one_query_per_metric(tmp_path):
+    from fetch_metrics import fetch_metrics_by_campaign
+    output_file = str(tmp_path / "metrics_by_campaign.csv")
+    
+    def response(body):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = body
+        return mock_response
+    
+    # Opens span two pages; clicks and revenue fit in one
+    responses = [
+        response({"data": [{"campaign_id": "c2", "date": "2025-05-01", "value": 7}],
+                  "links": {"next": "https://a.klaviyo.com/api/metric-aggregates/?page[cursor]=abc"}}),
+        response({"data": [{"campaign_id": "c1", "date": "2025-05-01", "value": 5}], "links": {"next": None}}),
+        response({"data": [{"campaign_id": "c1", "date": "2025-05-01", "value": 2}]}),
+        response({"data": [{"campaign_id": "c2", "date": "2025-05-02", "value": 99.5}]}),
+    ]
+    
+    with patch("requests.Session.get", side_effect=responses) as mock_get, \
+         patch("fetch_metrics.get_metric_ids", side_effect=lambda names: {name: f"id-{name}" for name in names}), \
+         patch("fetch_metrics.get_config", return_value={"MODE": "real", "KLAVIYO_API_KEY": "pk", "CAMPAIGN_ID": "c1"}):
+        result = fetch_metrics_by_campaign("2025-05-01", "2025-05-07", campaign_ids=["c1", "c2"],
+                                           output_file=output_file)
+    
+    assert result is True
+    assert mock_get.call_count == 4
+    first_params = mock_get.call_args_list[0].kwargs["params"]
+    assert first_params["by"] == "campaign_id"
+    assert first_params["filters"] == "[['any','campaign_id',['c1','c2']]]"
+    # The cursor page follows the next link without re-sending the query
+    assert mock_get.call_args_list[1].args[0].endswith("page[cursor]=abc")
+    assert mock_get.call_args_list[1].kwargs["params"] is None
+    
+    import csv
+    with open(output_file) as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["campaign_id"], r["date"], r["metric"], r["value"]) for r in rows] == [
+        ("c1", "2025-05-01", "clicked", "2"),
+        ("c1", "2025-05-01", "opened", "5"),
+        ("c2", "2025-05-01", "opened", "7"),
+        ("c2", "2025-05-02", "revenue", "99.5"),
+    ]
+
+
+def test_fetch_metrics_by_campaign_mock_mode(tmp_path):
+    from fetch_metrics import fetch_metrics_by_campaign
+    output_file = str(tmp_path / "metrics_by_campaign.csv")
+    
+    with patch("requests.Session.get") as mock_get, \
+         patch("fetch_metrics.get_config", return_value={"MODE": "mock", "CAMPAIGN_ID": "test"}):
+        assert fetch_metrics_by_campaign("2025-05-01", "2025-05-02", ["a", "b"], output_file=output_file)
+        mock_get.assert_not_called()
+    
+    with open(output_file) as f:
+        assert len(f.readlines()) == 1 + 2 * 2 * 3
+
+
+def test_merge_metric_series_outer_join():
+    """Dates with clicks or revenue but no opens are kept"""
+    opens = [{"date": "2025-05-01", "value": 10}]
+    clicks = [{"date": "2025-05-01", "value": 4}, {"date": "2025-05-02", "value": 2}]
+    revenue = [{"date": "2025-05-03", "value": 99.5}]
+
+    rows = merge_metric_series(opens, clicks, revenue, campaign_id="c1", vectorized=False)
+
+    assert [r["date"] for r in rows] == ["2025-05-01", "2025-05-02", "2025-05-03"]
+    assert rows[0] == {"campaign_id": "c1", "date": "2025-05-01", "delivered": 25,
+                       "opened": 10, "clicked": 4, "revenue": 0}
+    assert rows[1]["opened"] == 0 and rows[1]["clicked"] == 2
+    assert rows[2]["revenue"] == 99.5 and rows[2]["delivered"] == 0
+
+
+def test_merge_metric_series_keys_on_campaign():
+    """The same date for different campaigns produces separate rows"""
+    opens = [{"campaign_id": "b", "date": "2025-05-01", "value": 1},
+             {"campaign_id": "a", "date": "2025-05-01", "value": 2}]
+
+    rows = merge_metric_series(opens, [], [], vectorized=False)
+
+    assert [(r["campaign_id"], r["opened"]) for r in rows] == [("a", 2), ("b", 1)]
+
+
+@pytest.mark.skipif(not PANDAS_AVAILABLE, reason="pandas not installed")
+def test_merge_metric_series_vectorized_matches_indexed():
+    """The pandas merge returns the same rows as the dict merge"""
+    opens = [{"date": f"2025-05-{d:02d}", "value": d} for d in range(1, 20, 2)]
+    clicks = [{"date": f"2025-05-{d:02d}", "value": d * 2} for d in range(1, 25, 3)]
+    revenue = [{"date": f"2025-05-{d:02d}", "value": d * 1.5} for d in range(2, 28, 4)]
+
+    indexed = merge_metric_series(opens, clicks, revenue, campaign_id="c1", vectorized=False)
+    vectorized = merge_metric_series(opens, clicks, revenue, campaign_id="c1", vectorized=True)
+
+    assert vectorized == indexed
+
+
+def test_fetch_metrics_runs_aggregates_concurrently(tmp_path, monkeypatch):
+    """The three aggregate calls overlap instead of running back to back"""
+    import threading
+    import time
+    from src.rate_limiter import klaviyo_rate_limiter
+    monkeypatch.chdir(tmp_path)
+    # Start with a full burst bucket regardless of earlier tests
+    monkeypatch.setattr("fetch_metrics.AGGREGATE_LIMITER", klaviyo_rate_limiter("S"))
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_get(url, params=None, **kwargs):
+        with lock:
+            in_flight.append(params["metric_id"])
+            peak.append(len(in_flight))
+        time.sleep(0.2)
+        with lock:
+            in_flight.remove(params["metric_id"])
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"data": [{"date": "2025-05-01", "value": 1}]}
+        return mock_response
+
+    ids = {"Opened Email": "o", "Clicked Email": "c", "Placed Order": "r"}
+    with patch("requests.Session.get", side_effect=slow_get) as mock_get, \
+         patch("fetch_metrics.get_metric_ids", return_value=ids), \
+         patch("fetch_metrics.get_config", return_value={"MODE": "real", "KLAVIYO_API_KEY": "pk", "CAMPAIGN_ID": "c1"}):
+        started = time.perf_counter()
+        assert fetch_metrics("2025-05-01", "2025-05-07") is True
+        elapsed = time.perf_counter() - started
+
+    measures = {call.kwargs["params"]["metric_id"]: call.kwargs["params"]["measure"] for call in mock_get.call_args_list}
+    assert measures == {"o": "unique", "c": "unique", "r": "sum"}
+    assert max(peak) == 3
+    assert elapsed < 0.5
@@ -1,5 +1,6 @@
 import os
 import pytest
+from contextlib import nullcontext
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
@@ -79,15 +80,15 @@ def test_write_to_csv_empty_data():
         write_to_csv([], "test_output.csv")
 
 
-@patch("src.postgres_extract_export.get_connection")
+@patch("src.postgres_extract_export.pooled_connection")
 @patch("src.postgres_extract_export.execute_query")
 @patch("src.postgres_extract_export.write_to_csv")
 @patch("src.postgres_extract_export.argparse.ArgumentParser.parse_args")
-def test_main_success(mock_parse_args, mock_write_to_csv, mock_execute_query, mock_get_connection):
+def test_main_success(mock_parse_args, mock_write_to_csv, mock_execute_query, mock_pooled_connection):
     """Test successful execution of the main function."""
     # Mock the connection and cursor
     mock_conn = MagicMock()
-    mock_get_connection.return_value.__enter__.return_value = mock_conn
+    mock_pooled_connection.return_value.__enter__.return_value = mock_conn
     
     # Mock the query results
     mock_execute_query.return_value = [
@@ -104,6 +105,8 @@ def test_main_success(mock_parse_args, mock_write_to_csv, mock_execute_query, mo
     mock_args.limit = None
     mock_args.dry_run = False
     mock_args.verbose = False
+    mock_args.parallelism = 1
+    mock_args.incremental = False
     mock_parse_args.return_value = mock_args
     
     # Mock the CSV writing
@@ -129,16 +132,16 @@ def test_main_success(mock_parse_args, mock_write_to_csv, mock_execute_query, mo
     mock_write_to_csv.assert_called_once()
 
 
-@patch("src.postgres_extract_export.get_connection")
+@patch("src.postgres_extract_export.pooled_connection")
 @patch("src.postgres_extract_export.execute_query")
 @patch("src.postgres_extract_export.fetch_last_n_days")
 @patch("src.postgres_extract_export.fetch_to_dataframe")
 @patch("src.postgres_extract_export.argparse.ArgumentParser.parse_args")
-def test_main_dry_run(mock_parse_args, mock_fetch_to_dataframe, mock_fetch_last_n_days, mock_execute_query, mock_get_connection):
+def test_main_dry_run(mock_parse_args, mock_fetch_to_dataframe, mock_fetch_last_n_days, mock_execute_query, mock_pooled_connection):
     """Test dry-run mode of the main function."""
     # Mock the connection and cursor
     mock_conn = MagicMock()
-    mock_get_connection.return_value.__enter__.return_value = mock_conn
+    mock_pooled_connection.return_value.__enter__.return_value = mock_conn
     
     # Mock the fetch_to_dataframe to return data
     mock_fetch_to_dataframe.return_value = [
@@ -155,6 +158,8 @@ def test_main_dry_run(mock_parse_args, mock_fetch_to_dataframe, mock_fetch_last_
     mock_args.limit = 5
     mock_args.dry_run = True
     mock_args.verbose = False
+    mock_args.parallelism = 1
+    mock_args.incremental = False
     mock_args.fallback_days = 30
     mock_parse_args.return_value = mock_args
     
@@ -179,12 +184,12 @@ def test_main_dry_run(mock_parse_args, mock_fetch_to_dataframe, mock_fetch_last_
     mock_print.assert_any_call("Sample of 2 rows from 2 total:")
 
 
-@patch("src.postgres_extract_export.get_connection")
+@patch("src.postgres_extract_export.pooled_connection")
 @patch("src.postgres_extract_export.argparse.ArgumentParser.parse_args")
-def test_main_connection_error(mock_parse_args, mock_get_connection):
+def test_main_connection_error(mock_parse_args, mock_pooled_connection):
     """Test handling of connection errors."""
     # Mock the connection to raise an error
-    mock_get_connection.side_effect = Exception("Connection error")
+    mock_pooled_connection.side_effect = Exception("Connection error")
     
     # Mock the arguments
     mock_args = MagicMock()
@@ -195,6 +200,8 @@ def test_main_connection_error(mock_parse_args, mock_get_connection):
     mock_args.limit = None
     mock_args.dry_run = False
     mock_args.verbose = False
+    mock_args.parallelism = 1
+    mock_args.incremental = False
     mock_parse_args.return_value = mock_args
     
     # Set environment variables
@@ -215,15 +222,15 @@ def test_main_connection_error(mock_parse_args, mock_get_connection):
     mock_print.assert_any_call("Error: Connection error")
 
 
-@patch("src.postgres_extract_export.get_connection")
+@patch("src.postgres_extract_export.pooled_connection")
 @patch("src.postgres_extract_export.execute_query")
 @patch("src.postgres_extract_export.fetch_last_n_days")
 @patch("src.postgres_extract_export.argparse.ArgumentParser.parse_args")
-def test_main_no_results(mock_parse_args, mock_fetch_last_n_days, mock_execute_query, mock_get_connection):
+def test_main_no_results(mock_parse_args, mock_fetch_last_n_days, mock_execute_query, mock_pooled_connection):
     """Test handling of queries with no results."""
     # Mock the connection and cursor
     mock_conn = MagicMock()
-    mock_get_connection.return_value.__enter__.return_value = mock_conn
+    mock_pooled_connection.return_value.__enter__.return_value = mock_conn
     
     # Mock both queries to return no results
     mock_execute_query.return_value = []
@@ -238,6 +245,8 @@ def test_main_no_results(mock_parse_args, mock_fetch_last_n_days, mock_execute_q
     mock_args.limit = None
     mock_args.dry_run = False
     mock_args.verbose = False
+    mock_args.parallelism = 1
+    mock_args.incremental = False
     mock_args.fallback_days = 30
     mock_parse_args.return_value = mock_args
     
@@ -257,3 +266,328 @@ def test_main_no_results(mock_parse_args, mock_fetch_last_n_days, mock_execute_q
     
     # Check that an error message was printed
     mock_print.assert_any_call("Both primary and fallback queries returned no results")
+
+
+class FakeNamedCursor:
+    """Server-side cursor stand-in that serves rows in fetchmany batches."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.itersize = None
+        self.fetch_sizes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.query = query
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+def test_fetch_and_export_to_csv_streams_batches(tmp_path):
+    """Rows are fetched from a named cursor and written batch by batch."""
+    from src.postgres_extract_export import fetch_and_export_to_csv
+
+    rows = [{"id": i, "created_at": f"2023-01-{i + 1:02d}"} for i in range(5)]
+    empty, primary = FakeNamedCursor([]), FakeNamedCursor(rows)
+    conn = MagicMock()
+    # The date range is empty, so the fallback query is streamed
+    conn.cursor.side_effect = [empty, primary]
+    output_file = str(tmp_path / "export.csv")
+
+    with patch("src.postgres_extract_export.pooled_connection", return_value=nullcontext(conn)):
+        result = fetch_and_export_to_csv("event", "2023-01-01", "2023-01-31",
+                                         output_file=output_file, batch_size=2)
+
+    assert result == output_file
+    assert all(call.kwargs["name"].startswith("extract_") for call in conn.cursor.call_args_list)
+    assert primary.itersize == 2
+    assert primary.fetch_sizes == [2, 2, 2, 2]
+    assert "INTERVAL '30 days'" in primary.query
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "created_at,id"
+    assert len(lines) == 6
+
+
+def test_fetch_and_export_to_csv_no_rows(tmp_path):
+    """No file is written when neither query returns rows."""
+    from src.postgres_extract_export import fetch_and_export_to_csv
+
+    conn = MagicMock()
+    conn.cursor.side_effect = [FakeNamedCursor([]), FakeNamedCursor([])]
+    output_file = str(tmp_path / "export.csv")
+
+    with patch("src.postgres_extract_export.pooled_connection", return_value=nullcontext(conn)):
+        with pytest.raises(ValueError, match="returned no results"):
+            fetch_and_export_to_csv("event", output_file=output_file)
+
+    assert not os.path.exists(output_file)
+
+
+def test_fetch_and_export_to_csv_copy_engine(tmp_path):
+    """The copy engine hands the filtered query to COPY ... TO STDOUT."""
+    from src.postgres_extract_export import fetch_and_export_to_csv
+
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+
+    def fake_copy(sql, f):
+        f.write("id,created_at\n1,2023-01-02\n")
+        cursor.rowcount = 1
+
+    cursor.copy_expert.side_effect = fake_copy
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    output_file = str(tmp_path / "export.csv")
+
+    with patch("src.postgres_extract_export.pooled_connection", return_value=nullcontext(conn)):
+        fetch_and_export_to_csv("event", "2023-01-01", "2023-01-31", output_file=output_file, engine="copy")
+
+    sql = cursor.copy_expert.call_args.args[0]
+    assert sql == ("COPY (SELECT * FROM event WHERE created_at >= '2023-01-01' AND created_at <= '2023-01-31' "
+                   "ORDER BY created_at ASC) TO STDOUT WITH CSV HEADER")
+    with open(output_file) as f:
+        assert f.read() == "id,created_at\n1,2023-01-02\n"
+
+
+def test_fetch_and_export_to_csv_unknown_engine():
+    from src.postgres_extract_export import fetch_and_export_to_csv
+
+    with pytest.raises(ValueError, match="Unknown export engine"):
+        fetch_and_export_to_csv("event", engine="pandas")
+
+
+class FakePool:
+    """ThreadedConnectionPool stand-in that hands out MagicMock connections."""
+
+    def __init__(self, minconn, maxconn, **params):
+        self.maxconn = maxconn
+        self.params = params
+        self.closed = False
+        self.idle = []
+        self.created = 0
+        self.discarded = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.created += 1
+        conn = MagicMock()
+        conn.closed = 0
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    import src.postgres_extract_export as pee
+    for name, value in {"PG_HOST": "db", "PG_DB": "postgres", "PG_USER": "u", "PG_PASSWORD": "p"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv("PG_POOL_MAX_SIZE", "2")
+    monkeypatch.setattr(pee, "ThreadedConnectionPool", FakePool, raising=False)
+    pee.close_pool()
+    yield pee
+    pee.close_pool()
+
+
+def test_pooled_connection_reuses_connections(fake_pool):
+    with fake_pool.pooled_connection() as first:
+        pass
+    with fake_pool.pooled_connection() as second:
+        pass
+
+    pool = fake_pool.get_pool()
+    assert first is second
+    assert pool.created == 1
+    assert pool.maxconn == 2
+    assert pool.params["host"] == "db"
+    # Transactions are ended before a connection goes back
+    assert first.rollback.called
+
+
+def test_pooled_connection_replaces_broken_connection(fake_pool):
+    import psycopg2
+    with fake_pool.pooled_connection() as conn:
+        pass
+    conn.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError("gone")
+
+    with fake_pool.pooled_connection() as replacement:
+        pass
+
+    pool = fake_pool.get_pool()
+    assert replacement is not conn
+    assert pool.discarded == [conn]
+
+
+def test_fetch_to_dataframe_borrows_from_pool(fake_pool):
+    with patch.object(fake_pool, "execute_query", side_effect=[[], [{"id": 1}]]) as mock_execute_query:
+        assert fake_pool.fetch_to_dataframe("event", "2023-01-01", "2023-01-31") == [{"id": 1}]
+
+    # The primary and fallback queries share one borrowed connection
+    first_conn = mock_execute_query.call_args_list[0].args[0]
+    assert mock_execute_query.call_args_list[1].args[0] is first_conn
+    assert fake_pool.get_pool().created == 1
+
+
+def test_build_partition_queries_cover_range_once():
+    """Partitions are half-open except the last, which keeps the inclusive end."""
+    from src.postgres_extract_export import build_partition_queries
+
+    queries = build_partition_queries("event", "2023-01-01", "2023-01-10", 3)
+
+    assert queries == [
+        "SELECT * FROM event WHERE created_at >= '2023-01-01' AND created_at < '2023-01-05' ORDER BY created_at ASC ;",
+        "SELECT * FROM event WHERE created_at >= '2023-01-05' AND created_at < '2023-01-09' ORDER BY created_at ASC ;",
+        "SELECT * FROM event WHERE created_at >= '2023-01-09' AND created_at <= '2023-01-10' ORDER BY created_at ASC ;",
+    ]
+    # More partitions than days collapses to one per day
+    assert len(build_partition_queries("event", "2023-01-01", "2023-01-02", 8)) == 2
+
+
+def test_export_partitioned_to_csv_merges_in_order(tmp_path):
+    """Each partition runs on its own connection and the parts are merged in range order."""
+    import threading
+    from src.postgres_extract_export import fetch_and_export_to_csv
+
+    rows_by_start = {
+        "2023-01-01": [{"id": 1, "created_at": "2023-01-01"}],
+        "2023-01-03": [],
+        "2023-01-05": [{"id": 5, "created_at": "2023-01-05"}, {"id": 6, "created_at": "2023-01-06"}],
+    }
+    borrowed = []
+    lock = threading.Lock()
+
+    def borrow():
+        conn = MagicMock()
+
+        def cursor(name=None, cursor_factory=None):
+            fake = FakeNamedCursor([])
+            original_execute = fake.execute
+
+            def execute(query):
+                original_execute(query)
+                fake.rows = list(rows_by_start[query.split("'")[1]])
+
+            fake.execute = execute
+            return fake
+
+        conn.cursor.side_effect = cursor
+        with lock:
+            borrowed.append(conn)
+        return nullcontext(conn)
+
+    output_file = str(tmp_path / "export.csv")
+    with patch("src.postgres_extract_export.pooled_connection", side_effect=borrow):
+        fetch_and_export_to_csv("event", "2023-01-01", "2023-01-06", output_file=output_file, parallelism=3)
+
+    assert len(borrowed) == 3
+    with open(output_file) as f:
+        assert f.read().splitlines() == ["created_at,id", "2023-01-01,1", "2023-01-05,5", "2023-01-06,6"]
+    assert os.listdir(tmp_path) == ["export.csv"]
+
+
+def test_build_keyset_query():
+    from src.postgres_extract_export import build_keyset_query
+
+    assert build_keyset_query("event", page_size=2) == (
+        "SELECT * FROM event  ORDER BY created_at ASC, id ASC LIMIT 2;", ())
+    assert build_keyset_query("event", start_date="2023-01-01", page_size=2) == (
+        "SELECT * FROM event WHERE created_at >= %s ORDER BY created_at ASC, id ASC LIMIT 2;", ("2023-01-01",))
+    assert build_keyset_query("event", "updated_at", "event_id", after=("2023-01-02T00:00:00", 7), page_size=2) == (
+        "SELECT * FROM event WHERE (updated_at, event_id) > (%s, %s) ORDER BY updated_at ASC, event_id ASC LIMIT 2;",
+        ("2023-01-02T00:00:00", 7))
+
+
+def test_iter_incremental_pages_persists_cursor_per_page(tmp_path):
+    """The cursor is saved after each handled page, so a failed run resumes where it stopped."""
+    from datetime import datetime
+    from src.etl_state import ETLStateStore
+    from src.postgres_extract_export import iter_incremental_pages, get_keyset_cursor
+
+    table = [{"id": i, "created_at": datetime(2023, 1, 1 + i // 2)} for i in range(5)]
+
+    def fake_execute(conn, query, params):
+        if params and len(params) == 2:
+            # Within a run the cursor is a datetime, after a restart an ISO string
+            after = (str(params[0]).replace(" ", "T"), params[1])
+            return [row for row in table if (row["created_at"].isoformat(), row["id"]) > after][:2]
+        return table[:2]
+
+    state_file = str(tmp_path / "state.json")
+    with patch("src.postgres_extract_export.pooled_connection", side_effect=lambda: nullcontext(MagicMock())), \
+            patch("src.postgres_extract_export.execute_query", side_effect=fake_execute):
+        pages = iter_incremental_pages("event", ETLStateStore(state_file), page_size=2)
+        assert [row["id"] for row in next(pages)] == [0, 1]
+        assert [row["id"] for row in next(pages)] == [2, 3]
+        # The run fails while handling the second page
+        pages.close()
+
+        state = ETLStateStore(state_file)
+        assert get_keyset_cursor(state, "event") == ("2023-01-01T00:00:00", 1)
+        resumed = [row["id"] for page in iter_incremental_pages("event", state, page_size=2) for row in page]
+        assert resumed == [2, 3, 4]
+
+        # Nothing new on the next run
+        state = ETLStateStore(state_file)
+        assert get_keyset_cursor(state, "event") == ("2023-01-03T00:00:00", 4)
+        assert list(iter_incremental_pages("event", state, page_size=2)) == []
+
+
+def test_incremental_runs_keep_every_row(tmp_path, monkeypatch):
+    """Two incremental runs write separate files that together hold every row once."""
+    import csv
+    import src.postgres_extract_export as pee
+
+    table = [{"id": i, "created_at": datetime(2023, 1, 1 + i)} for i in range(3)]
+    events = []
+
+    def fake_execute(conn, query, params):
+        after = (str(params[0]).replace(" ", "T"), params[1]) if params else None
+        return [row for row in table if after is None or (row["created_at"].isoformat(), row["id"]) > after][:2]
+
+    real_fsync, real_save = os.fsync, pee.ETLStateStore.save
+    monkeypatch.setattr(pee, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(pee.os, "fsync", lambda fd: (events.append("fsync"), real_fsync(fd)))
+    monkeypatch.setattr(pee.ETLStateStore, "save", lambda self: (events.append("save"), real_save(self)))
+    argv = ["--table", "event", "--incremental", "--page-size", "2", "--state-file", str(tmp_path / "state.json")]
+    with patch.object(pee, "pooled_connection", side_effect=lambda: nullcontext(MagicMock())), \
+            patch.object(pee, "execute_query", side_effect=fake_execute):
+        assert pee.main(argv) == 0
+        table += [{"id": i, "created_at": datetime(2023, 1, 1 + i)} for i in range(3, 5)]
+        assert pee.main(argv) == 0
+
+    outputs = sorted(str(path) for path in tmp_path.glob("event_incremental_*.csv"))
+    assert len(outputs) == 2
+    exported = []
+    for path in outputs:
+        with open(path, newline="") as f:
+            exported += [int(row["id"]) for row in csv.DictReader(f)]
+    assert exported == [0, 1, 2, 3, 4]
+    # Every page reaches the disk before the cursor after it is saved
+    assert events[:4] == ["fsync", "save", "fsync", "save"]
+
+    # An existing output file is never overwritten
+    existing = tmp_path / "existing.csv"
+    existing.write_text("id\n9\n")
+    table.append({"id": 5, "created_at": datetime(2023, 1, 6)})
+    with patch.object(pee, "pooled_connection", side_effect=lambda: nullcontext(MagicMock())), \
+            patch.object(pee, "execute_query", side_effect=fake_execute):
+        assert pee.main(argv + ["--output", str(existing)]) == 1
+    assert existing.read_text() == "id\n9\n"
+    assert pee.get_keyset_cursor(pee.ETLStateStore(str(tmp_path / "state.json")), "event")[1] == 4
@@ -0,0 +1,112 @@
+import pytest
+from unittest.mock import patch
+
+from src.rate_limiter import (
+    RateLimiter,
+    SlidingWindow,
+    klaviyo_rate_limiter,
+    KLAVIYO_RATE_LIMIT_TIERS
+)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("src.rate_limiter.time.monotonic", fake.monotonic), \
+         patch("src.rate_limiter.time.sleep", fake.sleep):
+        yield fake
+
+
+def test_rate_limiter_enforces_steady_limit(clock):
+    limiter = RateLimiter(burst_per_second=10, steady_per_minute=15)
+    
+    # 15 requests fit in the first minute, spaced by the burst limit
+    start = clock.now
+    for _ in range(15):
+        limiter.acquire()
+    assert clock.now - start <= 1.0
+    
+    # The 16th has to wait until the first one leaves the 60s window
+    limiter.acquire()
+    assert clock.now - start == pytest.approx(60.0)
+
+
+def test_rate_limiter_never_exceeds_per_minute_cap(clock):
+    limiter = RateLimiter(burst_per_second=10, steady_per_minute=15)
+    times = []
+    for _ in range(100):
+        limiter.acquire()
+        times.append(clock.now)
+    
+    # No 60 second window, including the first, holds more than 15 requests
+    for i, t in enumerate(times):
+        assert sum(1 for other in times[i:] if other < t + 60) <= 15
+    # ... and no one second window more than 10
+    for i, t in enumerate(times):
+        assert sum(1 for other in times[i:] if other < t + 1) <= 10
+
+
+def test_rate_limiter_returns_burst_token_when_steady_is_empty(clock):
+    limiter = RateLimiter(burst_per_second=1, steady_per_minute=1)
+    assert limiter.try_acquire() == 0
+    clock.sleep(1)
+    # Steady bucket is empty, so the burst token must be handed back
+    assert limiter.try_acquire() > 0
+    assert limiter.burst.try_acquire() == 0
+
+
+def test_klaviyo_rate_limiter_tiers():
+    limiter = klaviyo_rate_limiter("m")
+    burst, steady = KLAVIYO_RATE_LIMIT_TIERS["M"]
+    assert limiter.burst.capacity == burst
+    assert limiter.steady.capacity == steady
+    
+    with pytest.raises(ValueError, match="Unknown Klaviyo rate limit tier"):
+        klaviyo_rate_limiter("XXL")
+
+
+def test_pause_holds_every_caller(clock):
+    limiter = RateLimiter(10, 600)
+    limiter.pause(5)
+
+    assert limiter.try_acquire() == pytest.approx(5)
+    clock.sleep(5)
+    assert limiter.try_acquire() == 0
+
+
+def test_sliding_window_release_frees_slot(clock):
+    window = SlidingWindow(capacity=1, window=60)
+    assert window.try_acquire() == 0
+    assert window.try_acquire() == pytest.approx(60)
+    window.release()
+    assert window.try_acquire() == 0
+
+
+@pytest.mark.parametrize("tier", ["XS", "S"])
+def test_klaviyo_tier_cap_holds_from_cold_start(clock, tier):
+    burst, steady = KLAVIYO_RATE_LIMIT_TIERS[tier]
+    limiter = klaviyo_rate_limiter(tier)
+    start = clock.now
+    taken = 0
+    while clock.now < start + 60:
+        if limiter.try_acquire() == 0:
+            taken += 1
+        else:
+            clock.sleep(0.05)
+    assert taken == steady
+
+    # A Retry-After pause still holds the tier limiter
+    limiter.pause(30)
+    assert limiter.try_acquire() == pytest.approx(30)
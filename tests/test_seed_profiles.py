@@ -9,7 +9,6 @@ sys_path_patch = pytest.importorskip("sys").path.insert(0, os.path.abspath(os.pa
 from seed_profiles import (
     random_email,
     random_profile,
-    klaviyo_retry,
     post_json_api,
     create_and_subscribe_profiles
 )
@@ -52,106 +51,6 @@ class TestRandomProfile:
         assert profile["email"] == "test+1@example.com"
 
 
-class TestKlaviyoRetry:
-    @pytest.mark.parametrize("status_code", [200, 201, 202])
-    def test_retry_decorator_success_2xx(self, status_code):
-        """Test that the retry decorator returns the response for 200, 201, 202 status codes"""
-        mock_response = MagicMock()
-        mock_response.status_code = status_code
-
-        @klaviyo_retry
-        def mock_func():
-            return mock_response
-
-        result = mock_func()
-        assert result == mock_response
-        # raise_for_status should not be called for 200, 201, 202
-        mock_response.raise_for_status.assert_not_called()
-    
-    def test_retry_decorator_other_2xx_success(self):
-        """Test that the retry decorator returns the response for other 2xx status codes"""
-        mock_response = MagicMock()
-        mock_response.status_code = 204  # No Content
-        mock_response.raise_for_status.return_value = None
-
-        @klaviyo_retry
-        def mock_func():
-            return mock_response
-
-        result = mock_func()
-        assert result == mock_response
-        # raise_for_status should be called for other 2xx
-        mock_response.raise_for_status.assert_called_once()
-
-    def test_retry_decorator_rate_limit(self):
-        """Test that the retry decorator handles rate limits"""
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-        mock_response.headers = {}
-
-        # Create a proper HTTPError with a response attribute
-        mock_error = requests.exceptions.HTTPError()
-        mock_error.response = mock_response
-
-        call_count = 0
-
-        @klaviyo_retry
-        def mock_func():
-            nonlocal call_count
-            call_count += 1
-            if call_count == 1:
-                raise mock_error
-            return mock_response
-
-        with patch('time.sleep'):
-            result = mock_func()
-
-        assert result == mock_response
-        assert call_count == 2
-
-    def test_retry_decorator_server_error(self):
-        """Test that the retry decorator handles server errors"""
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.headers = {}
-
-        # Create a proper HTTPError with a response attribute
-        mock_error = requests.exceptions.HTTPError()
-        mock_error.response = mock_response
-
-        call_count = 0
-
-        @klaviyo_retry
-        def mock_func():
-            nonlocal call_count
-            call_count += 1
-            if call_count == 1:
-                raise mock_error
-            return mock_response
-
-        with patch('time.sleep'):
-            result = mock_func()
-
-        assert result == mock_response
-        assert call_count == 2
-
-    def test_retry_decorator_max_retries(self):
-        """Test that the retry decorator raises an error after max retries"""
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-        mock_response.headers = {}
-
-        mock_error = requests.exceptions.HTTPError()
-        mock_error.response = mock_response
-
-        @klaviyo_retry
-        def mock_func():
-            raise mock_error
-
-        with patch('time.sleep'), pytest.raises(RuntimeError, match="Max retries exceeded"):
-            mock_func()
-
-
 class TestPostJsonApi:
     def test_post_json_api_dry_run(self):
         """Test that post_json_api returns a mock response in dry run mode"""
@@ -163,7 +62,7 @@ class TestPostJsonApi:
         assert callable(response.raise_for_status)
         mock_print.assert_called_once()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('uuid.uuid4')
     def test_post_json_api_real_request(self, mock_uuid, mock_post):
         """Test that post_json_api makes a real request with proper headers"""
@@ -15,8 +15,10 @@ from src.supermetrics_klaviyo_pull import (
     fetch_all_data,
     write_to_json,
     write_to_csv,
-    REPORT_TYPE_MAP
+    REPORT_TYPE_MAP,
+    RateLimiter
 )
+from src.utils.date_ranges import split_date_range
 
 # Test fixtures
 @pytest.fixture
@@ -24,6 +26,13 @@ def mock_api_key():
     with patch.dict(os.environ, {"SUPERMETRICS_API_KEY": "test_api_key"}):
         yield
 
+@pytest.fixture(autouse=True)
+def fast_scheduler():
+    # A generous budget so tests don't wait on the real queries-per-minute limit
+    scheduler = RateLimiter(100, 6000)
+    with patch("src.supermetrics_klaviyo_pull._scheduler", scheduler):
+        yield scheduler
+
 @pytest.fixture
 def temp_data_dir():
     temp_dir = tempfile.mkdtemp()
@@ -142,7 +151,7 @@ def test_fetch_data_with_pagination(mock_post, mock_api_key):
     assert mock_post.call_count == 2
 
 @patch("src.supermetrics_klaviyo_pull.requests.post")
-def test_fetch_data_rate_limit_retry(mock_post, mock_api_key):
+def test_fetch_data_rate_limit_retry(mock_post, mock_api_key, fast_scheduler):
     # Setup mock responses for rate limiting
     mock_response1 = MagicMock()
     mock_response1.status_code = 429
@@ -158,13 +167,16 @@ def test_fetch_data_rate_limit_retry(mock_post, mock_api_key):
     mock_post.side_effect = [mock_response1, mock_response2]
     
     # Call the function with rate limiting
-    with patch("src.supermetrics_klaviyo_pull.time.sleep"):
+    with patch("src.supermetrics_klaviyo_pull.time.sleep"), \
+         patch.object(fast_scheduler, "pause") as mock_pause:
         data, next_page_token = fetch_data("2025-05-01", "2025-05-31", "campaign")
     
     # Assertions
     assert data == [{"id": "1"}]
     assert next_page_token is None
     assert mock_post.call_count == 2
+    # Retry-After pauses the shared scheduler rather than sleeping locally
+    mock_pause.assert_called_once_with(1)
 
 @patch("src.supermetrics_klaviyo_pull.requests.post")
 def test_fetch_data_server_error_retry(mock_post, mock_api_key):
@@ -259,3 +271,220 @@ def test_write_to_csv_empty_data(temp_data_dir):
     # Test writing empty data to CSV
     csv_file = write_to_csv([], "some_file.json")
     assert csv_file is None
+
+def test_split_date_range():
+    assert split_date_range("2025-01-01", "2025-01-17", 7) == [
+        ("2025-01-01", "2025-01-07"),
+        ("2025-01-08", "2025-01-14"),
+        ("2025-01-15", "2025-01-17")
+    ]
+    assert split_date_range("2025-01-01", "2025-01-01", 30) == [("2025-01-01", "2025-01-01")]
+    with pytest.raises(ValueError):
+        split_date_range("2025-01-02", "2025-01-01", 7)
+    with pytest.raises(ValueError):
+        split_date_range("2025-01-01", "2025-01-02", 0)
+
+def test_fetch_all_data_sharded(mock_api_key):
+    # One page per shard; event_2 straddles the shard edge and is returned twice
+    shard_records = {
+        "2025-05-01": [{"event_id": "event_1"}, {"event_id": "event_2"}],
+        "2025-05-08": [{"event_id": "event_2"}, {"event_id": "event_3"}],
+        "2025-05-15": [{"event_id": "event_4"}]
+    }
+    calls = []
+
+    def fake_fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False, scheduler=None,
+                        raise_on_failure=False, fields=None):
+        calls.append((start_date, end_date))
+        return shard_records[start_date], None
+
+    with patch("src.supermetrics_klaviyo_pull.fetch_data", side_effect=fake_fetch_data):
+        data = fetch_all_data("2025-05-01", "2025-05-17", "events", shard_days=7, max_concurrency=3,
+                              scheduler=RateLimiter(100, 6000))
+
+    assert sorted(calls) == [("2025-05-01", "2025-05-07"), ("2025-05-08", "2025-05-14"),
+                             ("2025-05-15", "2025-05-17")]
+    assert [r["event_id"] for r in data] == ["event_1", "event_2", "event_3", "event_4"]
+
+def test_merge_shards_dedups_only_adjacent_keyed_records():
+    from src.supermetrics_klaviyo_pull import merge_shards
+    # Campaign rows have no natural key, so identical rows are all kept
+    campaign_rows = [[{"campaign_id": "c1", "opened": 1}], [{"campaign_id": "c1", "opened": 1}]]
+    assert len(merge_shards(campaign_rows, "campaign")) == 2
+    # Event keys are only compared with the previous shard
+    shards = [[{"event_id": "e1"}], [{"event_id": "e1"}, {"event_id": "e2"}], [{"event_id": "e3"}],
+              [{"event_id": "e1"}]]
+    assert [r["event_id"] for r in merge_shards(shards, "events")] == ["e1", "e2", "e3", "e1"]
+
+def test_ndjson_writer_keeps_only_two_key_windows(temp_data_dir):
+    from src.supermetrics_klaviyo_pull import NDJSONWriter, read_ndjson
+    path = os.path.join(temp_data_dir, "events.ndjson")
+    writer = NDJSONWriter(path, key_func=lambda record: record.get("event_id"))
+    for shard in ([{"event_id": "e1"}, {"other": 1}, {"other": 1}], [{"event_id": "e1"}, {"event_id": "e2"}],
+                  [{"event_id": "e3"}]):
+        writer.next_window()
+        writer.write_records(shard)
+    writer.close()
+
+    assert writer.duplicates == 1
+    assert len(writer._previous) + len(writer._current) == 2
+    assert [r.get("event_id") for r in read_ndjson(path)] == ["e1", None, None, "e2", "e3"]
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_stream_all_data_writes_ndjson_and_manifest(temp_data_dir, mock_api_key, compress):
+    from src.supermetrics_klaviyo_pull import stream_all_data, read_ndjson, manifest_path_for, ndjson_to_csv
+    shard_records = {
+        "2025-05-01": [[{"event_id": "event_1", "device": "Mobile"}], [{"event_id": "event_2"}]],
+        "2025-05-08": [[{"event_id": "event_2"}, {"event_id": "event_3", "email": "a@example.com"}]]
+    }
+
+    def fake_fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False, scheduler=None,
+                        raise_on_failure=False, fields=None):
+        pages = shard_records[start_date]
+        index = int(page_token or 0)
+        return pages[index], (str(index + 1) if index + 1 < len(pages) else None)
+
+    with patch("src.supermetrics_klaviyo_pull.fetch_data", side_effect=fake_fetch_data):
+        output_file = stream_all_data("2025-05-01", "2025-05-14", "events", shard_days=7, compress=compress)
+
+    assert output_file.endswith(".ndjson.gz" if compress else ".ndjson")
+    assert [r["event_id"] for r in read_ndjson(output_file)] == ["event_1", "event_2", "event_3"]
+    with open(manifest_path_for(output_file)) as f:
+        manifest = json.load(f)
+    assert manifest["rows"] == 3
+    assert manifest["fields"] == ["device", "email", "event_id"]
+    assert manifest["compression"] == ("gzip" if compress else None)
+    # No shard part files are left behind
+    assert sorted(os.listdir(temp_data_dir)) == sorted([os.path.basename(output_file),
+                                                        os.path.basename(manifest_path_for(output_file))])
+
+    csv_file = ndjson_to_csv(output_file)
+    with open(csv_file) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "device,email,event_id"
+    assert lines[1:] == ["Mobile,,event_1", ",,event_2", ",a@example.com,event_3"]
+
+def test_stream_all_data_resumes_from_checkpoint(temp_data_dir, mock_api_key):
+    from src.supermetrics_klaviyo_pull import (stream_all_data, read_ndjson, checkpoint_path_for,
+                                               SupermetricsFetchError)
+    pages = {None: ([{"event_id": "event_1"}], "p2"), "p2": ([{"event_id": "event_2"}], "p3"),
+             "p3": ([{"event_id": "event_3"}], None)}
+    requested = []
+
+    def flaky_fetch_data(start_date, end_date, report_type, page_token=None, dry_run=False, scheduler=None,
+                         raise_on_failure=False, fields=None):
+        requested.append(page_token)
+        if page_token == "p3" and requested.count("p3") == 1:
+            raise SupermetricsFetchError("boom")
+        return pages[page_token]
+
+    output_file = os.path.join(temp_data_dir, "events.ndjson")
+    with patch("src.supermetrics_klaviyo_pull.fetch_data", side_effect=flaky_fetch_data):
+        with pytest.raises(SupermetricsFetchError):
+            stream_all_data("2025-05-01", "2025-05-07", "events", output_file=output_file)
+
+        with open(checkpoint_path_for(output_file)) as f:
+            checkpoint = json.load(f)
+        assert checkpoint["shards"]["2025-05-01..2025-05-07"]["page_token"] == "p3"
+        assert checkpoint["shards"]["2025-05-01..2025-05-07"]["rows"] == 2
+
+        # Resume locates the interrupted run's output from its checkpoint
+        with patch("src.supermetrics_klaviyo_pull.find_checkpointed_output", return_value=output_file):
+            resumed = stream_all_data("2025-05-01", "2025-05-07", "events", resume=True)
+
+    assert resumed == output_file
+    assert requested == [None, "p2", "p3", "p3"]
+    assert [r["event_id"] for r in read_ndjson(output_file)] == ["event_1", "event_2", "event_3"]
+    assert not os.path.exists(checkpoint_path_for(output_file))
+    assert not os.path.exists(output_file + ".parts")
+
+def test_find_checkpointed_output(temp_data_dir):
+    from src.supermetrics_klaviyo_pull import BackfillCheckpoint, find_checkpointed_output, checkpoint_path_for
+    run = {"report_type": "events", "start_date": "2025-05-01", "end_date": "2025-05-07",
+           "shard_days": None, "compress": False}
+    output_file = os.path.join(temp_data_dir, "supermetrics_raw_events_20250508.ndjson")
+    BackfillCheckpoint(checkpoint_path_for(output_file), run, output_file).save()
+
+    assert find_checkpointed_output(run, temp_data_dir) == output_file
+    assert find_checkpointed_output({**run, "end_date": "2025-05-08"}, temp_data_dir) is None
+
+@patch("src.supermetrics_klaviyo_pull.requests.post")
+def test_fetch_data_raise_on_failure(mock_post, mock_api_key):
+    from src.supermetrics_klaviyo_pull import SupermetricsFetchError
+    mock_response = MagicMock()
+    mock_response.status_code = 500
+    mock_post.return_value = mock_response
+
+    with patch("src.supermetrics_klaviyo_pull.time.sleep"):
+        assert fetch_data("2025-05-01", "2025-05-31", "campaign") == ([], None)
+        with pytest.raises(SupermetricsFetchError):
+            fetch_data("2025-05-01", "2025-05-31", "campaign", raise_on_failure=True)
+
+def test_pull_reports_runs_reports_concurrently(temp_data_dir, mock_api_key):
+    import threading
+    from src.supermetrics_klaviyo_pull import pull_reports
+    events_started = threading.Event()
+    campaign_done = threading.Event()
+
+    def fake_fetch_all_data(start_date, end_date, report_type, dry_run=False, shard_days=None,
+                            max_concurrency=None, fields=None):
+        if report_type == "events":
+            events_started.set()
+            # The slow events pull must not hold up the campaign pull
+            assert campaign_done.wait(timeout=5)
+            return [{"event_id": "event_1"}]
+        assert events_started.wait(timeout=5)
+        campaign_done.set()
+        return [{"campaign_id": "campaign_1"}]
+
+    with patch("src.supermetrics_klaviyo_pull.fetch_all_data", side_effect=fake_fetch_all_data):
+        outputs = pull_reports("2025-05-01", "2025-05-07", ["campaign", "events"])
+
+    assert set(outputs) == {"campaign", "events"}
+    assert outputs["campaign"] != outputs["events"]
+    with open(outputs["events"]) as f:
+        assert json.load(f) == [{"event_id": "event_1"}]
+
+def test_report_fields_projection():
+    from src.supermetrics_klaviyo_pull import report_fields
+    from src.lookml_field_mapper import FIELD_MAP
+
+    campaign_fields = report_fields("campaign")
+    assert "*" not in campaign_fields
+    # Raw fields normalized by FIELD_MAP and fields read by the Looker extract
+    assert set(FIELD_MAP.keys()) <= set(campaign_fields)
+    assert {"campaign_id", "recipients", "unsubscribes"} <= set(campaign_fields)
+    # Looker names are mapped back to the Klaviyo fields they come from
+    assert not {"date", "campaign_name", "subject_line"} & set(campaign_fields)
+    assert len(campaign_fields) == len(set(campaign_fields))
+    # Events keep the field used to deduplicate shard edges
+    assert "event_id" in report_fields("events")
+
+    assert report_fields("campaign", all_fields=True) == ["*"]
+    with patch("src.supermetrics_klaviyo_pull.PROJECT_FIELDS", False):
+        assert report_fields("campaign") == ["*"]
+        assert report_fields("campaign", all_fields=False) == campaign_fields
+
+def test_main_all_fields_is_passed_not_global(mock_api_key):
+    from src import supermetrics_klaviyo_pull
+    project_fields = supermetrics_klaviyo_pull.PROJECT_FIELDS
+    argv = ["prog", "--start-date", "2025-05-01", "--end-date", "2025-05-07", "--report-type", "campaign",
+            "--all-fields"]
+    with patch("sys.argv", argv), \
+         patch("src.supermetrics_klaviyo_pull.pull_reports", return_value={"campaign": "out.json"}) as mock_pull:
+        assert supermetrics_klaviyo_pull.main() == 0
+
+    assert mock_pull.call_args.kwargs["all_fields"] is True
+    assert supermetrics_klaviyo_pull.PROJECT_FIELDS == project_fields
+
+@patch("src.supermetrics_klaviyo_pull.requests.post")
+def test_fetch_data_sends_projected_fields(mock_post, mock_api_key):
+    from src.supermetrics_klaviyo_pull import report_fields
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"data": [], "next_page_token": None}
+    mock_post.return_value = mock_response
+
+    fetch_data("2025-05-01", "2025-05-31", "events")
+
+    assert mock_post.call_args[1]["json"]["fields"] == report_fields("events")